@@ -0,0 +1,251 @@
+# batch_export.py
+
+import json
+import os
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Optional, Any, Tuple, Iterator
+
+import pandas as pd
+
+from exporter import PdfExporter, SheetComponent, export_mixed_pdf, load_template
+from utils.card_renderer import ImageCache
+from utils.card_cache import CardCache, default_cache_dir, DEFAULT_CACHE_MAX_MB
+from utils.record_source import iter_records
+from utils.export_options import export_options
+
+# Manifest keys passed through to PdfExporter.export_to_pdf's option objects (same names as the CLI options)
+JOB_EXPORT_OPTIONS = ('workers', 'profile', 'text_mode', 'outline_mode', 'template_form',
+                      'image_codec', 'jpeg_quality', 'page_compression', 'queue_depth',
+                      'shard_workers', 'shard_pages', 'tile', 'tile_overlap', 'margin', 'gutter', 'rotation')
+# Manifest keys describing the job itself
+JOB_KEYS = ('name', 'template', 'data', 'output', 'cards', 'page', 'size', 'stream', 'components')
+# Keys of each entry of a mixed-size job's 'components' list
+COMPONENT_KEYS = ('template', 'data', 'size', 'per_page', 'stream')
+
+
+def parse_size(size: Any, where: str) -> Optional[Tuple[float, float]]:
+    """A manifest size ("W,H" or [W, H] in inches) as a (W, H) tuple, or None when not given."""
+    if size is None:
+        return None
+    try:
+        parts = size.split(',') if isinstance(size, str) else size
+        width, height = (float(part) for part in parts)
+    except (TypeError, ValueError):
+        raise ValueError(f"{where}: 'size' must be \"W,H\" or [W, H] in inches, not {size!r}.")
+    return width, height
+
+
+def read_records(data: Optional[str], stream: bool = False) -> Optional[Iterator[Dict[str, Any]]]:
+    """The merge rows of a CSV (streamed from disk with stream=True), or None when there is no data."""
+    if not data:
+        return None
+    if stream:
+        return iter_records(csv_path=data)
+    return iter_records(df=pd.read_csv(data))
+
+
+class JobComponent:
+    """
+    One kind of component of a mixed-size job: a template merged with its own CSV, printed at size
+    (W, H) inches (None: the template's own size), per_page of them on each page (None: as many as
+    fit beside the kinds listed before it).
+    """
+
+    def __init__(self, template: str, data: Optional[str] = None, size: Optional[Tuple[float, float]] = None,
+                 per_page: Optional[int] = None, stream: bool = False):
+        self.template = template
+        self.data = data
+        self.size = size
+        self.per_page = per_page
+        self.stream = stream
+
+    @classmethod
+    def from_dict(cls, entry: Dict[str, Any], resolve, where: str) -> 'JobComponent':
+        if not isinstance(entry, dict):
+            raise ValueError(f"{where}: expected an object, got {type(entry).__name__}.")
+        unknown = sorted(set(entry) - set(COMPONENT_KEYS))
+        if unknown:
+            raise ValueError(f"{where}: unknown keys {', '.join(unknown)}. Allowed: {', '.join(COMPONENT_KEYS)}.")
+        if not entry.get('template'):
+            raise ValueError(f"{where}: 'template' is required.")
+        per_page = entry.get('per_page')
+        if per_page is not None and (not isinstance(per_page, int) or per_page < 1):
+            raise ValueError(f"{where}: 'per_page' must be a positive whole number or null, not {per_page!r}.")
+        return cls(resolve(entry['template']), resolve(entry.get('data')), parse_size(entry.get('size'), where),
+                   per_page, bool(entry.get('stream', False)))
+
+    def records(self) -> Optional[Iterator[Dict[str, Any]]]:
+        return read_records(self.data, self.stream)
+
+
+class ExportJob:
+    """
+    One entry of a batch manifest: a template merged with a CSV into one PDF, with its layout
+    (cards: 8, 9 or None for one component per cell of size W,H inches, or per page) and page size.
+    A job with components instead lays several kinds (JobComponent: cards, tokens, tiles, each with
+    its own template, data and size) out on shared pages; cards then does not apply.
+    Relative paths in the manifest are resolved against the manifest's directory; image paths
+    inside the CSV are resolved against the working directory, as for a single export.
+    """
+
+    def __init__(self, template: Optional[str], output: str, data: Optional[str] = None, cards: Optional[int] = None,
+                 page: str = 'LETTER', size: Optional[Tuple[float, float]] = None, stream: bool = False,
+                 name: Optional[str] = None, options: Optional[Dict[str, Any]] = None,
+                 components: Optional[List[JobComponent]] = None):
+        self.template = template
+        self.output = output
+        self.data = data
+        self.cards = cards
+        self.page = page.upper()
+        self.size = size
+        self.stream = stream
+        self.name = name or os.path.splitext(os.path.basename(output))[0]
+        self.options = options or {}
+        self.components = components
+
+    @classmethod
+    def from_dict(cls, entry: Dict[str, Any], base_dir: str = '.', index: int = 0) -> 'ExportJob':
+        """Builds a job from a manifest entry, raising ValueError with the job's position for bad entries."""
+        where = f"job {index + 1}" + (f" ('{entry['name']}')" if isinstance(entry, dict) and entry.get('name') else '')
+        if not isinstance(entry, dict):
+            raise ValueError(f"{where}: expected an object, got {type(entry).__name__}.")
+        unknown = sorted(set(entry) - set(JOB_KEYS) - set(JOB_EXPORT_OPTIONS))
+        if unknown:
+            raise ValueError(f"{where}: unknown keys {', '.join(unknown)}. "
+                             f"Allowed: {', '.join(JOB_KEYS + JOB_EXPORT_OPTIONS)}.")
+        mixed = 'components' in entry
+        for key in ('output',) if mixed else ('template', 'output'):
+            if not entry.get(key):
+                raise ValueError(f"{where}: '{key}' is required.")
+        cards = None if mixed else entry.get('cards')
+        if cards not in (None, 8, 9):
+            raise ValueError(f"{where}: 'cards' must be 8, 9 or null, not {cards!r}.")
+        page = str(entry.get('page', 'LETTER')).upper()
+        if page not in ('LETTER', 'A4'):
+            raise ValueError(f"{where}: 'page' must be letter or a4, not {entry.get('page')!r}.")
+        size = parse_size(entry.get('size'), where)
+
+        def resolve(path: Optional[str]) -> Optional[str]:
+            return os.path.join(base_dir, path) if path and not os.path.isabs(path) else path
+
+        components = None
+        if mixed:
+            if not isinstance(entry['components'], list) or not entry['components']:
+                raise ValueError(f"{where}: 'components' must be a non-empty list.")
+            misplaced = [key for key in ('template', 'data', 'size', 'stream') if key in entry]
+            if misplaced:
+                raise ValueError(f"{where}: {', '.join(misplaced)} belong in each of the 'components'.")
+            components = [JobComponent.from_dict(component, resolve, f"{where}, component {i + 1}")
+                          for i, component in enumerate(entry['components'])]
+
+        return cls(resolve(entry.get('template')), resolve(entry['output']), resolve(entry.get('data')),
+                   cards=cards, page=page, size=size, stream=bool(entry.get('stream', False)),
+                   name=entry.get('name'),
+                   options={key: entry[key] for key in JOB_EXPORT_OPTIONS if key in entry},
+                   components=components)
+
+    def records(self) -> Optional[Iterator[Dict[str, Any]]]:
+        """The job's merge rows (streamed from disk with stream=True), or None when it has no data."""
+        return read_records(self.data, self.stream)
+
+    def export_args(self, **shared: Any) -> Dict[str, Any]:
+        """
+        The layout, render, cache and run options for PdfExporter.export_to_pdf (see
+        utils/export_options.export_options), with shared (the batch's cache settings) added.
+        """
+        return export_options(dict(page=self.page, use_card=self.cards is not None, cards_per_page=self.cards,
+                                   custom_size=self.size, **self.options, **shared))
+
+
+def load_jobs(path: str) -> List[ExportJob]:
+    """
+    Reads a batch manifest: either a list of jobs, or {"defaults": {...}, "jobs": [...]} where
+    every job starts from the defaults. For example:
+
+        {"defaults": {"cards": 9, "page": "letter", "profile": "print"},
+         "jobs": [{"template": "deck.json", "data": "deck_en.csv", "output": "out/deck_en.pdf"},
+                  {"template": "deck.json", "data": "deck_de.csv", "output": "out/deck_de.pdf"},
+                  {"template": "tokens.json", "data": "tokens.csv", "output": "out/tokens.pdf",
+                   "cards": null, "size": "1,1"},
+                  {"output": "out/print_and_play.pdf", "components": [
+                      {"template": "deck.json", "data": "deck_en.csv", "size": "2.5,3.5", "per_page": 6},
+                      {"template": "tokens.json", "data": "tokens.csv", "size": "1,1"}]}]}
+    """
+    with open(path, 'r') as f:
+        manifest = json.load(f)
+    defaults: Dict[str, Any] = {}
+    if isinstance(manifest, dict):
+        defaults = manifest.get('defaults', {})
+        manifest = manifest.get('jobs')
+    if not isinstance(manifest, list):
+        raise ValueError("A batch manifest must be a list of jobs or an object with a 'jobs' list.")
+    base_dir = os.path.dirname(os.path.abspath(path))
+    return [ExportJob.from_dict({**defaults, **entry} if isinstance(entry, dict) else entry, base_dir, i)
+            for i, entry in enumerate(manifest)]
+
+
+class BatchExporter:
+    """
+    Runs many export jobs in one process, so they share what a separate prototy.py run per job
+    would rebuild every time: the FontManager's font index and loaded fonts, the decoded
+    pictures (one ImageCache), and the card cache directory, which is trimmed once at the end.
+    With concurrency > 1, jobs run on that many threads; rendering and compression release
+    the GIL for much of their work, and each job still uses its own pipeline and workers.
+    """
+
+    def __init__(self, font_manager, concurrency: int = 1, use_cache: bool = True,
+                 cache_dir: Optional[str] = None, cache_max_mb: int = DEFAULT_CACHE_MAX_MB):
+        self.font_manager = font_manager
+        self.concurrency = max(1, concurrency)
+        self.use_cache = use_cache
+        self.cache_dir = cache_dir or default_cache_dir()
+        self.cache_max_mb = cache_max_mb
+        self.image_cache = ImageCache()
+
+    def run_job(self, job: ExportJob) -> Tuple[bool, float, Optional[str]]:
+        """Exports one job; returns (succeeded, seconds, error message). Failures do not stop the batch."""
+        started = time.perf_counter()
+        print(f"\nBatchExporter: Starting '{job.name}' -> {job.output}")
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(job.output)), exist_ok=True)
+            export_args = job.export_args(use_cache=self.use_cache, cache_dir=self.cache_dir,
+                                          cache_max_mb=self.cache_max_mb)
+            if job.components:
+                components = [SheetComponent(self._exporter(component.template), component.records(),
+                                             component.size, component.per_page) for component in job.components]
+                export_mixed_pdf(job.output, components, **export_args)
+            else:
+                self._exporter(job.template).export_to_pdf(job.output, records=job.records(), **export_args)
+        except Exception as e:
+            traceback.print_exc()
+            return False, time.perf_counter() - started, str(e)
+        return True, time.perf_counter() - started, None
+
+    def _exporter(self, template: str) -> PdfExporter:
+        """A PdfExporter for one template, sharing the batch's decoded pictures."""
+        model = load_template(template, self.font_manager) # Own copy: renderers write merged values into its shapes
+        return PdfExporter(model, self.font_manager, image_cache=self.image_cache, trim_card_cache=False)
+
+    def run(self, jobs: List[ExportJob]) -> int:
+        """Runs every job (in manifest order, or concurrently), prints a summary and returns the number that failed."""
+        started = time.perf_counter()
+        if self.concurrency > 1:
+            with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='batch-job') as pool:
+                results = list(pool.map(self.run_job, jobs))
+        else:
+            results = [self.run_job(job) for job in jobs]
+
+        if self.use_cache:
+            removed = CardCache(self.cache_dir, '', max_bytes=int(self.cache_max_mb * 1024 * 1024)).trim()
+            if removed:
+                print(f"CardCache: Evicted {removed / (1024 * 1024):.1f} MB of least recently used cards.")
+
+        failed = 0
+        print(f"\nBatchExporter: {len(jobs)} jobs in {time.perf_counter() - started:.2f} s "
+              f"(images decoded {self.image_cache.misses}, reused {self.image_cache.hits}).")
+        for job, (ok, seconds, error) in zip(jobs, results):
+            failed += 0 if ok else 1
+            print(f"  {'ok    ' if ok else 'FAILED'} {seconds:7.2f} s  {job.name}" + (f": {error}" if error else ''))
+        return failed
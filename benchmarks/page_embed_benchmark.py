@@ -0,0 +1,64 @@
+# benchmarks/page_embed_benchmark.py
+#
+# Times how long it takes to hand one 9-up letter sheet (2550x3300 px at 300 dpi) to ReportLab,
+# with and without the PNG encode/decode round-trip export_to_pdf used to do before drawing it.
+#
+#   python benchmarks/page_embed_benchmark.py [pages]
+
+import io
+import os
+import sys
+import time
+
+from PIL import Image, ImageDraw
+from reportlab.pdfgen import canvas as pdf_canvas
+from reportlab.lib.pagesizes import LETTER
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.pdf_export import ImageRegistry
+
+
+def make_sheet(seed: int) -> Image.Image:
+    """A 3x3 sheet of card-like rasters: flat fills, outlines, some noise standing in for art."""
+    sheet = Image.new('RGB', (2550, 3300), (255, 255, 255))
+    draw = ImageDraw.Draw(sheet)
+    card_w, card_h = 750, 1050
+    for i in range(9):
+        x, y = 150 + (i % 3) * card_w, 75 + (i // 3) * card_h
+        draw.rectangle([x, y, x + card_w - 1, y + card_h - 1], outline=(0, 0, 0), width=12)
+        draw.ellipse([x + 75, y + 200, x + card_w - 75, y + 600], fill=((seed * 40 + i * 25) % 256, 120, 60))
+        art = Image.effect_noise((card_w - 150, 300), 40 + i).convert('RGB')
+        sheet.paste(art, (x + 75, y + 650))
+    return sheet
+
+
+def draw_with_png_round_trip(pdf, registry: ImageRegistry, sheet: Image.Image):
+    buf = io.BytesIO(); sheet.save(buf, 'PNG'); buf.seek(0)
+    registry.draw_image(pdf, Image.open(buf), 0, 0, LETTER[0], LETTER[1])
+
+
+def draw_direct(pdf, registry: ImageRegistry, sheet: Image.Image):
+    registry.draw_image(pdf, sheet, 0, 0, LETTER[0], LETTER[1])
+
+
+def run(draw_page, sheets) -> float:
+    pdf = pdf_canvas.Canvas(io.BytesIO(), pagesize=LETTER)
+    registry = ImageRegistry()
+    start = time.perf_counter()
+    for sheet in sheets:
+        draw_page(pdf, registry, sheet)
+        pdf.showPage()
+    pdf.save()
+    return time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    pages = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    sheets = [make_sheet(seed) for seed in range(pages)]
+
+    old = run(draw_with_png_round_trip, sheets)
+    new = run(draw_direct, sheets)
+    print(f"{pages} pages of {sheets[0].size[0]}x{sheets[0].size[1]} px")
+    print(f"  PNG round-trip: {old:.2f} s ({old / pages * 1000:.0f} ms/page)")
+    print(f"  direct:         {new:.2f} s ({new / pages * 1000:.0f} ms/page)")
+    print(f"  saved:          {(old - new) / pages * 1000:.0f} ms/page")
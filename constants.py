@@ -14,3 +14,4 @@ CONTAINER_TYPES = ['Text', 'Image']
 SHAPE_TYPES = list(SHAPE_BUTTONS.keys())
 GRID_SIZE = 18
 
+EXPORT_POLL_MS = 200 # How often the export progress dialog refreshes while a background export runs
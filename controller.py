@@ -6,7 +6,8 @@ import pandas as pd # For handling CSV data
 import io           # Potentially for in-memory data handling (e.g., image buffers, though might move with PDF)
 import traceback    # For printing detailed error info (especially in export)
 import math
-from typing import Optional, Any, Tuple, List, Dict, TYPE_CHECKING
+import threading    # Background PDF export
+from typing import Optional, Any, Tuple, List, Dict, Iterable, Iterator, Callable, TYPE_CHECKING
 
 # Tkinter and its modules for UI interaction and dialogs
 import tkinter as tk
@@ -28,10 +29,16 @@ from shapes.hexagon import Hexagon
 from utils.geometry import calculate_snap, parse_dimension, format_pixel_output, _update_coords_if_valid # Or other geometry utils used
 # Assuming FontManager is accessed via AppService, but might need import if used directly
 # from utils.font_manager import FontManager # Import if you use FontManager directly
-from model import DrawingModel, Layer # Import DrawingModel and Layer
-from view import DrawingView # Import DrawingView
+from model import DrawingModel, Layer, ModelSnapshot # Import DrawingModel and Layer
+from view import DrawingView, ExportProgressDialog # Import DrawingView
+from exporter import PdfExporter # Tk-free PDF export engine (also used headless by prototy.py)
+from utils.export_options import PageLayout, RenderOptions, RunOptions
+from utils.export_progress import ExportProgress, ExportCancelled
+from utils.record_source import iter_records, quantity_of
+from utils.export_profiles import EXPORT_PROFILES, DEFAULT_PROFILE
 # Assuming constants are in a central constants.py at the root level
 from constants import SHAPE_BUTTONS, CONTAINER_TYPES, SHAPE_TYPES# Import all necessary constants
+from constants import EXPORT_POLL_MS
 # from utils.pdf_export import export_pdf_from_records
 
 if TYPE_CHECKING:
@@ -79,7 +86,9 @@ class DrawingApp:
         self.current_file_path: Optional[str] = None
         self.csv_data_df: Optional[pd.DataFrame] = None
         self.csv_file_path: Optional[str] = None
+        self.csv_stream_rows: bool = False # True: only the header is loaded, rows are read from csv_file_path at export
         self._refocus_info: Optional[tuple] = None
+        self._export_progress: Optional[ExportProgress] = None # Set while a background export is running
 
 
         # Build Menubar (Controller responsibility)
@@ -1070,6 +1079,7 @@ class DrawingApp:
         self.current_file_path = None # Controller state
         self.csv_data_df = None # Controller state
         self.csv_file_path = None # Controller state
+        self.csv_stream_rows = False # Controller state
         self.view.master.title("Enhanced Vector Editor - Untitled") # Update View title
         self.view.hide_merge_panel() # Update View panel visibility
 
@@ -1092,7 +1102,7 @@ class DrawingApp:
             self.current_file_path = file_path # Controller state
             self.view.master.title(f"Enhanced Vector Editor - {os.path.basename(file_path)}") # Update View title
             self.view.hide_merge_panel() # Update View panel visibility
-            self.csv_data_df = None; self.csv_file_path = None; # Clear Controller state
+            self.csv_data_df = None; self.csv_file_path = None; self.csv_stream_rows = False # Clear Controller state
             print(f"Controller.open_drawing: Successfully loaded drawing from {file_path}.")
             # Model.from_dict notifies observers, triggering view.refresh_all
             # Force an immediate refresh
@@ -1170,7 +1180,7 @@ class DrawingApp:
 
     # --- Controller - CSV Import and PDF Export ---
 
-    def import_csv(self, path=None):
+    def import_csv(self, path=None, stream_rows: bool = False):
         if not path: 
             """Handles importing a CSV file (Controller logic)."""
             print("\nController.import_csv: Opening file dialog for CSV import.")
@@ -1179,9 +1189,15 @@ class DrawingApp:
 
         print(f"Controller.import_csv: Selected CSV file: {path}. Loading...")
         try:
-            self.csv_data_df = pd.read_csv(path) # Controller state
+            if stream_rows:
+                # Header only: the merge panel needs the columns, export streams the rows from disk
+                self.csv_data_df = pd.read_csv(path, nrows=0) # Controller state
+                print(f"Controller.import_csv: Loaded columns from {path}; rows will be streamed during export.")
+            else:
+                self.csv_data_df = pd.read_csv(path) # Controller state
+                print(f"Controller.import_csv: Successfully loaded {len(self.csv_data_df)} entries from {path}.")
             self.csv_file_path = path # Controller state
-            print(f"Controller.import_csv: Successfully loaded {len(self.csv_data_df)} entries from {path}.")
+            self.csv_stream_rows = stream_rows # Controller state
 
             self.view.show_merge_panel() # Update View panel visibility
             # Model state needs to be updated for merge status panel? No, View reads Model/Controller state
@@ -1191,7 +1207,7 @@ class DrawingApp:
         except Exception as e:
             print(f"Controller.import_csv: Failed to load CSV from {path}: {e}")
             messagebox.showerror("Error", f"Failed to load CSV:\n{e}")
-            self.csv_data_df = None; self.csv_file_path = None; # Clear Controller state
+            self.csv_data_df = None; self.csv_file_path = None; self.csv_stream_rows = False # Clear Controller state
             self.view.hide_merge_panel() # Ensure panel is hidden on error
             self.view.refresh_all(self.model) # Refresh View
 
@@ -1204,6 +1220,9 @@ class DrawingApp:
     def _on_export_pdf(self):
         """Handles the PDF export menu action (Controller logic)."""
         print("\nController._on_export_pdf: PDF export initiated.")
+        if self._export_progress is not None:
+            messagebox.showinfo("Export Running", "A PDF export is already running. Wait for it to finish or cancel it first.")
+            return
 
         # 1) Ask for output file
         path = filedialog.asksaveasfilename(
@@ -1262,7 +1281,6 @@ class DrawingApp:
 
         # 4) If using cards, ask how many per page (8 or 9)
         cards_per_page = None
-        rotate_flag = False
         if use_card:
             answer = simpledialog.askinteger(
                 "Cards Per Page",
@@ -1277,117 +1295,133 @@ class DrawingApp:
                     "Please enter 8 or 9."
                 )
                 return
-            cards_per_page = answer
+            cards_per_page = answer # 8-up turns the cards, 9-up keeps them upright (see PdfExporter._imposition_plan)
+
+        # 5) Which export profile? It sets the render DPI, image codec, compression, vector text and
+        #    outlines and the template form, so the renderer's internals need no questions of their own.
+        profile = simpledialog.askstring(
+            "Export Profile",
+            "Choose an export profile:\n" + "\n".join(f"{p.name}: {p.description}" for p in EXPORT_PROFILES.values()),
+            initialvalue=DEFAULT_PROFILE
+        )
+        if profile is None:
+            return
+        profile = profile.strip().lower()
+        if profile not in EXPORT_PROFILES:
+            messagebox.showerror(
+                "Invalid Input",
+                f"Export profile must be one of: {', '.join(EXPORT_PROFILES)}."
+            )
+            return
 
-            # On A4 with 8-up, we auto-rotate
-            if cards_per_page == 8 and page_choice == 'A4':
-                rotate_flag = True
+        # 5b) How many processes should render cards? 1 keeps rendering on this thread.
+        workers = simpledialog.askinteger(
+            "Render Workers",
+            "How many worker processes should render cards? (1 = no parallel rendering)",
+            initialvalue=1,
+            minvalue=1,
+            maxvalue=max(1, os.cpu_count() or 1)
+        )
+        if workers is None:
+            return
 
-         # --- CALL THE EXPORT METHOD ---
-        print("Controller._on_export_pdf: Calling export_to_pdf...")
-        try:
-            self.export_to_pdf(
-                export_path=path,
-                page=page_choice,
-                use_card=use_card,
-                custom_size=custom_size, # Pass the custom size tuple
-                cards_per_page=cards_per_page,
-                rotate_card=rotate_flag
-            )
-        except Exception as e:
-            # The export_to_pdf method already has error handling and messageboxes,
-            # but a final catch here can be useful too.
-            print(f"Controller._on_export_pdf: Error after calling export_to_pdf: {e}")
-            # messagebox.showerror("Export Error", f"An error occurred during PDF export:\n{e}\nCheck console for details.")
-
-    def export_to_pdf(self,
-                      export_path: str,
-                      page: str = 'LETTER',
-                      use_card: bool = False,
-                      custom_size: tuple[float, float] | None = None,
-                      cards_per_page: int | None = None,
-                      rotate_card: bool = False):
+         # --- START THE EXPORT IN THE BACKGROUND ---
+        print("Controller._on_export_pdf: Starting background export...")
+        self._start_background_export(
+            export_path=path,
+            layout=PageLayout(page=page_choice, use_card=use_card, custom_size=custom_size, # Pass the custom size tuple
+                              cards_per_page=cards_per_page),
+            render=RenderOptions(profile=profile),
+            run=RunOptions(workers=workers)
+        )
+
+    def _start_background_export(self, export_path: str, **export_args):
         """
-        Exports the drawing to a PDF, supporting 8-up/9-up card layouts or custom sizes.
+        Runs export_to_pdf on a worker thread so the editor stays responsive, and opens an
+        ExportProgressDialog (cards, pages, throughput, ETA, Cancel) that the Tk loop refreshes.
+        The export works from a ModelSnapshot and a snapshot of the merge rows taken now,
+        so edits made while it runs do not end up in (or break) the PDF.
         """
-        import io
-        from reportlab.pdfgen import canvas as pdf_canvas
-        from reportlab.lib.pagesizes import LETTER, A4
-        from reportlab.lib.units import inch
-        from PIL import Image as PILImage
-
-        print(f"\nExporting PDF to {export_path}, page={page}, use_card={use_card}, cards={cards_per_page}, rotate={rotate_card}")
-        pagesize = LETTER if page.upper()=='LETTER' else A4
-        pw, ph = pagesize
-        RENDER_DPI = 300
-
-        # Standard card dims
-        cw_in, ch_in = (2.5,3.5)
-        cw_pt, ch_pt = cw_in*inch, ch_in*inch
-
-        # Determine grid layout
-        if use_card and cards_per_page in (8,9):
-            if cards_per_page==9:
-                cols, rows = 3,3; rotate_card=False
-                cell_w_pt, cell_h_pt = cw_pt, ch_pt
-            else:  # 8-up
-                cols, rows = 2,5; rotate_card=True
-                cell_w_pt, cell_h_pt = ch_pt, cw_pt
-            grid_w_pt, grid_h_pt = cols*cell_w_pt, rows*cell_h_pt
-            grid_w_px = int(round(grid_w_pt*RENDER_DPI/72)); grid_h_px = int(round(grid_h_pt*RENDER_DPI/72))
-            print(f"Grid {cols}x{rows}, px {grid_w_px}x{grid_h_px}")
-            # Prepare PDF
-            pdf = pdf_canvas.Canvas(export_path, pagesize=pagesize)
-            records = (self.csv_data_df.to_dict('records') if getattr(self,'csv_data_df',None) is not None else [{}]) or [{}]
-            mb = self.model.get_model_bounds()
-            # Render in batches of cards_per_page
-            for start in range(0, len(records), cards_per_page):
-                recs = records[start:start+cards_per_page]
-                grid_img = PILImage.new('RGBA', (grid_w_px,grid_h_px), (255,255,255,0))
-                cell_w_px = int(round(cell_w_pt*RENDER_DPI/72)); cell_h_px = int(round(cell_h_pt*RENDER_DPI/72))
-                for i,row in enumerate(recs):
-                    cimg = self.view.render_merged_card(row, self.model, mb, (cell_w_pt,cell_h_pt))
-                    if rotate_card:
-                        cimg = rotate_image_90_clockwise(cimg)
-                    if cimg.mode!='RGBA': cimg=cimg.convert('RGBA')
-                    # ensure size
-                    if cimg.size!=(cell_w_px,cell_h_px):
-                        cimg=cimg.resize((cell_w_px,cell_h_px), PILImage.Resampling.LANCZOS)
-                    x = (i%cols)*cell_w_px; y = (i//cols)*cell_h_px
-                    grid_img.paste(cimg, (x,y), cimg)
-                # embed grid_img
-                buf = io.BytesIO(); grid_img.save(buf,'PNG'); buf.seek(0)
-                # center
-                ex = (pw-grid_w_pt)/2; ey = (ph-grid_h_pt)/2
-                pdf.drawInlineImage(PILImage.open(buf), ex, ey, width=grid_w_pt, height=grid_h_pt, preserveAspectRatio=False)
-                pdf.showPage()
-            pdf.save()
-            print("PDF export complete.")
+        model_snapshot = ModelSnapshot.of(self.model)
+        rows = self._records_snapshot()
+        progress = ExportProgress()
+        self._export_progress = progress
+        dialog = ExportProgressDialog(self.root, progress, os.path.basename(export_path))
+        outcome: Dict[str, Any] = {}
+
+        def run():
+            try:
+                # Counting pass for the ETA: rows are cheap to read compared to rendering them
+                progress.total_cards = sum(quantity_of(row) for row in rows())
+                self.export_to_pdf(export_path, model=model_snapshot, records=rows(), progress=progress, **export_args)
+                outcome['status'] = 'done'
+            except ExportCancelled:
+                outcome['status'] = 'cancelled'
+            except Exception as e:
+                traceback.print_exc()
+                outcome['status'] = 'failed'
+                outcome['error'] = e
+            finally:
+                progress.finish()
+
+        worker = threading.Thread(target=run, name='pdf-export', daemon=True)
+        worker.start()
+        self.root.after(EXPORT_POLL_MS, self._poll_background_export, worker, dialog, outcome, export_path)
+
+    def _poll_background_export(self, worker: threading.Thread, dialog: ExportProgressDialog,
+                                outcome: Dict[str, Any], export_path: str):
+        """Refreshes the progress dialog until the export thread ends, then reports how it went."""
+        if worker.is_alive():
+            dialog.refresh()
+            self.root.after(EXPORT_POLL_MS, self._poll_background_export, worker, dialog, outcome, export_path)
             return
-        # Fallback: custom or single layout
-        pdf = pdf_canvas.Canvas(export_path, pagesize=pagesize)
-        records = (self.csv_data_df.to_dict('records') if getattr(self,'csv_data_df',None) is not None else [{}]) or [{}]
-        mb = self.model.get_model_bounds()
-        # determine cell size
-        if use_card:
-            cw, ch = cw_pt, ch_pt
-        elif custom_size:
-            cw, ch = custom_size[0]*inch, custom_size[1]*inch
+        status_text = self._export_progress.status_text() if self._export_progress else ''
+        self._export_progress = None
+        dialog.destroy()
+        status = outcome.get('status')
+        if status == 'done':
+            print(f"Controller: Background export finished: {status_text}")
+            messagebox.showinfo("Export Complete", f"Exported {os.path.basename(export_path)}\n{status_text}")
+        elif status == 'cancelled':
+            print("Controller: Background export cancelled; no file was written.")
         else:
-            cw, ch = pw, ph
-        cols = max(int(pw//cw),1); rows = max(int(ph//ch),1)
-        per = cols*rows
-        cw = pw/cols; ch = ph/rows
-        for start in range(0,len(records),per):
-            recs = records[start:start+per]
-            for i,row in enumerate(recs):
-                x0 = (i%cols)*cw; y0 = ph - ((i//cols)+1)*ch
-                cimg = self.view.render_merged_card(row,self.model,mb,(cw,ch))
-                buf = io.BytesIO(); cimg.save(buf,'PNG'); buf.seek(0)
-                pdf.drawInlineImage(PILImage.open(buf), x0, y0, width=cw, height=ch, preserveAspectRatio=False)
-            pdf.showPage()
-        pdf.save()
-        print("PDF export complete.")
+            print(f"Controller: Background export failed: {outcome.get('error')}")
+            messagebox.showerror("Export Error", f"An error occurred during PDF export:\n{outcome.get('error')}\nCheck console for details.")
+
+    def export_to_pdf(self, export_path: str, model: Optional[Any] = None,
+                      records: Optional[Iterable[dict]] = None, **export_args):
+        """
+        Exports the drawing to a PDF through PdfExporter (see exporter.py for the layouts and
+        options in export_args). model (default self.model) and records (default
+        _export_records()) let a background export work from a ModelSnapshot and a copy of the
+        rows while the editor keeps changing.
+        """
+        exporter = PdfExporter(model or self.model, self.font_manager)
+        records = self._export_records() if records is None else records
+        return exporter.export_to_pdf(export_path, records=records, **export_args)
+
+    def _export_records(self) -> Iterator[dict]:
+        """
+        The merge rows for an export, one dict at a time. A CSV imported with stream_rows is
+        read from disk in chunks; otherwise the loaded DataFrame is converted chunk by chunk.
+        Yields a single empty row when there is no data, so the template still exports once.
+        """
+        if self.csv_stream_rows and self.csv_file_path:
+            return iter_records(csv_path=self.csv_file_path)
+        return iter_records(df=getattr(self, 'csv_data_df', None))
+
+    def _records_snapshot(self) -> Callable[[], Iterator[dict]]:
+        """
+        Like _export_records(), but frozen now: returns a function that gives a fresh iterator
+        over today's rows each time it is called, unaffected by later imports. Loaded rows are
+        copied; a streamed CSV is re-read from the path it was imported from.
+        """
+        if self.csv_stream_rows and self.csv_file_path:
+            csv_path = self.csv_file_path
+            return lambda: iter_records(csv_path=csv_path)
+        df = getattr(self, 'csv_data_df', None)
+        df = df.copy() if df is not None else None
+        return lambda: iter_records(df=df)
 
     def _raise_window(self):
             self.root.deiconify() # Ensure window is not minimized
@@ -0,0 +1,803 @@
+# exporter.py
+
+import json
+import os
+import shutil
+import tempfile
+from collections import deque
+from itertools import islice
+from concurrent.futures import ProcessPoolExecutor, Future
+from typing import List, Dict, Optional, Any, Tuple, Iterable, Iterator, Sequence
+
+from model import ModelSnapshot
+from utils.card_renderer import CardRenderer, ImageCache, rotate_image_90_clockwise, output_size_for, bound_columns_for, row_fingerprint
+from utils.parallel_render import render_cards_parallel
+from utils.pdf_export import VectorCardWriter, TemplateFormWriter, ImageRegistry, card_transform, model_size_for, pdf_stream_encoding, atomic_output
+from utils.pdf_merge import merge_pdfs
+from utils.deck_sheets import DeckSheetWriter, TTS_COLUMNS, TTS_ROWS, TTS_MAX_SHEET_PX
+from utils.image_export import CardImageWriter
+from utils.card_sinks import CardSink, fan_out
+from utils.svg_export import SvgCardWriter
+from utils.imposition import ImpositionPlan, Slot, plan_imposition, fit_to_area
+from utils.tiling import plan_tiles, draw_tile_marks, TILE_MARGIN_IN
+from utils.export_progress import ExportProgress
+from utils.export_options import PageLayout, RenderOptions, CacheOptions, RunOptions
+from utils.record_source import iter_records, peek_columns, batched, skip_zero_quantity, expand_quantities, shard_records, quantity_of
+from utils.export_pipeline import ExportPipeline, export_pipeline
+from utils.export_profiles import ExportProfile, get_export_profile
+from utils.card_cache import CardCache, RecentCards, template_fingerprint, default_cache_dir, render_cached
+
+# Render DPI when a helper is called without one (the default profile's)
+DEFAULT_RENDER_DPI = get_export_profile().render_dpi
+
+# Each shard worker process rebuilds the template once (see _init_shard_worker)
+_shard_exporter: Optional['PdfExporter'] = None
+
+
+def load_template(path: Optional[str], font_manager) -> ModelSnapshot:
+    """
+    Reads a saved drawing (.json) into a ModelSnapshot, without the editor or Tk.
+    With no path the template is a single empty layer, like a new drawing.
+    """
+    data = {'layers': [{'name': 'Background', 'shapes': {}}]}
+    if path:
+        with open(path, 'r') as f:
+            data = json.load(f)
+    return ModelSnapshot(data, font_manager)
+
+
+class PdfExporter:
+    """
+    The PDF export engine: lays merged cards out on pages and writes the PDF.
+
+    It only needs the template's layers (a DrawingModel or a ModelSnapshot) and a FontManager,
+    and never touches Tk, so the GUI (DrawingApp.export_to_pdf, on a background thread) and
+    headless command-line exports share it.
+    image_cache lets several exporters (batch_export.py) share decoded pictures; with
+    trim_card_cache=False the on-disk card cache is not trimmed after each export.
+    """
+
+    def __init__(self, model, font_manager, image_cache: Optional[ImageCache] = None,
+                 trim_card_cache: bool = True):
+        self.model = model
+        self.font_manager = font_manager
+        self.image_cache = image_cache if image_cache is not None else ImageCache()
+        self.trim_card_cache = trim_card_cache
+
+    def export_to_pdf(self,
+                      export_path: str,
+                      layout: Optional[PageLayout] = None,
+                      render: Optional[RenderOptions] = None,
+                      cache: Optional[CacheOptions] = None,
+                      run: Optional[RunOptions] = None,
+                      records: Optional[Iterable[dict]] = None,
+                      copies: Optional[Sequence[int]] = None,
+                      progress: Optional[ExportProgress] = None,
+                      sinks: Optional[List[CardSink]] = None):
+        """
+        Exports the drawing to a PDF, supporting 8-up/9-up card layouts or custom sizes.
+        layout, render, cache and run are the option objects of utils/export_options.py; records are
+        the merge rows (None exports the template once), copies overrides each row's quantity, and
+        sinks are fed every card raster from the same render pass.
+        """
+        from reportlab.pdfgen import canvas as pdf_canvas
+        from reportlab.lib.pagesizes import LETTER, A4
+        from PIL import Image as PILImage
+
+        layout = layout or PageLayout()
+        render = render or RenderOptions()
+        cache = cache or CacheOptions()
+        run = run or RunOptions()
+        export_profile = render.export_profile()
+        RENDER_DPI = export_profile.render_dpi
+        records = iter_records() if records is None else records
+        if sinks:
+            conflict = self._fan_out_mode_conflict(layout, render, run)
+            if conflict:
+                raise ValueError(f"Cannot feed other outputs from this PDF export: {conflict}.")
+
+        if layout.tile: # Tiled exports are written in one process, a tile at a time, without pipeline stages
+            return self._export_tiled(export_path, records, layout, export_profile, progress)
+        if run.shard_workers > 1:
+            return self._export_sharded(export_path, records, progress, layout, render, cache, run)
+
+        # Binary (not ASCII85) streams unless the profile asks for them; restored when the export ends
+        with atomic_output(export_path) as part_path, \
+                pdf_stream_encoding(export_profile.ascii85), export_pipeline(run.queue_depth) as pipeline:
+            print(f"\nExporting PDF to {export_path}, {layout}, {export_profile}")
+            vector_writer = self._vector_writer(export_profile)
+            image_registry = ImageRegistry(export_profile.image_codec, export_profile.jpeg_quality)
+            pagesize = LETTER if layout.page == 'LETTER' else A4
+
+            # Where each component goes on the page, worked out once for the whole export
+            plan = self._imposition_plan(layout)
+            print(f"PdfExporter.export_to_pdf: Imposition {plan.describe()}.")
+            if layout.use_card and layout.cards_per_page and plan.per_page < layout.cards_per_page:
+                print(f"PdfExporter.export_to_pdf: Only {plan.per_page} of {layout.cards_per_page} cards fit a page with these margins and gutters.")
+            # Cards are rendered upright at their final size; turned slots then only transpose them
+            card_size_pt = plan.component_size
+            # Card layouts go on the page as one raster per page, other components as an image each.
+            # The 'auto' codec picks JPEG or Flate per raster, so there every card is its own image:
+            # one photo card must not turn the line art of the rest of its sheet into JPEG
+            page_raster = layout.use_card and export_profile.image_codec != 'auto'
+            if page_raster:
+                (grid_w_px, grid_h_px), cell_boxes = plan.raster_layout(RENDER_DPI)
+                grid_x, grid_y, grid_w_pt, grid_h_pt = plan.bounds()
+                print(f"Grid px {grid_w_px}x{grid_h_px}")
+            pdf = pdf_canvas.Canvas(part_path, pagesize=pagesize, pageCompression=export_profile.page_compression)
+            cards, form_writer, card_cache = self._pdf_card_stream(pdf, records, card_size_pt, export_profile, image_registry,
+                                                                   cache, run, pipeline, progress, sinks=sinks, copies=copies)
+            # Fill the plan's slots in order, a page of cards at a time
+            for page_cards in batched(cards, plan.per_page):
+                placed = list(zip(plan.slots, page_cards))
+                if page_raster and not form_writer:
+                    # RGB on white: pasting the RGBA cards onto it gives the same pixels ReportLab would
+                    # get from flattening an RGBA sheet, without the extra alpha channel to split off
+                    grid_img = PILImage.new('RGB', (grid_w_px, grid_h_px), (255, 255, 255))
+                    for (slot, (row, cimg)), (x, y, w, h) in zip(placed, cell_boxes):
+                        if slot.rotated:
+                            cimg = rotate_image_90_clockwise(cimg)
+                        if cimg.mode != 'RGBA': cimg = cimg.convert('RGBA')
+                        # ensure size
+                        if cimg.size != (w, h):
+                            cimg = cimg.resize((w, h), PILImage.Resampling.LANCZOS)
+                        grid_img.paste(cimg, (x, y), cimg)
+                    # embed grid_img (handed to ReportLab as-is, no PNG encode/decode in between) over the slots
+                    image_registry.draw_image(pdf, grid_img, grid_x, grid_y, grid_w_pt, grid_h_pt)
+                else:
+                    self._draw_slots(pdf, placed, image_registry, form_writer)
+                if vector_writer:
+                    self._draw_vector_parts(pdf, placed, vector_writer)
+                pdf.showPage()
+                if progress:
+                    progress.page_done()
+            pdf.save()
+            print(image_registry.summary())
+            self._finish_card_cache(card_cache)
+            print("PDF export complete.")
+
+    def fan_out_conflict(self, layout: Optional[PageLayout] = None, render: Optional[RenderOptions] = None,
+                         run: Optional[RunOptions] = None,
+                         sink_size: Optional[Tuple[float, float]] = None) -> Optional[str]:
+        """
+        Why a PDF export with these settings cannot feed CardSinks from its render pass (None when it
+        can). Besides the modes _fan_out_mode_conflict rules out, the PDF's cards must come out at
+        the pixel size export_to_sinks would render for the sinks (the template's size, or sink_size
+        in inches), so sharing the pass never changes the cards' size or proportions in the other
+        outputs (deck sheets then scale the print raster down to their slots instead of rendering small).
+        """
+        layout = layout or PageLayout()
+        render = render or RenderOptions()
+        conflict = self._fan_out_mode_conflict(layout, render, run or RunOptions())
+        if conflict:
+            return conflict
+        from reportlab.lib.units import inch
+
+        render_dpi = render.export_profile().render_dpi
+        pdf_size = output_size_for(self._imposition_plan(layout).component_size, render_dpi)
+        wanted = (sink_size[0] * inch, sink_size[1] * inch) if sink_size else model_size_for(self.model.layers)
+        if pdf_size != output_size_for(wanted, render_dpi):
+            return (f"the PDF's cards are {pdf_size[0]}x{pdf_size[1]} px, the other outputs' "
+                    f"{output_size_for(wanted, render_dpi)[0]}x{output_size_for(wanted, render_dpi)[1]} px")
+        return None
+
+    @staticmethod
+    def _fan_out_mode_conflict(layout: PageLayout, render: RenderOptions, run: RunOptions) -> Optional[str]:
+        """Settings under which export_to_pdf does not render each whole card as one raster in this process."""
+        export_profile = render.export_profile()
+        if export_profile.text_mode == 'vector' or export_profile.outline_mode == 'vector':
+            return "vector text or outlines leave them out of the card rasters"
+        if export_profile.template_form:
+            return "the template form renders only each card's dynamic parts"
+        if layout.tile:
+            return "tiled components are rendered a tile at a time"
+        if run.shard_workers > 1:
+            return "sharded exports render in other processes"
+        return None
+
+    def export_to_sinks(self,
+                        sinks: List[CardSink],
+                        custom_size: Optional[Tuple[float, float]] = None,
+                        profile: Optional[str] = None,
+                        cache: Optional[CacheOptions] = None,
+                        run: Optional[RunOptions] = None,
+                        records: Optional[Iterable[dict]] = None,
+                        progress: Optional[ExportProgress] = None):
+        """
+        Renders every row once and hands the card to each of sinks (deck sheets, card images, ...)
+        without writing a PDF; the caller opens and closes the sinks. Cards keep the template's
+        proportions (or custom_size in inches) at the profile's DPI, except that when no sink needs
+        that much (CardSink.card_pixels, e.g. deck sheets only) they are rasterized straight at the
+        largest size one does. Rendering goes through the same pipeline, worker processes, card
+        cache and duplicate-row reuse as export_to_pdf (cache and run as there); rows with quantity 0
+        are left out. When no sink needs rasters (CardSink.needs_raster, e.g. SVG only), the rows go
+        straight to the sinks.
+        """
+        from reportlab.lib.units import inch
+
+        export_profile = get_export_profile(profile)
+        cache = cache or CacheOptions()
+        run = run or RunOptions()
+        records = iter_records() if records is None else records
+        if not any(sink.needs_raster for sink in sinks):
+            # Vector-only outputs (SVG) draw from the rows themselves: nothing to render
+            print(f"\nExporting cards to {len(sinks)} outputs without rendering")
+            cards = fan_out(((row, None) for row in skip_zero_quantity(records)), sinks)
+            for _ in (progress.track(cards) if progress else cards):
+                pass
+            return
+        target_size_pt = (custom_size[0] * inch, custom_size[1] * inch) if custom_size else model_size_for(self.model.layers)
+        render_dpi = export_profile.render_dpi
+        full_size = output_size_for(target_size_pt, render_dpi)
+        needed = [sink.card_pixels(full_size) for sink in sinks if sink.needs_raster]
+        needed_size = (max(w for w, _ in needed), max(h for _, h in needed)) if needed else full_size
+        if needed_size[0] < full_size[0] and needed_size[1] < full_size[1]:
+            # At 72 "dpi" the target size in points is the size in pixels
+            target_size_pt, render_dpi = needed_size, 72
+        print(f"\nExporting cards to {len(sinks)} outputs at {needed_size[0]}x{needed_size[1]} px, "
+              f"profile={export_profile.name}, {cache}, {run}")
+
+        with export_pipeline(run.queue_depth) as pipeline:
+            columns_in_data, records = peek_columns(records)
+            card_cache = self._card_cache(columns_in_data, target_size_pt, False, False, False,
+                                          cache, render_dpi) if cache.use_cache else None
+            cards = self._card_stream(records, columns_in_data, target_size_pt, run.workers, False, False, False,
+                                      card_cache, render_dpi, pipeline, progress, expand_copies=False, sinks=sinks)
+            for _ in cards: # The sinks take every card on the way through
+                pass
+        self._finish_card_cache(card_cache)
+
+    def export_tts_sheets(self,
+                          export_path: str,
+                          custom_size: Optional[Tuple[float, float]] = None,
+                          hidden_image: Optional[str] = None,
+                          columns: int = TTS_COLUMNS,
+                          rows: int = TTS_ROWS,
+                          max_sheet_px: int = TTS_MAX_SHEET_PX,
+                          profile: Optional[str] = None,
+                          jpeg_quality: Optional[int] = None,
+                          cache: Optional[CacheOptions] = None,
+                          run: Optional[RunOptions] = None,
+                          records: Optional[Iterable[dict]] = None,
+                          progress: Optional[ExportProgress] = None) -> List[Dict[str, Any]]:
+        """
+        Exports the deck as Tabletop Simulator deck sheets instead of a PDF: export_path 'deck.png'
+        (or .jpg) writes deck_01.png, deck_02.png, ... with columns x rows cards each, the last slot
+        holding the hidden-card face (hidden_image, or a plain dark card), plus deck.json listing
+        the sheets. Cards keep the template's proportions (or custom_size in inches) and are
+        rendered at the profile's DPI, or smaller when needed to keep sheets within max_sheet_px:
+        export_to_sinks rasterizes them straight at their sheet size for the DeckSheetWriter
+        (utils/deck_sheets.py) that assembles and writes the sheets.
+        Returns the sheet descriptions.
+        """
+        export_profile = get_export_profile(profile)
+        print(f"\nExporting TTS deck sheets to {export_path}")
+        with DeckSheetWriter(export_path, None, columns, rows, hidden_image, jpeg_quality or export_profile.jpeg_quality,
+                             writers=min(2, os.cpu_count() or 1), max_sheet_px=max_sheet_px) as writer:
+            self.export_to_sinks([writer], custom_size, profile, cache, run, records, progress)
+        print("TTS deck export complete.")
+        return writer.sheets
+
+    def export_card_images(self,
+                           directory: str,
+                           image_format: str = 'png',
+                           name_column: Optional[str] = None,
+                           custom_size: Optional[Tuple[float, float]] = None,
+                           writers: int = 2,
+                           profile: Optional[str] = None,
+                           jpeg_quality: Optional[int] = None,
+                           cache: Optional[CacheOptions] = None,
+                           run: Optional[RunOptions] = None,
+                           records: Optional[Iterable[dict]] = None,
+                           progress: Optional[ExportProgress] = None) -> Dict[str, Dict[str, Any]]:
+        """
+        Exports one image file per row into directory instead of a PDF (for card databases and
+        print vendor uploads): image_format 'png', 'webp' or 'jpeg', named after the row's
+        name_column value (or card_0001... by row). Each card is the same raster export_to_pdf
+        places (render_merged_card at the profile's DPI, the template's size or custom_size in
+        inches), rendered through export_to_sinks; rows with a quantity are written once, rows
+        with quantity 0 not at all. A CardImageWriter (utils/image_export.py) encodes and writes
+        on writer threads and skips files whose content hash is unchanged since the last export
+        to directory.
+        Returns the manifest entries of the files of this export.
+        """
+        export_profile = get_export_profile(profile)
+        print(f"\nExporting card images to {directory}, format={image_format}")
+        with CardImageWriter(directory, image_format, name_column, jpeg_quality or export_profile.jpeg_quality,
+                             writers) as writer:
+            self.export_to_sinks([writer], custom_size, profile, cache, run, records, progress)
+        print("Card image export complete.")
+        return writer.files
+
+    def export_svg(self,
+                   directory: str,
+                   name_column: Optional[str] = None,
+                   images: str = 'link',
+                   profile: Optional[str] = None,
+                   records: Optional[Iterable[dict]] = None,
+                   progress: Optional[ExportProgress] = None) -> List[str]:
+        """
+        Exports one SVG per row into directory (for the web card viewer): shapes, borders and text
+        as vector elements, pictures linked (images='link', relative to directory) or embedded
+        ('embed'), named like export_card_images. Text is laid out at the profile's DPI so it wraps
+        exactly as on the raster cards. Nothing is rasterized (see utils/svg_export.SvgCardWriter).
+        Returns the file names written.
+        """
+        export_profile = get_export_profile(profile)
+        print(f"\nExporting SVG cards to {directory}, images={images}")
+        with SvgCardWriter(directory, self.model.layers, self.font_manager, name_column, images,
+                           export_profile.render_dpi) as writer:
+            self.export_to_sinks([writer], profile=profile, records=records, progress=progress)
+        print("SVG export complete.")
+        return writer.files
+
+    def _export_tiled(self, export_path: str, records: Iterable[dict], layout: PageLayout,
+                      export_profile: ExportProfile, progress: Optional[ExportProgress] = None):
+        """Writes a tiled export (see _write_tiles) to export_path, all of it on the calling thread."""
+        from reportlab.pdfgen import canvas as pdf_canvas
+        from reportlab.lib.pagesizes import LETTER, A4
+
+        with atomic_output(export_path) as part_path, pdf_stream_encoding(export_profile.ascii85):
+            print(f"\nExporting PDF to {export_path}, {layout}, {export_profile}")
+            image_registry = ImageRegistry(export_profile.image_codec, export_profile.jpeg_quality)
+            pagesize = LETTER if layout.page == 'LETTER' else A4
+            pdf = pdf_canvas.Canvas(part_path, pagesize=pagesize, pageCompression=export_profile.page_compression)
+            self._write_tiles(pdf, records, pagesize, layout, image_registry, self._vector_writer(export_profile),
+                              export_profile.text_mode == 'vector', export_profile.outline_mode == 'vector',
+                              export_profile.render_dpi, progress)
+            pdf.save()
+            print(image_registry.summary())
+            print("PDF export complete.")
+
+    def _write_tiles(self, pdf, records: Iterable[dict], pagesize: Tuple[float, float], layout: PageLayout,
+                     image_registry: ImageRegistry, vector_writer: Optional[VectorCardWriter],
+                     vector_text: bool, vector_outlines: bool, render_dpi: int,
+                     progress: Optional[ExportProgress] = None):
+        """
+        Tiled layout for components larger than a page (game boards, maps): every component is split
+        into page tiles (utils/tiling.plan_tiles) inside a TILE_MARGIN_IN margin, and each tile is
+        rendered by CardRenderer.render_tile, drawn, marked for assembly and released before the
+        next, so peak memory is one tile rather than the whole component at render DPI. A row's
+        further copies reuse the tiles its first copy embedded.
+        Vector text and outlines are drawn for the whole component, clipped to the tile.
+        """
+        from reportlab.lib.units import inch
+
+        pw, ph = pagesize
+        custom_size = layout.custom_size
+        component = (custom_size[0] * inch, custom_size[1] * inch) if custom_size else model_size_for(self.model.layers)
+        margin = TILE_MARGIN_IN * inch
+        tiles = plan_tiles(component, (pw - 2 * margin, ph - 2 * margin), layout.tile_overlap * inch)
+        print(f"PdfExporter._write_tiles: {component[0] / inch:.2f}x{component[1] / inch:.2f} in component "
+              f"on {len(tiles)} pages ({tiles[0].rows} rows x {tiles[0].cols} columns).")
+
+        columns, records = peek_columns(skip_zero_quantity(records))
+        # No prepare_template(): its cached background would be a full-size raster
+        renderer = CardRenderer(self.model.layers, render_dpi, self.model.get_model_bounds(),
+                                vector_text=vector_text, vector_outlines=vector_outlines,
+                                output_size=output_size_for(component, render_dpi), image_cache=self.image_cache)
+        renderer.prepare_tiles()
+        origin = (margin, ph - margin)
+        for index, row in enumerate(records):
+            renderer.merge_row(row) # Once per row: text is laid out here, and drawn a tile at a time
+            tile_forms: List[str] = []
+            for copy in range(quantity_of(row)):
+                for tile_index, tile in enumerate(tiles):
+                    x, y = origin[0], origin[1] - tile.height
+                    if copy == 0:
+                        tile_img = renderer.render_tile(tile.pixel_box(component, renderer.canvas_size))
+                        tile_forms.append(image_registry.draw_image(pdf, tile_img.convert('RGB'), x, y,
+                                                                    tile.width, tile.height))
+                        del tile_img
+                    else:
+                        # Further copies place the first copy's embedded tiles instead of rendering them again
+                        image_registry.draw_form(pdf, tile_forms[tile_index], x, y, tile.width, tile.height)
+                    if vector_writer:
+                        pdf.saveState()
+                        clip = pdf.beginPath()
+                        clip.rect(x, y, tile.width, tile.height)
+                        pdf.clipPath(clip, stroke=0, fill=0)
+                        # The whole component, placed so that this tile's part lands in the tile's rectangle
+                        vector_writer.draw_card(pdf, row, card_transform(x - tile.x0, origin[1] + tile.y0 - component[1],
+                                                                         component[0], component[1], vector_writer.model_size))
+                        pdf.restoreState()
+                    draw_tile_marks(pdf, tile, tiles, origin, label=f"Component {index + 1}")
+                    pdf.showPage()
+                    if progress:
+                        progress.page_done()
+                if progress:
+                    progress.card_done()
+
+    def _imposition_plan(self, layout: PageLayout) -> ImpositionPlan:
+        """
+        The page layout export_to_pdf fills for these settings: 2.5x3.5" cards with use_card (as many
+        as fit, up to cards_per_page; 9-up keeps them upright and 8-up turns them unless rotation says
+        otherwise), components of custom_size inches, or else the template enlarged or shrunk to one
+        per page without distorting it. margin and gutter are in inches.
+        """
+        from reportlab.lib.pagesizes import LETTER, A4
+        from reportlab.lib.units import inch
+
+        use_card, cards_per_page, custom_size = layout.use_card, layout.cards_per_page, layout.custom_size
+        margin, gutter, rotation = layout.margin, layout.gutter, layout.rotation
+        pagesize = LETTER if layout.page == 'LETTER' else A4
+        if rotation is None:
+            rotation = {9: 'never', 8: 'always'}.get(cards_per_page, 'auto') if use_card else 'auto'
+        if use_card:
+            size = (2.5 * inch, 3.5 * inch)
+        elif custom_size:
+            size = (custom_size[0] * inch, custom_size[1] * inch)
+        else:
+            size = fit_to_area(model_size_for(self.model.layers),
+                               (pagesize[0] - 2 * margin * inch, pagesize[1] - 2 * margin * inch), rotation)
+        return plan_imposition(pagesize, [size], margin * inch, gutter * inch, rotation,
+                               max_per_page=cards_per_page if use_card else None)
+
+    def _export_sharded(self, export_path: str, records: Iterable[dict], progress: Optional[ExportProgress],
+                        layout: PageLayout, render: RenderOptions, cache: CacheOptions, run: RunOptions):
+        """
+        Splits the records into page-aligned shards of shard_pages pages, has a process pool write each
+        shard as its own PDF (a full single-process export, rendering included) and merges the parts
+        in order with utils/pdf_merge.py, which writes resources shared between shards once.
+        Since every shard but the last fills whole pages, the merged pages are the same as a
+        single-canvas export's. Progress is counted a shard at a time; cancelling stops the
+        export once the shards being written finish, discarding them.
+        """
+        cards_per_page = self._imposition_plan(layout).per_page
+        # Each shard is a plain single-process export with the same layout, rendering and cache
+        shard_options = dict(layout=layout, render=render, cache=cache, run=RunOptions(queue_depth=run.queue_depth))
+        shard_workers = run.shard_workers
+        directory = os.path.dirname(os.path.abspath(export_path))
+        shard_dir = tempfile.mkdtemp(dir=directory, prefix='.' + os.path.basename(export_path) + '.shards.')
+        cards_per_shard = run.shard_pages * cards_per_page
+        print(f"\nPdfExporter._export_sharded: Writing {export_path} in shards of {run.shard_pages} pages "
+              f"({cards_per_shard} cards) on {shard_workers} processes.")
+        try:
+            with atomic_output(export_path) as part_path:
+                shard_paths: List[str] = []
+                pending: deque = deque()
+                with ProcessPoolExecutor(max_workers=shard_workers, initializer=_init_shard_worker,
+                                         initargs=(self.model.to_dict(), self.font_manager)) as pool:
+                    try:
+                        for index, shard in enumerate(shard_records(records, cards_per_shard)):
+                            if progress:
+                                progress.check()
+                            shard_path = os.path.join(shard_dir, f"shard-{index:05d}.pdf")
+                            shard_paths.append(shard_path)
+                            pending.append(pool.submit(_write_shard, shard_path, shard, shard_options))
+                            # Only a couple of shards per process are queued, so records are read as shards finish
+                            while len(pending) >= shard_workers * 2:
+                                self._shard_finished(pending.popleft(), cards_per_page, progress)
+                        while pending:
+                            self._shard_finished(pending.popleft(), cards_per_page, progress)
+                    except BaseException:
+                        for future in pending:
+                            future.cancel()
+                        raise
+                merge_pdfs(shard_paths, part_path)
+            if cache.use_cache and self.trim_card_cache: # Shards leave trimming to the parent
+                removed = CardCache(cache.cache_dir or default_cache_dir(), '',
+                                    max_bytes=int(cache.cache_max_mb * 1024 * 1024)).trim()
+                if removed:
+                    print(f"CardCache: Evicted {removed / (1024 * 1024):.1f} MB of least recently used cards.")
+            print("PDF export complete.")
+        finally:
+            shutil.rmtree(shard_dir, ignore_errors=True)
+
+    @staticmethod
+    def _shard_finished(future: Future, cards_per_page: int, progress: Optional[ExportProgress]):
+        """Waits for one shard (re-raising its error) and counts its cards and pages."""
+        cards = future.result()
+        if progress:
+            progress.card_done(cards)
+            for _ in range(-(-cards // cards_per_page)):
+                progress.page_done()
+
+    def _vector_writer(self, export_profile: ExportProfile) -> Optional[VectorCardWriter]:
+        """The writer for the text and borders the profile draws as PDF text and paths, or None when it draws neither."""
+        vector_text = export_profile.text_mode == 'vector'
+        vector_outlines = export_profile.outline_mode == 'vector'
+        if not (vector_text or vector_outlines):
+            return None
+        return VectorCardWriter(self.model.layers, export_profile.render_dpi, text=vector_text, outlines=vector_outlines)
+
+    def _pdf_card_stream(self, pdf, records: Iterable[dict], card_size_pt: Tuple[float, float],
+                         export_profile: ExportProfile, image_registry: ImageRegistry, cache: CacheOptions,
+                         run: RunOptions, pipeline: Optional[ExportPipeline] = None,
+                         progress: Optional[ExportProgress] = None, sinks: Optional[List[CardSink]] = None,
+                         copies: Optional[Sequence[int]] = None, form_name: str = 'CardTemplate'
+                         ) -> Tuple[Iterator[Tuple[dict, Any]], Optional[TemplateFormWriter], Optional[CardCache]]:
+        """
+        Sets this template up for a PDF being written: defines the template form (named form_name)
+        when the profile asks for one and opens the card cache. Returns the (record, card) stream
+        of _card_stream, the form writer (None without the form; the cards are then whole rasters,
+        otherwise their dynamic parts) and the card cache to finish when the PDF is done.
+        """
+        vector_text = export_profile.text_mode == 'vector'
+        vector_outlines = export_profile.outline_mode == 'vector'
+        render_dpi = export_profile.render_dpi
+        columns, records = peek_columns(records)
+        form_writer = self._define_template_form(pdf, columns, card_size_pt, image_registry, vector_text, vector_outlines,
+                                                 render_dpi, form_name) if export_profile.template_form else None
+        card_cache = self._card_cache(columns, card_size_pt, vector_text, vector_outlines, form_writer is not None,
+                                      cache, render_dpi) if cache.use_cache else None
+        cards = self._card_stream(records, columns, card_size_pt, run.workers, vector_text, vector_outlines,
+                                  form_writer is not None, card_cache, render_dpi, pipeline, progress,
+                                  sinks=sinks, copies=copies)
+        return cards, form_writer, card_cache
+
+    @staticmethod
+    def _draw_slots(pdf, placed: List[Tuple[Slot, Tuple[dict, Any]]], image_registry: ImageRegistry,
+                    form_writer: Optional[TemplateFormWriter] = None):
+        """
+        Draws each (slot, (record, card)) pair as an image of its own, or with a form writer as one
+        reference to the template form plus the card's own content instead of a full raster.
+        """
+        for slot, (row, card) in placed:
+            if form_writer:
+                form_writer.draw_card(pdf, card_transform(slot.x, slot.y, slot.width, slot.height,
+                                                          form_writer.model_size, slot.rotated), card)
+                continue
+            if slot.rotated:
+                card = rotate_image_90_clockwise(card)
+            image_registry.draw_image(pdf, card.convert('RGB'), slot.x, slot.y, slot.width, slot.height)
+
+    @staticmethod
+    def _draw_vector_parts(pdf, placed: List[Tuple[Slot, Tuple[dict, Any]]], vector_writer: VectorCardWriter):
+        """Draws the vector text and borders of the placed cards over their rasters."""
+        for slot, (row, _) in placed:
+            vector_writer.draw_card(pdf, row, card_transform(slot.x, slot.y, slot.width, slot.height,
+                                                             vector_writer.model_size, slot.rotated))
+
+    def _card_renderer(self, columns: List[str], target_size_points: Optional[Tuple[float, float]] = None,
+                       vector_text: bool = False, vector_outlines: bool = False,
+                       render_dpi: Optional[int] = None) -> CardRenderer:
+        """
+        An in-process CardRenderer with the static template prepared for the given merge columns,
+        rasterizing straight at target_size_points (at render_dpi, default RENDER_DPI) when given.
+        """
+        render_dpi = render_dpi or DEFAULT_RENDER_DPI
+        output_size = output_size_for(target_size_points, render_dpi) if target_size_points else None
+        renderer = CardRenderer(self.model.layers, render_dpi, self.model.get_model_bounds(),
+                                vector_text=vector_text, vector_outlines=vector_outlines,
+                                output_size=output_size, image_cache=self.image_cache)
+        renderer.prepare_template(columns)
+        return renderer
+
+    def _define_template_form(self, pdf, columns: List[str], target_size_points: Tuple[float, float],
+                              image_registry: Optional[ImageRegistry] = None,
+                              vector_text: bool = False, vector_outlines: bool = False,
+                              render_dpi: Optional[int] = None, form_name: str = 'CardTemplate') -> TemplateFormWriter:
+        """Rasterizes the static template once, at the cards' output size, and adds it to the PDF as a reusable form."""
+        renderer = self._card_renderer(columns, target_size_points, vector_text, vector_outlines, render_dpi)
+        form_writer = TemplateFormWriter(model_size_for(self.model.layers), image_registry, form_name)
+        form_writer.define(pdf, renderer.static_layer())
+        return form_writer
+
+    def _card_cache(self, columns: List[str], target_size_points: Tuple[float, float],
+                    vector_text: bool, vector_outlines: bool, dynamic_only: bool,
+                    cache: Optional[CacheOptions] = None, render_dpi: Optional[int] = None) -> Optional[CardCache]:
+        """The on-disk card cache for this template and these render settings, or None if it cannot be opened."""
+        render_dpi = render_dpi or DEFAULT_RENDER_DPI
+        cache = cache or CacheOptions()
+        cache_dir = cache.cache_dir
+        settings = {
+            'render_dpi': render_dpi,
+            'output_size': output_size_for(target_size_points, render_dpi),
+            'target_size_points': target_size_points,
+            'vector_text': vector_text,
+            'vector_outlines': vector_outlines,
+            'dynamic_only': dynamic_only,
+            'columns': sorted(str(c) for c in columns),
+        }
+        template_key = template_fingerprint(self.model.to_dict(), self.model.layers, self.font_manager, settings)
+        # Row values in these columns are image paths; their files are part of each card's key
+        image_columns = [shape.name for layer in self.model.layers for shape in layer.shapes.values()
+                         if shape.container_type == 'Image' and shape.name in columns]
+        try:
+            return CardCache(cache_dir or default_cache_dir(), template_key, image_columns,
+                             max_bytes=int(cache.cache_max_mb * 1024 * 1024))
+        except OSError as e:
+            print(f"PdfExporter._card_cache: Card cache disabled, cannot use {cache_dir or default_cache_dir()}: {e}")
+            return None
+
+    def _finish_card_cache(self, card_cache: Optional[CardCache]):
+        """Reports cache use (in-process lookups only) and evicts old entries past the size cap (if trim_card_cache)."""
+        if card_cache is None:
+            return
+        if card_cache.hits or card_cache.misses: # Worker processes keep their own counts
+            print(card_cache.summary())
+        if not self.trim_card_cache: # A batch export trims once after its last job
+            return
+        removed = card_cache.trim()
+        if removed:
+            print(f"CardCache: Evicted {removed / (1024 * 1024):.1f} MB of least recently used cards.")
+
+    def _card_stream(self, records: Iterable[dict], columns: List[str], target_size_points: Tuple[float, float],
+                     workers: int, vector_text: bool, vector_outlines: bool, dynamic_only: bool,
+                     card_cache: Optional[CardCache], render_dpi: int,
+                     pipeline: Optional[ExportPipeline] = None,
+                     progress: Optional[ExportProgress] = None,
+                     expand_copies: bool = True,
+                     sinks: Optional[List[CardSink]] = None,
+                     copies: Optional[Sequence[int]] = None) -> Iterator[Tuple[dict, Any]]:
+        """
+        The (record, card) pairs the page loop places, quantities expanded (unless expand_copies
+        is False: one pair per row, as for per-card image files). With a pipeline, reading
+        rows, decoding their images and rendering each run on their own stage thread ahead of the writer.
+        With progress, every card placed is counted there (and a cancelled export stops at the next one).
+        With sinks, every row's card is also handed to each sink (see utils/card_sinks.fan_out), on a
+        'fan-out' stage thread when there is a pipeline, before the quantities are expanded.
+        copies replaces the rows' quantity columns (one count per record, none of them 0).
+        """
+        if copies is None:
+            records = skip_zero_quantity(records)
+        if pipeline:
+            records = pipeline.source('read', records)
+        cards = self._render_cards(records, columns, target_size_points, workers, vector_text, vector_outlines,
+                                   dynamic_only=dynamic_only, card_cache=card_cache, render_dpi=render_dpi,
+                                   pipeline=pipeline)
+        if pipeline:
+            cards = pipeline.source('render', cards)
+            if sinks:
+                cards = pipeline.source('fan-out', fan_out(cards, sinks))
+            cards = pipeline.drain('write', cards)
+        elif sinks:
+            cards = fan_out(cards, sinks)
+        if expand_copies:
+            cards = expand_quantities(cards, copies)
+        return progress.track(cards) if progress else cards
+
+    def _render_cards(self, records: Iterable[dict], columns: List[str], target_size_points: Tuple[float, float],
+                      workers: int = 1, vector_text: bool = False, vector_outlines: bool = False,
+                      dynamic_only: bool = False, card_cache: Optional[CardCache] = None,
+                      render_dpi: Optional[int] = None,
+                      pipeline: Optional[ExportPipeline] = None) -> Iterator[Tuple[dict, Any]]:
+        """
+        Yields (record, rendered card) pairs, in record order, pulling records lazily.
+        Shapes not bound to any record column are rasterized once per export (see
+        CardRenderer.prepare_template). A single worker renders in-process, otherwise a
+        process pool works from a snapshot of the model.
+        With vector_text/vector_outlines the text or borders are left out of the rasters
+        (VectorCardWriter draws them). With dynamic_only each card is only its dynamic parts
+        at render DPI (CardRenderer.render_dynamic_parts), for use over the template form.
+        With card_cache, cards rendered by an earlier export are loaded from disk instead.
+        Rows whose bound values (the columns some shape is named after) match an earlier row
+        reuse that row's card, so render time scales with unique cards rather than total cards.
+        With a pipeline, in-process rendering gets a 'decode' stage that loads each row's pictures ahead.
+        """
+        render_dpi = render_dpi or DEFAULT_RENDER_DPI
+        bound_columns = bound_columns_for(self.model.layers, columns)
+        recent = RecentCards()
+        if workers <= 1:
+            renderer = self._card_renderer(columns, target_size_points, vector_text, vector_outlines, render_dpi)
+            if pipeline:
+                records = pipeline.stage('decode', renderer.prefetch_images, records)
+            for row in records:
+                fingerprint = row_fingerprint(row, bound_columns)
+                card = recent.get(fingerprint)
+                if card is None:
+                    card = render_cached(renderer, card_cache, row, target_size_points, dynamic_only)
+                    recent.put(fingerprint, card)
+                yield row, card
+            print(recent.summary())
+            return
+
+        yield from render_cards_parallel(
+            self.model.to_dict(), self.font_manager, records, target_size_points,
+            workers=workers, render_dpi=render_dpi, columns=columns,
+            output_size=output_size_for(target_size_points, render_dpi),
+            vector_text=vector_text, vector_outlines=vector_outlines, dynamic_only=dynamic_only,
+            card_cache=card_cache, bound_columns=bound_columns, recent=recent
+        )
+        print(recent.summary())
+
+
+class SheetComponent:
+    """
+    One kind of component in a mixed-size export (see export_mixed_pdf): the PdfExporter of its
+    template, its merge rows (None: the template once), its printed size (W, H) in inches (None: the
+    template's own size) and how many go on each page (per_page; None: as many as fit beside the
+    kinds placed before it).
+    """
+
+    def __init__(self, exporter: PdfExporter, records: Optional[Iterable[dict]] = None,
+                 size: Optional[Tuple[float, float]] = None, per_page: Optional[int] = None):
+        self.exporter = exporter
+        self.records = records
+        self.size = size
+        self.per_page = per_page
+
+    def size_points(self) -> Tuple[float, float]:
+        from reportlab.lib.units import inch
+
+        if self.size:
+            return self.size[0] * inch, self.size[1] * inch
+        return model_size_for(self.exporter.model.layers)
+
+
+def export_mixed_pdf(export_path: str,
+                     components: Sequence[SheetComponent],
+                     layout: Optional[PageLayout] = None,
+                     render: Optional[RenderOptions] = None,
+                     cache: Optional[CacheOptions] = None,
+                     run: Optional[RunOptions] = None,
+                     progress: Optional[ExportProgress] = None):
+    """
+    Exports several kinds of component (cards, tokens, tiles: each with its own template, rows and
+    size) onto shared pages. One ImpositionPlan lays out every kind once for the whole export, the
+    largest first and the smaller ones in the space left (see plan_imposition), and each page takes
+    the next cards of every kind for that kind's slots until all of them run out.
+    layout's page, margin, gutter and rotation apply (use_card, custom_size and tile do not), and
+    the PDF is written in this process. Raises ValueError when a kind gets no room on the page.
+    """
+    from reportlab.pdfgen import canvas as pdf_canvas
+    from reportlab.lib.pagesizes import LETTER, A4
+    from reportlab.lib.units import inch
+
+    layout = layout or PageLayout()
+    render = render or RenderOptions()
+    cache = cache or CacheOptions()
+    run = run or RunOptions()
+    if not components:
+        raise ValueError("export_mixed_pdf: no components to export.")
+    if layout.tile:
+        raise ValueError("Tiled components are printed a page each and cannot share pages with other kinds.")
+    export_profile = render.export_profile()
+    pagesize = LETTER if layout.page == 'LETTER' else A4
+    sizes = [component.size_points() for component in components]
+    plan = plan_imposition(pagesize, sizes, layout.margin * inch, layout.gutter * inch, layout.rotation or 'auto',
+                           counts=[component.per_page for component in components])
+    slots = [plan.slots_for(index) for index in range(len(components))]
+    for index, (width, height) in enumerate(sizes):
+        if not slots[index]:
+            raise ValueError(f"No room is left on the page for the {width / inch:.2f}x{height / inch:.2f} in "
+                             f"components (kind {index + 1}); give the larger kinds a per_page count.")
+    if run.shard_workers > 1:
+        print("export_mixed_pdf: Mixed-size exports are written in one process; ignoring shard_workers.")
+
+    with atomic_output(export_path) as part_path, \
+            pdf_stream_encoding(export_profile.ascii85), export_pipeline(run.queue_depth) as pipeline:
+        print(f"\nExporting mixed-size PDF to {export_path}, {layout}, {export_profile}")
+        print(f"export_mixed_pdf: Imposition {plan.describe()}.")
+        image_registry = ImageRegistry(export_profile.image_codec, export_profile.jpeg_quality)
+        pdf = pdf_canvas.Canvas(part_path, pagesize=pagesize, pageCompression=export_profile.page_compression)
+        kinds = []
+        for index, (component, size) in enumerate(zip(components, sizes)):
+            exporter = component.exporter
+            records = iter_records() if component.records is None else component.records
+            # Every kind renders at its own size, with its own template form, cache and vector parts
+            cards, form_writer, card_cache = exporter._pdf_card_stream(pdf, records, size, export_profile, image_registry,
+                                                                       cache, run, pipeline, progress,
+                                                                       form_name=f"CardTemplate{index}")
+            kinds.append((exporter, iter(cards), form_writer, card_cache, exporter._vector_writer(export_profile)))
+        while True:
+            page = [list(zip(kind_slots, islice(cards, len(kind_slots))))
+                    for kind_slots, (_, cards, _, _, _) in zip(slots, kinds)]
+            if not any(page):
+                break
+            for placed, (_, _, form_writer, _, vector_writer) in zip(page, kinds):
+                PdfExporter._draw_slots(pdf, placed, image_registry, form_writer)
+                if vector_writer:
+                    PdfExporter._draw_vector_parts(pdf, placed, vector_writer)
+            pdf.showPage()
+            if progress:
+                progress.page_done()
+        pdf.save()
+        print(image_registry.summary())
+        for exporter, _, _, card_cache, _ in kinds:
+            exporter._finish_card_cache(card_cache)
+        print("PDF export complete.")
+
+
+def _init_shard_worker(model_data: Dict[str, Any], font_manager):
+    """Process pool initializer for sharded exports: one template copy and exporter per worker."""
+    global _shard_exporter
+    _shard_exporter = PdfExporter(ModelSnapshot(model_data, font_manager), font_manager, trim_card_cache=False)
+
+
+def _write_shard(shard_path: str, shard: List[Tuple[dict, int]], options: Dict[str, Any]) -> int:
+    """Writes one shard ((record, copies) pairs, see shard_records) as a complete PDF and returns the number of cards placed in it."""
+    _shard_exporter.export_to_pdf(shard_path, records=[record for record, _ in shard],
+                                  copies=[count for _, count in shard], **options)
+    return sum(count for _, count in shard)
@@ -1,5 +1,5 @@
 from typing import List, Dict, OrderedDict, Optional, Any # For type hinting
-import tkinter as tk
+import copy
 # Assuming FontManager is in utils/font_manager.py
 from utils.font_manager import FontManager
 
@@ -8,7 +8,7 @@ from utils.font_manager import FontManager
 from shapes.base_shape import Shape # Import the base Shape class
 
 # Assuming geometry utility functions are in utils/geometry.py
-from utils.geometry import _update_coords_if_valid, parse_dimension # For updating shape coordinates
+from utils.geometry import _update_coords_if_valid, parse_dimension, get_layers_bounds # For updating shape coordinates
 
 # Assuming constants are in a central constants.py at the root level
 from constants import PPI, GRID_SIZE, SHAPE_TYPES # Example constant
@@ -38,8 +38,8 @@ class Layer:
 
     @staticmethod
     # Accept font_manager (passed from DrawingModel.from_dict)
-    def from_dict(data: Dict[str, Any], font_manager: FontManager):
-        """Creates a Layer instance from a dictionary using Shape.from_dict()."""
+    def from_dict(data: Dict[str, Any], font_manager: FontManager, render_content: bool = True):
+        """Creates a Layer instance from a dictionary using Shape.from_dict() (render_content is passed on)."""
         # Note: font_manager is passed from DrawingModel.from_dict
         # Pass font_manager to the Layer constructor too, as Layer needs it for new shapes
         layer = Layer(data.get('name', 'Unnamed Layer'), font_manager)
@@ -66,7 +66,7 @@ class Layer:
 
                 # Use the Shape.from_dict factory method to create the shape instance
                 # Pass the full shape_data dictionary and the font_manager
-                shape = Shape.from_dict(shape_data, font_manager)
+                shape = Shape.from_dict(shape_data, font_manager, render_content)
 
                 if shape:
                      # Add the created shape to the layer's shapes dictionary
@@ -98,16 +98,20 @@ class ComponentModel:
 
 
 class DrawingModel:
-    def __init__(self, font_manager):
+    def __init__(self, font_manager, ppi: Optional[float] = None):
         self.font_manager = font_manager
 
         # ── Detect true screen PPI ──────────────────────────────────────────
-        root = tk.Tk()
-        px_width  = root.winfo_screenwidth()     # e.g. 1920 px
-        mm_width  = root.winfo_screenmmwidth()   # e.g. 509 mm
-        root.destroy()
-        # Convert mm → inches → pixels per inch
-        self.ppi = px_width / (mm_width / 25.4)
+        # Pass ppi to skip the detection (it needs a display and a Tk interpreter)
+        if ppi is None:
+            import tkinter as tk # Only the editor gets here; headless exports never load Tk
+            root = tk.Tk()
+            px_width  = root.winfo_screenwidth()     # e.g. 1920 px
+            mm_width  = root.winfo_screenmmwidth()   # e.g. 509 mm
+            root.destroy()
+            # Convert mm → inches → pixels per inch
+            ppi = px_width / (mm_width / 25.4)
+        self.ppi = ppi
 
         # ── Measurement unit (two-letter code matched by parse_dimension) ───
         self.measure = "in"   # or "cm", "mm", etc.
@@ -271,16 +275,7 @@ class DrawingModel:
 
     ## Currently being used strictly for export but may be handy elsewhere...
     def get_model_bounds(self) -> tuple[int, int, int, int]:
-        xs, ys = [], []
-        for layer in self.layers:
-            for shape in layer.shapes.values():
-                min_x, min_y, max_x, max_y = shape.get_bbox
-                xs.extend([min_x, max_x])
-                ys.extend([min_y, max_y])
-
-        if not xs or not ys:
-            return (0, 0, 100, 100)
-        return (min(xs), min(ys), max(xs), max(ys))
+        return get_layers_bounds(self.layers)
 
     # In the DrawingModel class, inside the add_shape method, BEFORE self.notify_observers():
     def add_shape(self, shape: Shape):
@@ -400,3 +395,30 @@ class DrawingModel:
         for cb in list(self._observers):
             try: cb()
             except Exception as e: print(f"Error calling model observer callback {cb.__name__}: {e}")
+
+
+class ModelSnapshot:
+    """
+    A frozen, Tk-free copy of a DrawingModel's layers for background work (exports).
+    Built from DrawingModel.to_dict(), so later edits in the editor do not reach it, and it
+    offers the read-only parts of the DrawingModel interface the exporters use.
+    """
+
+    def __init__(self, model_data: Dict[str, Any], font_manager: FontManager):
+        self.font_manager = font_manager
+        self._data = copy.deepcopy(model_data)
+        # Layer.from_dict annotates the dicts it is given, so it gets its own copy. Shapes are not
+        # rendered on load: CardRenderer draws them at the export's DPI (a board's text at a fixed
+        # 300 DPI would otherwise cost hundreds of MB before the export starts)
+        self.layers: List[Layer] = [Layer.from_dict(layer_data, font_manager, render_content=False)
+                                    for layer_data in copy.deepcopy(self._data.get('layers', []))]
+
+    @classmethod
+    def of(cls, model: 'DrawingModel') -> 'ModelSnapshot':
+        return cls(model.to_dict(), model.font_manager)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return copy.deepcopy(self._data)
+
+    def get_model_bounds(self) -> tuple[int, int, int, int]:
+        return get_layers_bounds(self.layers)
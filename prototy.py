@@ -1,8 +1,10 @@
 # prototy.py
 
 # Keep necessary imports
-from tkinter import messagebox
 from typing import TYPE_CHECKING # Keep TYPE_CHECKING
+import sys
+import time
+from contextlib import ExitStack
 
 # Remove AppService import
 # REMOVE THIS LINE: from app_service import AppService
@@ -10,27 +12,136 @@ from typing import TYPE_CHECKING # Keep TYPE_CHECKING
 import pandas as pd # Keep pandas import
 
 # Import the classes that will be instantiated and linked
+# Tkinter and the model/view/controller are imported in run_editor() only, so a command-line
+# export (-e) never loads Tk and runs on machines without a display.
 from utils.font_manager import FontManager # Import FontManager directly
-from model import DrawingModel # Import DrawingModel directly
-from controller import DrawingApp # Import DrawingApp directly
 
 
-if __name__ == '__main__':
+def export_headless(args) -> int:
+    """
+    Exports args.file merged with args.csv_path straight to args.export_pdf, to Tabletop
+    Simulator deck sheets (args.tts_sheets), to one image per card (args.export_images) and/or
+    to one SVG per card (args.export_svg) through PdfExporter, without creating a Tk
+    interpreter, a DrawingModel or the editor's view. Every card is rendered once for all of
+    them when the PDF settings allow it (see PdfExporter.fan_out_conflict). Returns the exit code.
+    """
+    from exporter import PdfExporter, load_template
+    from utils.export_options import PageLayout, RenderOptions, CacheOptions, RunOptions
+    from utils.record_source import iter_records
+    from utils.export_profiles import get_export_profile
+    from utils.deck_sheets import DeckSheetWriter
+    from utils.image_export import CardImageWriter
+    from utils.svg_export import SvgCardWriter
+
+    started = time.perf_counter()
+    font_manager = FontManager(use_tk=False) # Font families from the font files, no Tk needed
+    try:
+        model = load_template(args.file, font_manager)
+    except (OSError, ValueError) as e: # ValueError covers invalid JSON
+        print(f"prototy.py: Could not load template {args.file}: {e}", file=sys.stderr)
+        return 1
+
+    df = None
+    if args.csv_path and not args.stream_rows:
+        try:
+            df = pd.read_csv(args.csv_path)
+        except (OSError, ValueError) as e:
+            print(f"prototy.py: Export cancelled, could not load CSV {args.csv_path}: {e}", file=sys.stderr)
+            return 1
+
+    def load_records():
+        """A fresh pass over the rows for each export target."""
+        if args.csv_path and args.stream_rows:
+            return iter_records(csv_path=args.csv_path) # Read in chunks while exporting
+        return iter_records(df=df) if df is not None else None # None: the template is exported once
+    print(f"prototy.py: Headless export ready in {time.perf_counter() - started:.2f} s.")
+
+    component_size = None # -s sets the printed size of the components (tiled or laid out on the pages), or of the cards on TTS sheets or card images
+    if args.custom_size:
+        try:
+            width, height = (float(v) for v in args.custom_size.split(','))
+            component_size = (width, height)
+        except ValueError:
+            print(f"prototy.py: Invalid size '{args.custom_size}', expected W,H in inches.", file=sys.stderr)
+            return 1
+
+    exporter = PdfExporter(model, font_manager)
+    quality = args.jpeg_quality or get_export_profile(args.profile).jpeg_quality
+    # Deck sheets and card images are CardSinks: they take each card from a render pass (the PDF's when it can share it)
+    sinks = []
+    if args.tts_sheets:
+        sinks.append(DeckSheetWriter(args.tts_sheets, hidden_image=args.hidden_card, jpeg_quality=quality))
+    if args.export_images:
+        sinks.append(CardImageWriter(args.export_images, args.image_format, args.name_column, quality))
+    if args.export_svg: # Drawn from the rows, so it never adds rendering
+        sinks.append(SvgCardWriter(args.export_svg, model.layers, font_manager, args.name_column, args.svg_images,
+                                   get_export_profile(args.profile).render_dpi))
+
+    layout = PageLayout(page=args.page_size, use_card=args.cards is not None, custom_size=component_size,
+                        cards_per_page=args.cards, margin=args.margin, gutter=args.gutter, rotation=args.rotation,
+                        tile=args.tile, tile_overlap=args.tile_overlap)
+    render = RenderOptions(profile=args.profile, text_mode=args.text_mode, outline_mode=args.outline_mode,
+                           template_form=args.template_form, image_codec=args.image_codec,
+                           jpeg_quality=args.jpeg_quality, page_compression=args.page_compression)
+    cache = CacheOptions(use_cache=args.use_cache, cache_dir=args.cache_dir, cache_max_mb=args.cache_max_mb)
+    run = RunOptions(workers=args.workers, queue_depth=args.queue_depth, shard_workers=args.shard_workers,
+                     shard_pages=args.shard_pages)
+    shared = False
+    if sinks and args.export_pdf:
+        conflict = exporter.fan_out_conflict(layout, render, run, sink_size=component_size)
+        shared = conflict is None
+        if conflict:
+            print(f"prototy.py: Rendering the other outputs in a pass of their own: {conflict}.")
+
+    with ExitStack() as open_sinks: # Closed (files finished) on success, aborted on an error
+        for sink in sinks:
+            open_sinks.enter_context(sink)
+        if sinks and not shared:
+            exporter.export_to_sinks(sinks, custom_size=component_size, profile=args.profile, cache=cache, run=run,
+                                     records=load_records())
+        if args.export_pdf:
+            exporter.export_to_pdf(args.export_pdf, layout, render, cache, run, records=load_records(),
+                                   sinks=sinks if shared else None)
+    print(f"prototy.py: Export finished in {time.perf_counter() - started:.2f} s.")
+    return 0
+
+
+def export_batch(argv) -> int:
+    """
+    'prototy.py batch jobs.json [-j N]': runs every export job in a manifest in this one process
+    (see batch_export.load_jobs for the format), sharing fonts, decoded images and the card cache
+    between jobs. Returns the exit code: 1 if any job failed.
+    """
     import argparse
+    from batch_export import BatchExporter, load_jobs
+
+    parser = argparse.ArgumentParser(prog='prototy.py batch', description='Run many PDF exports from a JSON job manifest')
+    parser.add_argument('manifest', help='JSON list of jobs, or {"defaults": {...}, "jobs": [...]}')
+    parser.add_argument('-j', '--jobs', dest='concurrency', type=int, default=1, metavar='N', help='Run up to N jobs at the same time')
+    parser.add_argument('--no-cache', dest='use_cache', action='store_false', help='Render every card from scratch instead of reusing cached cards')
+    parser.add_argument('--cache-dir', dest='cache_dir', metavar='DIR', help='Directory for the rendered-card cache (default: ~/.cache/prototy/cards)')
+    parser.add_argument('--cache-size', dest='cache_max_mb', type=int, default=1024, metavar='MB', help='Evict least recently used cached cards beyond this size once the batch is done')
+    args = parser.parse_args(argv)
+
+    try:
+        jobs = load_jobs(args.manifest)
+    except (OSError, ValueError) as e: # ValueError covers invalid JSON and bad job entries
+        print(f"prototy.py: Could not load batch manifest {args.manifest}: {e}", file=sys.stderr)
+        return 1
+
+    font_manager = FontManager(use_tk=False) # Scanned once for every job in the batch
+    batch = BatchExporter(font_manager, concurrency=args.concurrency, use_cache=args.use_cache,
+                          cache_dir=args.cache_dir, cache_max_mb=args.cache_max_mb)
+    return 1 if batch.run(jobs) else 0
+
+
+def run_editor(args):
+    """Starts the Tk editor, opening args.file or importing args.csv_path when given."""
     import tkinter as tk
     from tkinter import messagebox
     from PIL import Image # Keep PIL Image import for dependency check
-
-    # Argument parsing remains the same
-    parser = argparse.ArgumentParser(description='Enhanced Vector Editor')
-    parser.add_argument('file', nargs='?', help='JSON file to open')
-    parser.add_argument('-i', '--import', dest='csv_path', help='CSV to import')
-    parser.add_argument('-e', '--export_pdf', dest='export_pdf', metavar='OUT.pdf', help='Export to PDF and exit')
-    parser.add_argument('-c', '--cards', type=int, choices=[8, 9], help="Number of cards per page")
-    #parser.add_argument('--use-card', action='store_true', help='Render cards using card layout')
-    parser.add_argument('-p', '--page_size', choices=['letter', 'a4'], default='letter', dest='page_size', help='PDF page size')
-    parser.add_argument('-s', '--size', dest='custom_size', metavar='W,H', help='Custom component size in inches (W,H)')
-    args = parser.parse_args()
+    from model import DrawingModel # Import DrawingModel directly
+    from controller import DrawingApp # Import DrawingApp directly
 
     # Initialize Tk as early as possible
     root = tk.Tk()
@@ -77,50 +188,70 @@ if __name__ == '__main__':
         controller.open_drawing(args.file) # This might show a file dialog or error messagebox
     elif args.csv_path: # Use elif to prioritize opening a file over just importing CSV
         # Import CSV first if specified via argument
-        controller.import_csv(args.csv_path) # This might show a file dialog or error messagebox
-        # Note: If export_pdf is also specified, CSV import happens again below. This is okay.
-
-    # If exporting, perform export and exit without showing the main window (remains the same)
-    if args.export_pdf:
-        use_card = args.cards is not None
-        cards_per_page = args.cards if use_card else None
-        rotate_card = use_card and cards_per_page == 8 # Auto-rotate if 8-up card layout
-
-        # If CSV path was provided via --import, ensure it's loaded before export
-        if args.csv_path:
-            # Call import_csv again just in case the previous elif didn't run (e.g., args.file was also provided)
-            # The import_csv method handles if data is already loaded.
-            controller.import_csv(str(args.csv_path))
-            # Check if import was successful before proceeding with export
-            if controller.csv_data_df is None:
-                 print("Export cancelled due to failed CSV import.")
-                 root.destroy()
-                 exit()
-        # If no CSV was provided via --import, the controller's export method will handle the case
-        # where csv_data_df is None (e.g., exporting a blank or template drawing).
-
-
-        controller.export_to_pdf(
-            export_path=args.export_pdf,
-            page=args.page_size.upper(),
-            use_card=use_card,
-            # custom_size=custom_size_tuple, # Pass the custom size tuple if needed
-            cards_per_page=args.cards,
-            rotate_card=(args.cards == 8 and args.page_size.upper() == 'A4') # Auto-rotate 8-up on A4
-        )
-        root.destroy() # Destroy the Tk root window after export is complete
-    else:
-        # If not exporting, show the main window and start the main loop
-        # Ensure the main window is deiconified (shown)
-        controller._raise_window() # Call the method to lift/focus the window
-
-        # Perform an initial refresh of the view
-        # This is necessary to display the initial state of the model (blank or loaded from file args)
-        # The model's reset() or from_dict() notifies observers, which triggers refresh_all,
-        # but explicitly calling it here after setting up observers ensures the first draw happens.
-        print("prototy.py: Calling initial controller.view.refresh_all.")
-        # Pass the model instance to refresh_all
-        controller.view.refresh_all(controller.model)
-
-        # Start the Tkinter main event loop
-        root.mainloop()
\ No newline at end of file
+        controller.import_csv(args.csv_path, stream_rows=args.stream_rows) # This might show a file dialog or error messagebox
+
+    # Show the main window and start the main loop
+    # Ensure the main window is deiconified (shown)
+    controller._raise_window() # Call the method to lift/focus the window
+
+    # Perform an initial refresh of the view
+    # This is necessary to display the initial state of the model (blank or loaded from file args)
+    # The model's reset() or from_dict() notifies observers, which triggers refresh_all,
+    # but explicitly calling it here after setting up observers ensures the first draw happens.
+    print("prototy.py: Calling initial controller.view.refresh_all.")
+    # Pass the model instance to refresh_all
+    controller.view.refresh_all(controller.model)
+
+    # Start the Tkinter main event loop
+    root.mainloop()
+
+
+if __name__ == '__main__':
+    import argparse
+
+    # 'prototy.py batch jobs.json' runs a manifest of exports; it has its own options
+    if sys.argv[1:2] == ['batch']:
+        sys.exit(export_batch(sys.argv[2:]))
+
+    # Argument parsing remains the same
+    parser = argparse.ArgumentParser(description='Enhanced Vector Editor')
+    parser.add_argument('file', nargs='?', help='JSON file to open')
+    parser.add_argument('-i', '--import', dest='csv_path', help='CSV to import')
+    parser.add_argument('-e', '--export_pdf', dest='export_pdf', metavar='OUT.pdf', help='Export to PDF and exit')
+    parser.add_argument('-c', '--cards', type=int, choices=[8, 9], help="Number of cards per page (9 upright, 8 turned; fewer when margins and gutters leave no room)")
+    #parser.add_argument('--use-card', action='store_true', help='Render cards using card layout')
+    parser.add_argument('-p', '--page_size', choices=['letter', 'a4'], default='letter', dest='page_size', help='PDF page size')
+    parser.add_argument('-s', '--size', dest='custom_size', metavar='W,H', help='Custom component size in inches (W,H); as many as fit are laid out on each page')
+    parser.add_argument('--margin', dest='margin', type=float, default=0.0, metavar='IN', help='Page margin in inches the components are kept inside')
+    parser.add_argument('--gutter', dest='gutter', type=float, default=0.0, metavar='IN', help='Space in inches between neighbouring components')
+    parser.add_argument('--rotate', dest='rotation', choices=['auto', 'never', 'always'], default=None, help="Turn components a quarter where that fits more per page (auto), never, or always (default: auto; -c 9 never, -c 8 always)")
+    parser.add_argument('-w', '--workers', type=int, default=1, metavar='N', help='Render cards on N worker processes during export')
+    parser.add_argument('--profile', dest='profile', choices=['draft', 'print', 'archive'], default='print', help='Export profile: draft (100 DPI, JPEG, vector text and borders, template form, fast), print (300 DPI lossless) or archive (600 DPI lossless, vector text and borders)')
+    parser.add_argument('--image-codec', dest='image_codec', choices=['auto', 'flate', 'jpeg'], default=None, help="How card rasters are stored: auto (JPEG for photographic art only, much smaller files), flate (lossless) or jpeg (default: the profile's; lossless for print and archive)")
+    parser.add_argument('--jpeg-quality', dest='jpeg_quality', type=int, default=None, metavar='Q', help="JPEG quality 1-95 for rasters stored as JPEG (default: the profile's)")
+    parser.add_argument('--page-compression', dest='page_compression', action=argparse.BooleanOptionalAction, default=None, help="Compress page content streams (default: the profile's)")
+    parser.add_argument('--queue-depth', dest='queue_depth', type=int, default=16, metavar='N', help='Items each export pipeline stage may run ahead (0 = run read/decode/render/write in turn)')
+    parser.add_argument('--shard-workers', dest='shard_workers', type=int, default=1, metavar='N', help='Write the PDF as page-aligned parts on N processes and merge them (for very long exports)')
+    parser.add_argument('--shard-pages', dest='shard_pages', type=int, default=50, metavar='P', help='Pages per part with --shard-workers')
+    parser.add_argument('--tile', dest='tile', action='store_true', help='Print each component at full size (or --size) across several pages, with overlap and assembly marks (game boards)')
+    parser.add_argument('--tile-overlap', dest='tile_overlap', type=float, default=0.25, metavar='IN', help='Inches neighbouring tiles overlap with --tile')
+    parser.add_argument('--tts-sheets', dest='tts_sheets', metavar='OUT.png', help='Export Tabletop Simulator deck sheets (10x7, OUT_01.png ... plus OUT.json; .jpg for JPEG) and exit')
+    parser.add_argument('--hidden-card', dest='hidden_card', metavar='IMG', help='Picture for the hidden-card slot of TTS sheets (default: a plain dark card)')
+    parser.add_argument('--export-images', dest='export_images', metavar='DIR', help='Export one image per card into DIR (unchanged cards are not rewritten) and exit')
+    parser.add_argument('--image-format', dest='image_format', choices=['png', 'webp', 'jpeg'], default='png', help='File format for --export-images')
+    parser.add_argument('--export-svg', dest='export_svg', metavar='DIR', help='Export one SVG per card into DIR (vector shapes and text, for the web card viewer) and exit')
+    parser.add_argument('--svg-images', dest='svg_images', choices=['link', 'embed'], default='link', help='Link pictures from the SVGs (relative paths) or embed them')
+    parser.add_argument('--name-column', dest='name_column', metavar='COL', help='Data column the --export-images/--export-svg file names are taken from (default: card_0001, card_0002, ... by row)')
+    parser.add_argument('--text-mode', dest='text_mode', choices=['raster', 'vector'], default=None, help="Rasterize text into the cards or draw it as selectable PDF text (default: the profile's)")
+    parser.add_argument('--outline-mode', dest='outline_mode', choices=['raster', 'vector'], default=None, help="Rasterize shape borders into the cards or stroke them as PDF paths (default: the profile's)")
+    parser.add_argument('--template-form', dest='template_form', action=argparse.BooleanOptionalAction, default=None, help="Write the static template once as a PDF form and reuse it on every card (default: the profile's)")
+    parser.add_argument('--stream', dest='stream_rows', action='store_true', help='Read the imported CSV in chunks during export instead of loading it all up front')
+    parser.add_argument('--no-cache', dest='use_cache', action='store_false', help='Render every card from scratch instead of reusing cards cached by earlier exports')
+    parser.add_argument('--cache-dir', dest='cache_dir', metavar='DIR', help='Directory for the rendered-card cache (default: ~/.cache/prototy/cards)')
+    parser.add_argument('--cache-size', dest='cache_max_mb', type=int, default=1024, metavar='MB', help='Evict least recently used cached cards beyond this size')
+    args = parser.parse_args()
+
+    # -e exports without the editor: no Tk interpreter, window or display is needed
+    if args.export_pdf or args.tts_sheets or args.export_images or args.export_svg:
+        sys.exit(export_headless(args))
+    run_editor(args)
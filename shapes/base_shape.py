@@ -1,16 +1,23 @@
 # shapes/base_shape.py
 
 import math
+import sys
 import textwrap
-from typing import List, Dict, Optional, Any, Tuple
-from PIL import Image, ImageDraw, ImageFont # Ensure ImageFont is here
-import tkinter as tk # Needed for tk.Canvas type hint
-import tkinter.font as tkFont # Needed for tkFont.Font type hint
+from typing import List, Dict, Optional, Any, Tuple, TYPE_CHECKING
+from PIL import Image, ImageDraw, ImageFont, ImageColor # Ensure ImageFont is here
+if TYPE_CHECKING: # Type hints only: rendering for export must work without Tk
+    import tkinter as tk
 
 from utils.font_manager import FontManager # Still need FontManager type hint and class access
 from utils.geometry import _update_coords_if_valid # If used directly in Shape
 from constants import CONTAINER_TYPES, SHAPE_TYPES # Example
 
+
+def _is_tk_canvas(obj: Any) -> bool:
+    """True for a tkinter Canvas. Never imports tkinter: nothing can be a Canvas before it is loaded."""
+    tk_module = sys.modules.get('tkinter')
+    return tk_module is not None and isinstance(obj, tk_module.Canvas)
+
 class Shape:
     # Make these instance methods so they can access self.font_manager
     def get_font_names(self) -> List[str]:
@@ -89,12 +96,14 @@ class Shape:
         self.justification = kwargs.get("justification", "left")
         self.vertical_justification = kwargs.get("vertical_justification", "top") # Add vertical justification
 
-        # Load content if it's an image or text container and data is present
-        if self.container_type == 'Text' and self.text:
+        # Load content if it's an image or text container and data is present (exports pass
+        # render_content=False: they render every shape at their own DPI, see ModelSnapshot)
+        render_content = kwargs.get('render_content', True)
+        if render_content and self.container_type == 'Text' and self.text:
             # When initializing, we want to create the PIL content first for later use (e.g., clipping)
             # Use a default DPI (e.g., 300) for initial PIL text rendering
             self._draw_text_content(draw_pil=True, render_dpi=300) 
-        elif self.container_type == 'Image' and self.path:
+        elif render_content and self.container_type == 'Image' and self.path:
             self._load_image_content()
 
     @property
@@ -287,8 +296,11 @@ class Shape:
         }
 
     @staticmethod
-    def from_dict(data: Dict[str, Any], font_manager: FontManager):
-        """Factory method to create a Shape instance from a dictionary."""
+    def from_dict(data: Dict[str, Any], font_manager: FontManager, render_content: bool = True):
+        """
+        Factory method to create a Shape instance from a dictionary. render_content=False leaves
+        text and pictures unrendered until something draws them (exports, which do so at their own DPI).
+        """
         sid = data.get('sid')
         shape_type = data.get('shape_type')
         coords = data.get('coords')
@@ -330,15 +342,16 @@ class Shape:
                 font_size=data.get('font_size', 12),
                 font_weight=data.get('font_weight', 'regular'),
                 justification=data.get('justification', 'left'),
-                vertical_justification=data.get('vertical_justification', 'top')
+                vertical_justification=data.get('vertical_justification', 'top'),
+                render_content=render_content
             )
 
             # After creation, regenerate content using the loaded properties and the font_manager
             # Always generate PIL content when loading from dict for consistency with clipping
-            if shape_instance.container_type == 'Text' and shape_instance.text:
+            if render_content and shape_instance.container_type == 'Text' and shape_instance.text:
                  # Use a default DPI (e.g., 300) for initial PIL text rendering
                  shape_instance._draw_text_content(draw_pil=True, render_dpi=300)
-            elif shape_instance.container_type == 'Image' and shape_instance.path:
+            elif render_content and shape_instance.container_type == 'Image' and shape_instance.path:
                  shape_instance._load_image_content()
 
             print(f"Shape.from_dict: Created shape ID {shape_instance.sid} of type '{shape_type}'")
@@ -351,7 +364,7 @@ class Shape:
             return None # Handle errors during instance creation
 
 
-    def _draw_text_content(self, canvas: Optional[tk.Canvas] = None, draw_pil: bool = False, render_dpi: int = 72):
+    def _draw_text_content(self, canvas: Optional['tk.Canvas'] = None, draw_pil: bool = False, render_dpi: int = 72):
         """
         Renders the text content either directly to a Tkinter Canvas (if `canvas` is provided
         and `draw_pil` is False) or into a PIL Image (otherwise).
@@ -367,7 +380,7 @@ class Shape:
         """
         if not self.font_manager or not self.text:
             self.content = None # Clear PIL content
-            if isinstance(canvas, tk.Canvas):
+            if _is_tk_canvas(canvas):
                 # Clear any text items previously drawn by this shape instance on the canvas
                 canvas.delete(f"text_shape_{self.sid}")
             return
@@ -379,7 +392,7 @@ class Shape:
         container_height_pixels = max(1, y1 - y0)
 
         # Determine if we are drawing to a Tkinter Canvas directly
-        is_tk_canvas_draw = isinstance(canvas, tk.Canvas) and not draw_pil
+        is_tk_canvas_draw = _is_tk_canvas(canvas) and not draw_pil
 
         if is_tk_canvas_draw:
             # --- Tkinter Drawing Path ---
@@ -456,93 +469,11 @@ class Shape:
             # This path is used if `canvas` is not a Tkinter.Canvas or `draw_pil` is True.
             # This is also the path that will generate the PIL Image for clipping.
             try:
-                # Calculate PIL font size in pixels based on desired point size and render_dpi
-                # 1 point = 1/72 inch. So, size_in_pixels = (size_in_points / 72) * render_dpi
-                pil_font_size_pixels = int(round((self.font_size / 72.0) * render_dpi))
-                pil_font_size_pixels = max(1, pil_font_size_pixels) # Ensure minimum font size
-
-                # Use get_pil_font for PIL rendering with the calculated pixel size
-                font = self.font_manager.get_pil_font(
-                    self.font_name, pil_font_size_pixels, self.font_weight, self.font_slant
-                )
-                if not font:
-                    print(f"Shape {self.sid}: Could not load PIL font {self.font_name} {self.font_weight} {pil_font_size_pixels}px.")
+                layout = self.layout_pil_text(render_dpi)
+                if layout is None:
                     self.content = None
                     return
-
-                # Calculate container dimensions in high-resolution pixels
-                # This is the target size for the text image *before* final scaling to the PDF.
-                # It's based on the shape's actual dimensions, scaled up by the render_dpi.
-                high_res_container_width = max(1, int(round((container_width_pixels / 72.0) * render_dpi)))
-                high_res_container_height = max(1, int(round((container_height_pixels / 72.0) * render_dpi)))
-                
-                # Create a dummy image and draw context to measure text at high resolution
-                # Use a larger dummy image to avoid issues with textbbox for large fonts
-                dummy_img = Image.new('RGBA', (high_res_container_width + 100, high_res_container_height + 100), (0, 0, 0, 0))
-                dummy_draw = ImageDraw.Draw(dummy_img)
-
-                # Estimate average character width for initial wrapping based on high-res font
-                # Use textbbox to get more accurate character width
-                try:
-                    avg_char_width_bbox = dummy_draw.textbbox((0, 0), "M", font=font)
-                    avg_char_width = avg_char_width_bbox[2] - avg_char_width_bbox[0]
-                except Exception:
-                    # Fallback if textbbox fails for some reason
-                    avg_char_width = pil_font_size_pixels * 0.6 # A rough estimate
-
-                max_chars_per_line = max(1, int(high_res_container_width // avg_char_width))
-                if max_chars_per_line == 0: 
-                     max_chars_per_line = 1
-
-                wrapped_text = textwrap.fill(self.text, width=max_chars_per_line)
-                lines = wrapped_text.split('\n')
-
-                total_text_height = 0
-                line_heights = []
-                max_line_width = 0
-                for line in lines:
-                    bbox = dummy_draw.textbbox((0, 0), line, font=font)
-                    line_height = bbox[3] - bbox[1] 
-                    line_width = bbox[2] - bbox[0]
-                    line_heights.append(line_height)
-                    total_text_height += line_height
-                    max_line_width = max(max_line_width, line_width)
-
-                # Determine starting y for vertical justification within the PIL image
-                start_y_text_pil = 0
-                if self.vertical_justification == "center":
-                    start_y_text_pil = (high_res_container_height - total_text_height) / 2
-                elif self.vertical_justification == "bottom":
-                    start_y_text_pil = high_res_container_height - total_text_height
-                start_y_text_pil = max(0, start_y_text_pil) 
-
-                # Create the final PIL image for the text content
-                # The image needs to be large enough to contain the wrapped text and justification padding.
-                # It should be at least the high-res container dimensions.
-                final_img_width = max(high_res_container_width, int(max_line_width) + 2) # Add a small buffer
-                final_img_height = max(high_res_container_height, int(total_text_height) + 2) # Add a small buffer
-                
-                text_img = Image.new('RGBA', (final_img_width, final_img_height), (0, 0, 0, 0)) # Fully transparent background
-                pil_draw_context = ImageDraw.Draw(text_img)
-
-                y_offset = start_y_text_pil
-                for i, line in enumerate(lines):
-                    line_bbox = pil_draw_context.textbbox((0, 0), line, font=font)
-                    line_width = line_bbox[2] - line_bbox[0]
-
-                    x_pil = 0
-                    if self.justification == "center":
-                        x_pil = (final_img_width - line_width) / 2
-                    elif self.justification == "right":
-                        x_pil = final_img_width - line_width
-                    x_pil = max(0, x_pil) 
-
-                    # PIL's text method draws from the top-left of the text's bounding box relative to the text_img origin.
-                    # Adjust 'x_pil' and 'y_offset' by the line_bbox[0] and line_bbox[1] to get the correct draw position.
-                    pil_draw_context.text((x_pil - line_bbox[0], y_offset - line_bbox[1]), line, font=font, fill=self.color)
-                    y_offset += line_heights[i] 
-
-                self.content = self.clip_image_to_geometry(text_img) # Store the PIL image
+                self.content = self.draw_text_region(layout) # Store the PIL image
 
             except Exception as e:
                 print(f"Shape {self.sid}: Error drawing text content (PIL): {e}")
@@ -551,25 +482,228 @@ class Shape:
                 self.content = None
 
 
+    def layout_pil_text(self, render_dpi: int = 72) -> Optional[Dict[str, Any]]:
+        """
+        Word-wraps and positions self.text for PIL rendering at render_dpi without drawing it:
+            {'font', 'lines': [(line, x, y_top, line_bbox), ...], 'size': (width, height)}
+        in pixels, size being the text image's (never smaller than the container). Returns None
+        when there is no text or no font. draw_text_region turns it into pixels.
+        """
+        if not self.font_manager or not self.text:
+            return None
+        x0, y0, x1, y1 = self.get_bbox
+        # Calculate PIL font size in pixels based on desired point size and render_dpi
+        # 1 point = 1/72 inch. So, size_in_pixels = (size_in_points / 72) * render_dpi
+        pil_font_size_pixels = max(1, int(round((self.font_size / 72.0) * render_dpi)))
+
+        # Use get_pil_font for PIL rendering with the calculated pixel size
+        font = self.font_manager.get_pil_font(self.font_name, pil_font_size_pixels, self.font_weight, self.font_slant)
+        if not font:
+            print(f"Shape {self.sid}: Could not load PIL font {self.font_name} {self.font_weight} {pil_font_size_pixels}px.")
+            return None
+
+        # Container dimensions in high-resolution pixels: the shape's box scaled up by render_dpi
+        high_res_container_width = max(1, int(round((max(1, x1 - x0) / 72.0) * render_dpi)))
+        high_res_container_height = max(1, int(round((max(1, y1 - y0) / 72.0) * render_dpi)))
+        placed_lines, final_img_width, final_img_height = self._layout_text_lines(
+            self.text, font, pil_font_size_pixels, high_res_container_width, high_res_container_height
+        )
+        return {'font': font, 'lines': placed_lines, 'size': (final_img_width, final_img_height)}
+
+    def draw_text_region(self, layout: Dict[str, Any], region: Optional[Tuple[int, int, int, int]] = None) -> Image.Image:
+        """
+        Draws a layout_pil_text layout clipped to the shape. With region = (x0, y0, x1, y1) only that
+        part of the text image is drawn (the lines crossing it, shifted to its origin), so a tile of
+        a huge text box never needs the whole text image (tiled export).
+        """
+        width, height = layout['size']
+        rx0, ry0, rx1, ry1 = region or (0, 0, width, height)
+        text_img = Image.new('RGBA', (rx1 - rx0, ry1 - ry0), (0, 0, 0, 0)) # Fully transparent background
+        pil_draw_context = ImageDraw.Draw(text_img)
+        for line, x_pil, y_offset, line_bbox in layout['lines']:
+            # Lines wholly outside the region are skipped (a pixel of slack for antialiased edges)
+            if (y_offset > ry1 + 1 or y_offset + line_bbox[3] - line_bbox[1] < ry0 - 1
+                    or x_pil > rx1 + 1 or x_pil + line_bbox[2] - line_bbox[0] < rx0 - 1):
+                continue
+            # PIL's text method draws from the top-left of the text's bounding box relative to the text_img origin.
+            # Adjust 'x_pil' and 'y_offset' by the line_bbox[0] and line_bbox[1] to get the correct draw position.
+            pil_draw_context.text((x_pil - line_bbox[0] - rx0, y_offset - line_bbox[1] - ry0), line,
+                                  font=layout['font'], fill=self.color)
+        # Clip at the rendered size so non-rectangular containers keep full-resolution text
+        if region is None:
+            return self.clip_image_to_geometry(text_img, size=text_img.size)
+        return self.clip_image_to_geometry(text_img, size=(width, height), region=region, prefitted=True)
+
+    def _layout_text_lines(self, text: str, font, font_size_pixels: int,
+                           container_width: int, container_height: int):
+        """
+        Word-wraps `text` for the given PIL font and positions each line inside a
+        container_width x container_height pixel box using the shape's justification.
+
+        Returns (placed_lines, image_width, image_height) where each placed line is
+        (line, x, y_top, line_bbox) in pixels, and image_width/height is the size of the
+        image that holds every line (never smaller than the container).
+        Shared by the PIL text renderer and the vector PDF text writer so both wrap identically.
+        """
+        # A draw context only to measure text: textbbox does not depend on the image size, so a
+        # pixel is enough (a container-sized one would cost hundreds of MB for a game board)
+        dummy_img = Image.new('RGBA', (1, 1), (0, 0, 0, 0))
+        dummy_draw = ImageDraw.Draw(dummy_img)
+
+        # Estimate average character width for initial wrapping based on high-res font
+        # Use textbbox to get more accurate character width
+        try:
+            avg_char_width_bbox = dummy_draw.textbbox((0, 0), "M", font=font)
+            avg_char_width = avg_char_width_bbox[2] - avg_char_width_bbox[0]
+        except Exception:
+            # Fallback if textbbox fails for some reason
+            avg_char_width = font_size_pixels * 0.6 # A rough estimate
+
+        max_chars_per_line = max(1, int(container_width // avg_char_width))
+        if max_chars_per_line == 0: 
+             max_chars_per_line = 1
+
+        wrapped_text = textwrap.fill(text, width=max_chars_per_line)
+        lines = wrapped_text.split('\n')
+
+        total_text_height = 0
+        line_bboxes = []
+        max_line_width = 0
+        for line in lines:
+            bbox = dummy_draw.textbbox((0, 0), line, font=font)
+            line_bboxes.append(bbox)
+            total_text_height += bbox[3] - bbox[1]
+            max_line_width = max(max_line_width, bbox[2] - bbox[0])
+
+        # Determine starting y for vertical justification within the PIL image
+        start_y_text_pil = 0
+        if self.vertical_justification == "center":
+            start_y_text_pil = (container_height - total_text_height) / 2
+        elif self.vertical_justification == "bottom":
+            start_y_text_pil = container_height - total_text_height
+        start_y_text_pil = max(0, start_y_text_pil) 
+
+        # The image needs to be large enough to contain the wrapped text and justification padding.
+        # It should be at least the high-res container dimensions.
+        final_img_width = max(container_width, int(max_line_width) + 2) # Add a small buffer
+        final_img_height = max(container_height, int(total_text_height) + 2) # Add a small buffer
+
+        placed_lines = []
+        y_offset = start_y_text_pil
+        for line, line_bbox in zip(lines, line_bboxes):
+            line_width = line_bbox[2] - line_bbox[0]
+
+            x_pil = 0
+            if self.justification == "center":
+                x_pil = (final_img_width - line_width) / 2
+            elif self.justification == "right":
+                x_pil = final_img_width - line_width
+            x_pil = max(0, x_pil) 
+
+            placed_lines.append((line, x_pil, y_offset, line_bbox))
+            y_offset += line_bbox[3] - line_bbox[1]
+
+        return placed_lines, final_img_width, final_img_height
+
+    def pdf_font_name(self) -> Optional[str]:
+        """Name of this shape's font as registered with ReportLab, or None if it cannot be embedded."""
+        if not self.font_manager:
+            return None
+        return self.font_manager.get_reportlab_font(self.font_name, self.font_weight, self.font_slant)
+
+    def layout_text_for_pdf(self, text: Optional[str] = None, render_dpi: int = 300) -> Optional[Dict[str, Any]]:
+        """
+        Lays out `text` (default: self.text) with the same wrapping as the PIL path at render_dpi,
+        and returns it in points for drawing as vector PDF text:
+            {'font_name', 'font_size', 'color', 'lines': [(line, x, baseline_y), ...]}
+        Positions are relative to the top-left of the text container (y grows downwards).
+        Returns None when there is nothing to draw or the font cannot be embedded.
+        """
+        text = self.text if text is None else text
+        pdf_font = self.pdf_font_name()
+        if not text or not pdf_font:
+            return None
+        layout = self.layout_vector_text(text, render_dpi)
+        if layout:
+            layout['font_name'] = pdf_font
+        return layout
+
+    def layout_vector_text(self, text: Optional[str] = None, render_dpi: int = 300) -> Optional[Dict[str, Any]]:
+        """
+        The layout behind layout_text_for_pdf, for any vector output (SVG text too): the PIL font
+        is only measured, never drawn, so no ReportLab font is needed.
+            {'font_size', 'color', 'lines': [(line, x, baseline_y), ...]}
+        Returns None when there is nothing to draw or no font file for the shape's font.
+        """
+        text = self.text if text is None else text
+        if not text or not self.font_manager:
+            return None
+
+        x0, y0, x1, y1 = self.get_bbox
+        container_width_pixels = max(1, x1 - x0)
+        container_height_pixels = max(1, y1 - y0)
+
+        pil_font_size_pixels = max(1, int(round((self.font_size / 72.0) * render_dpi)))
+        font = self.font_manager.get_pil_font(self.font_name, pil_font_size_pixels, self.font_weight, self.font_slant)
+        if not font:
+            return None
+
+        high_res_container_width = max(1, int(round((container_width_pixels / 72.0) * render_dpi)))
+        high_res_container_height = max(1, int(round((container_height_pixels / 72.0) * render_dpi)))
+        placed_lines, _, _ = self._layout_text_lines(
+            text, font, pil_font_size_pixels, high_res_container_width, high_res_container_height
+        )
+
+        # PIL draws each line with its ascender at the given y; vector text needs the baseline.
+        ascent, _ = font.getmetrics()
+        px_to_pt = 72.0 / render_dpi
+        return {
+            'font_size': pil_font_size_pixels * px_to_pt,
+            'color': self.color,
+            'lines': [
+                (line, (x_pil - line_bbox[0]) * px_to_pt, (y_top - line_bbox[1] + ascent) * px_to_pt)
+                for line, x_pil, y_top, line_bbox in placed_lines
+            ],
+        }
+
+    def _open_image_file(self, path: str) -> Optional[Image.Image]:
+        """Opens an image file as RGBA, or returns None (with a message) if it is missing or unreadable."""
+        full_path = path # Assume path is relative or absolute
+        # Check if it's a relative path to the current working directory
+        if not os.path.isabs(full_path) and not full_path.startswith('./') and not full_path.startswith('.\\'):
+            # Prepend './' for paths that are just filenames or relative without explicit dot
+            full_path = os.path.join('./', full_path)
+        
+        if not os.path.exists(full_path):
+            print(f"Shape {self.sid}: Image file not found at {full_path}")
+            return None
+
+        try:
+            img = Image.open(full_path)
+            return img.convert("RGBA") # Ensure RGBA for transparency
+        except Exception as e:
+            print(f"Shape {self.sid}: Error opening image {full_path}: {e}")
+            return None
+
+    def render_image_content(self, size: Tuple[int, int], path: Optional[str] = None) -> Optional[Image.Image]:
+        """
+        Returns the image at self.path (or path) fitted and clipped to this shape at `size` pixels,
+        in a single resample, without touching self.content. Used by the export renderer.
+        """
+        full_path = path or self.path
+        if not full_path:
+            return None
+        img = self._open_image_file(full_path)
+        if img is None:
+            return None
+        return self.clip_image_to_geometry(img, size=size)
+
     def _load_image_content(self, path=None):
         """Loads an image from self.path or path into self.content."""
         full_path = path or self.path # Assume path is relative or absolute
         if full_path:
-            # Check if it's a relative path to the current working directory
-            if not os.path.isabs(full_path) and not full_path.startswith('./') and not full_path.startswith('.\\'):
-                # Prepend './' for paths that are just filenames or relative without explicit dot
-                full_path = os.path.join('./', full_path)
-            
-            if not os.path.exists(full_path):
-                print(f"Shape {self.sid}: Image file not found at {full_path}")
-                self.content = None
-                return
-
-            try:
-                img = Image.open(full_path)
-                img = img.convert("RGBA") # Ensure RGBA for transparency
-            except Exception as e:
-                print(f"Shape {self.sid}: Error opening image {full_path}: {e}")
+            img = self._open_image_file(full_path)
+            if img is None:
                 self.content = None
                 return
         elif self.content:
@@ -619,9 +753,76 @@ class Shape:
     def draw_shape(self, canvas=None, draw: Optional[ImageDraw.ImageDraw]=None):
         pass  # Override in subclasses
 
-    def clip_image_to_geometry(self, pil_image: Image.Image) -> Image.Image:
+    def pdf_outline_path(self, pdf, offset_x: float = 0, offset_y: float = 0):
+        return None  # Override in subclasses
+
+    def draw_pdf_outline(self, pdf, offset_x: float = 0, offset_y: float = 0):
+        """
+        Strokes the shape's border as a vector path on a ReportLab canvas.
+        Coordinates are in 72-dpi model units shifted by (-offset_x, -offset_y), with y growing
+        downwards; the caller sets up the transform (see utils/pdf_export.card_transform).
+        """
+        if not self.line_width or not self.color or not self.coords or len(self.coords) < 4:
+            return
+        path = self.pdf_outline_path(pdf, offset_x, offset_y)
+        if path is None:
+            return
+        try:
+            r, g, b = ImageColor.getrgb(self.color)[:3]
+        except ValueError:
+            print(f"Shape {self.sid}: Unknown outline color '{self.color}', skipping PDF outline.")
+            return
+        pdf.setStrokeColorRGB(r / 255.0, g / 255.0, b / 255.0)
+        pdf.setLineWidth(self.line_width)
+        pdf.drawPath(path, stroke=1, fill=0)
+
+    def svg_outline_geometry(self, offset_x: float = 0, offset_y: float = 0) -> Optional[Tuple[str, Dict[str, Any]]]:
+        return None  # Override in subclasses: (SVG tag, attributes) of the border's centre line
+
+    def svg_clip_geometry(self, x: float, y: float, width: float, height: float) -> Optional[Tuple[str, Dict[str, Any]]]:
+        return None  # Override in subclasses: (SVG tag, attributes) an Image container's picture is clipped to; None = the box
+
+    def svg_outline(self, offset_x: float = 0, offset_y: float = 0) -> Optional[str]:
+        """
+        The shape's border as an SVG element, on the same centre line as pdf_outline_path, in
+        72-dpi model units shifted by (-offset_x, -offset_y) (SVG's y grows downwards like the model's).
+        """
+        if not self.line_width or not self.color or not self.coords or len(self.coords) < 4:
+            return None
+        geometry = self.svg_outline_geometry(offset_x, offset_y)
+        if geometry is None:
+            return None
+        try:
+            r, g, b = ImageColor.getrgb(self.color)[:3]
+        except ValueError:
+            print(f"Shape {self.sid}: Unknown outline color '{self.color}', skipping SVG outline.")
+            return None
+        from utils.svg_export import svg_element # Only SVG export needs it
+        tag, attributes = geometry
+        return svg_element(tag, attributes, fill='none', stroke=f'#{r:02x}{g:02x}{b:02x}', stroke_width=self.line_width)
+
+    def clip_image_to_geometry(self, pil_image: Image.Image, size: Optional[Tuple[int, int]] = None,
+                               region: Optional[Tuple[int, int, int, int]] = None, prefitted: bool = False) -> Image.Image:
         return pil_image  # Override in subclasses
 
+    @staticmethod
+    def _fit_image(pil_image: Image.Image, size: Tuple[int, int],
+                   region: Optional[Tuple[int, int, int, int]] = None, prefitted: bool = False) -> Image.Image:
+        """
+        pil_image as RGBA resized to size. With region = (x0, y0, x1, y1) only that part of the
+        resized image is produced, resampled straight from the matching part of the source, so a
+        tile of a huge picture never needs the whole picture at output size (tiled export).
+        prefitted: pil_image already is that part at output size (text drawn for a tile), only masked.
+        """
+        if prefitted:
+            return pil_image if pil_image.mode == 'RGBA' else pil_image.convert('RGBA')
+        if region is None:
+            return pil_image.convert('RGBA').resize(size, Image.Resampling.LANCZOS)
+        im = pil_image if pil_image.mode == 'RGBA' else pil_image.convert('RGBA')
+        x0, y0, x1, y1 = region
+        sx, sy = im.width / size[0], im.height / size[1]
+        return im.resize((x1 - x0, y1 - y0), Image.Resampling.LANCZOS, box=(x0 * sx, y0 * sy, x1 * sx, y1 * sy))
+
     def draw(self):
         pass
 
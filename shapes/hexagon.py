@@ -1,6 +1,6 @@
 from typing import List, Dict, Optional, Any, Tuple
 import math
-from PIL import Image, ImageDraw, ImageFont
+from PIL import Image, ImageDraw, ImageFont, ImageChops
 from shapes.base_shape import Shape
 
 class Hexagon(Shape):
@@ -12,45 +12,8 @@ class Hexagon(Shape):
                 print(f"Hexagon ID {self.sid}: Invalid coords: {self.coords}")
                 return
 
-            x1_outer, y1_outer, x2_outer, y2_outer = self.coords
-            half_line_width = self.line_width / 2.0
-
-            # Calculate outer bounding box center for scaling towards center
-            bbox_center_x = (x1_outer + x2_outer) / 2
-            bbox_center_y = (y1_outer + y2_outer) / 2
-            width_outer = abs(x2_outer - x1_outer)
-            height_outer = abs(y2_outer - y1_outer)
-
-
-            outer_pts = []
-            # Calculate outer vertices
-            for i in range(6):
-                angle_deg = 60 * i - 30
-                angle_rad = math.radians(angle_deg)
-                ox = bbox_center_x + (width_outer/2) * math.cos(angle_rad)
-                oy = bbox_center_y + (height_outer/2) * math.sin(angle_rad)
-                outer_pts.append((ox, oy))
-
-
-            inner_pts_flat = [] # Use a flat list for Tkinter
-            inner_pts_pil = [] # Use a list of tuples for PIL
-
-            # Calculate inner vertices by moving outer vertices towards the center
-            for ox, oy in outer_pts:
-                # Vector from center to outer vertex
-                vx, vy = ox - bbox_center_x, oy - bbox_center_y
-                dist = math.sqrt(vx**2 + vy**2)
-
-                if dist > 0:
-                    # Normalize the vector and move inwards by half_line_width
-                    nx, ny = vx / dist, vy / dist
-                    ix = ox - nx * half_line_width
-                    iy = oy - ny * half_line_width
-                else: # Handle the case where the vertex is at the center (shouldn't happen for a hexagon)
-                     ix, iy = ox, oy
-
-                inner_pts_flat.extend([ix, iy])
-                inner_pts_pil.append((ix, iy))
+            inner_pts_pil = self._outline_points() # Use a list of tuples for PIL
+            inner_pts_flat = [c for pt in inner_pts_pil for c in pt] # Use a flat list for Tkinter
 
 
             tags = ('shape', f'id{self.sid}')
@@ -62,16 +25,82 @@ class Hexagon(Shape):
             elif draw:
                 draw.polygon(inner_pts_pil, outline=self.color, width=self.line_width)
 
-    def clip_image_to_geometry(self, pil_image: Image.Image) -> Image.Image:
+    def _outline_points(self) -> List[Tuple[float, float]]:
+        """Vertices of the border's centre line (outer vertices moved half the line width towards the centre)."""
+        x1_outer, y1_outer, x2_outer, y2_outer = self.coords
+        half_line_width = self.line_width / 2.0
+
+        # Calculate outer bounding box center for scaling towards center
+        bbox_center_x = (x1_outer + x2_outer) / 2
+        bbox_center_y = (y1_outer + y2_outer) / 2
+        width_outer = abs(x2_outer - x1_outer)
+        height_outer = abs(y2_outer - y1_outer)
+
+
+        outer_pts = []
+        # Calculate outer vertices
+        for i in range(6):
+            angle_deg = 60 * i - 30
+            angle_rad = math.radians(angle_deg)
+            ox = bbox_center_x + (width_outer/2) * math.cos(angle_rad)
+            oy = bbox_center_y + (height_outer/2) * math.sin(angle_rad)
+            outer_pts.append((ox, oy))
+
+
+        inner_pts = []
+
+        # Calculate inner vertices by moving outer vertices towards the center
+        for ox, oy in outer_pts:
+            # Vector from center to outer vertex
+            vx, vy = ox - bbox_center_x, oy - bbox_center_y
+            dist = math.sqrt(vx**2 + vy**2)
+
+            if dist > 0:
+                # Normalize the vector and move inwards by half_line_width
+                nx, ny = vx / dist, vy / dist
+                ix = ox - nx * half_line_width
+                iy = oy - ny * half_line_width
+            else: # Handle the case where the vertex is at the center (shouldn't happen for a hexagon)
+                 ix, iy = ox, oy
+
+            inner_pts.append((ix, iy))
+
+        return inner_pts
+
+    def pdf_outline_path(self, pdf, offset_x: float = 0, offset_y: float = 0):
+        path = pdf.beginPath()
+        for i, (ix, iy) in enumerate(self._outline_points()):
+            if i == 0:
+                path.moveTo(ix - offset_x, iy - offset_y)
+            else:
+                path.lineTo(ix - offset_x, iy - offset_y)
+        path.close()
+        return path
+
+    def svg_outline_geometry(self, offset_x: float = 0, offset_y: float = 0) -> Optional[Tuple[str, Dict[str, Any]]]:
+        return 'polygon', {'points': [(ix - offset_x, iy - offset_y) for ix, iy in self._outline_points()]}
+
+    def svg_clip_geometry(self, x: float, y: float, width: float, height: float) -> Optional[Tuple[str, Dict[str, Any]]]:
+        # Same hexagon as the raster mask, pointy sides left and right
+        return 'polygon', {'points': [(x + width / 2 + width / 2 * math.cos(math.radians(60 * i - 30)),
+                                       y + height / 2 + height / 2 * math.sin(math.radians(60 * i - 30)))
+                                      for i in range(6)]}
+
+    def clip_image_to_geometry(self, pil_image: Image.Image, size: Optional[Tuple[int, int]] = None,
+                               region: Optional[Tuple[int, int, int, int]] = None, prefitted: bool = False) -> Image.Image:
         x1, y1, x2, y2 = self.get_bbox
-        w, h = int(x2 - x1), int(y2 - y1)
+        # size: output pixels (e.g. the export's paste size); defaults to the 72-dpi bbox
+        w, h = size if size else (int(x2 - x1), int(y2 - y1))
         if w <= 0 or h <= 0: return Image.new('RGBA', (1,1))
+        # region (x0, y0, x1, y1): only that part of the result (a tile); the mask is drawn shifted to match
+        ox, oy = region[:2] if region else (0, 0)
+        im = self._fit_image(pil_image, (w, h), region, prefitted)
         
         # Create hexagonal mask
-        mask = Image.new('L', (w, h), 0)
+        mask = Image.new('L', im.size, 0)
         mdraw = ImageDraw.Draw(mask)
         
-        center_x, center_y = w/2, h/2
+        center_x, center_y = w/2 - ox, h/2 - oy
         points = []
         for i in range(6):
             angle_deg = 60 * i - 30
@@ -82,8 +111,8 @@ class Hexagon(Shape):
             
         mdraw.polygon(points, fill=255)
         
-        im = pil_image.convert('RGBA').resize((w, h), Image.Resampling.LANCZOS)
-        im.putalpha(mask)
+        # Keep the content's own transparency (e.g. text) inside the hexagon
+        im.putalpha(ImageChops.multiply(im.getchannel('A'), mask))
         return im
 
     def contains_point(self, x: int, y: int) -> bool:
@@ -1,5 +1,5 @@
 from typing import List, Dict, Optional, Any, Tuple
-from PIL import Image, ImageDraw, ImageFont
+from PIL import Image, ImageDraw, ImageFont, ImageChops
 from shapes.base_shape import Shape
 
 class Oval(Shape):
@@ -8,6 +8,19 @@ class Oval(Shape):
 
     def draw_shape(self, canvas=None, draw: Optional[ImageDraw.ImageDraw]=None):
         if not self.coords or len(self.coords) < 4: return
+        inset_x1, inset_y1, inset_x2, inset_y2 = self._outline_bbox()
+
+        if canvas:
+            # Tkinter oval uses bounding box corners
+            canvas.create_oval(inset_x1, inset_y1, inset_x2, inset_y2,
+                              outline=self.color, width=self.line_width, fill='')
+        elif draw:
+            # PIL ellipse uses bounding box [x0, y0, x1, y1] format
+            draw.ellipse([inset_x1, inset_y1, inset_x2, inset_y2],
+                         outline=self.color, width=self.line_width)
+
+    def _outline_bbox(self) -> Tuple[float, float, float, float]:
+        """Bounding box of the border's centre line (the shape's bbox inset by half the line width)."""
         x1_outer, y1_outer, x2_outer, y2_outer = self.coords
         half_line_width = self.line_width / 2.0
 
@@ -21,22 +34,33 @@ class Oval(Shape):
         # Ensure inset coordinates are valid
         if inset_x1 > inset_x2: inset_x1, inset_x2 = inset_x2, inset_x1
         if inset_y1 > inset_y2: inset_y1, inset_y2 = inset_y2, inset_y1
+        return inset_x1, inset_y1, inset_x2, inset_y2
 
-        if canvas:
-            # Tkinter oval uses bounding box corners
-            canvas.create_oval(inset_x1, inset_y1, inset_x2, inset_y2,
-                              outline=self.color, width=self.line_width, fill='')
-        elif draw:
-            # PIL ellipse uses bounding box [x0, y0, x1, y1] format
-            draw.ellipse([inset_x1, inset_y1, inset_x2, inset_y2],
-                         outline=self.color, width=self.line_width)
+    def pdf_outline_path(self, pdf, offset_x: float = 0, offset_y: float = 0):
+        inset_x1, inset_y1, inset_x2, inset_y2 = self._outline_bbox()
+        path = pdf.beginPath()
+        path.ellipse(inset_x1 - offset_x, inset_y1 - offset_y, inset_x2 - inset_x1, inset_y2 - inset_y1)
+        return path
+
+    def svg_outline_geometry(self, offset_x: float = 0, offset_y: float = 0) -> Optional[Tuple[str, Dict[str, Any]]]:
+        inset_x1, inset_y1, inset_x2, inset_y2 = self._outline_bbox()
+        return 'ellipse', {'cx': (inset_x1 + inset_x2) / 2 - offset_x, 'cy': (inset_y1 + inset_y2) / 2 - offset_y,
+                           'rx': (inset_x2 - inset_x1) / 2, 'ry': (inset_y2 - inset_y1) / 2}
+
+    def svg_clip_geometry(self, x: float, y: float, width: float, height: float) -> Optional[Tuple[str, Dict[str, Any]]]:
+        return 'ellipse', {'cx': x + width / 2, 'cy': y + height / 2, 'rx': width / 2, 'ry': height / 2}
 
-    def clip_image_to_geometry(self, pil_image: Image.Image) -> Image.Image:
+    def clip_image_to_geometry(self, pil_image: Image.Image, size: Optional[Tuple[int, int]] = None,
+                               region: Optional[Tuple[int, int, int, int]] = None, prefitted: bool = False) -> Image.Image:
         x1, y1, x2, y2 = self.get_bbox
-        w, h = int(x2 - x1), int(y2 - y1)
+        # size: output pixels (e.g. the export's paste size); defaults to the 72-dpi bbox
+        w, h = size if size else (int(x2 - x1), int(y2 - y1))
         if w <= 0 or h <= 0: return Image.new('RGBA', (1,1))
-        im = pil_image.convert('RGBA').resize((w, h), Image.Resampling.LANCZOS)
-        mask = Image.new('L', (w, h), 0); mdraw = ImageDraw.Draw(mask); mdraw.ellipse([0, 0, w, h], fill=255); im.putalpha(mask)
+        # region (x0, y0, x1, y1): only that part of the result (a tile); the mask is drawn shifted to match
+        ox, oy = region[:2] if region else (0, 0)
+        im = self._fit_image(pil_image, (w, h), region, prefitted)
+        mask = Image.new('L', im.size, 0); mdraw = ImageDraw.Draw(mask); mdraw.ellipse([-ox, -oy, w - ox, h - oy], fill=255)
+        im.putalpha(ImageChops.multiply(im.getchannel('A'), mask)) # keep the content's own transparency inside the ellipse
         return im
 
     def contains_point(self, x: int, y: int) -> bool:
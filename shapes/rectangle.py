@@ -8,6 +8,21 @@ class Rectangle(Shape):
 
     def draw_shape(self, canvas=None, draw: Optional[ImageDraw.ImageDraw]=None):
         if not self.coords or len(self.coords) < 4: return
+        inset_x1, inset_y1, inset_x2, inset_y2 = self._outline_bbox()
+
+        if canvas:
+            # Tkinter rectangle uses top-left and bottom-right corners
+            canvas.create_rectangle(inset_x1, inset_y1, inset_x2, inset_y2,
+                                    outline=self.color, width=self.line_width, fill='')
+
+        elif draw:
+            # PIL rectangle uses [x0, y0, x1, y1] format
+            # Corrected: draw is the drawing context, use draw.rectangle()
+            draw.rectangle([inset_x1, inset_y1, inset_x2, inset_y2],
+                           outline=self.color, width=self.line_width)
+
+    def _outline_bbox(self) -> Tuple[float, float, float, float]:
+        """Bounding box of the border's centre line (the shape's bbox inset by half the line width)."""
         x1_outer, y1_outer, x2_outer, y2_outer = self.coords
         half_line_width = self.line_width / 2.0
 
@@ -21,30 +36,40 @@ class Rectangle(Shape):
         # Ensure inset coordinates are valid for very thin shapes
         if inset_x1 > inset_x2: inset_x1, inset_x2 = inset_x2, inset_x1
         if inset_y1 > inset_y2: inset_y1, inset_y2 = inset_y2, inset_y1
+        return inset_x1, inset_y1, inset_x2, inset_y2
 
-        if canvas:
-            # Tkinter rectangle uses top-left and bottom-right corners
-            canvas.create_rectangle(inset_x1, inset_y1, inset_x2, inset_y2,
-                                    outline=self.color, width=self.line_width, fill='')
+    def pdf_outline_path(self, pdf, offset_x: float = 0, offset_y: float = 0):
+        inset_x1, inset_y1, inset_x2, inset_y2 = self._outline_bbox()
+        path = pdf.beginPath()
+        path.rect(inset_x1 - offset_x, inset_y1 - offset_y, inset_x2 - inset_x1, inset_y2 - inset_y1)
+        return path
 
-        elif draw:
-            # PIL rectangle uses [x0, y0, x1, y1] format
-            # Corrected: draw is the drawing context, use draw.rectangle()
-            draw.rectangle([inset_x1, inset_y1, inset_x2, inset_y2],
-                           outline=self.color, width=self.line_width)
+    def svg_outline_geometry(self, offset_x: float = 0, offset_y: float = 0) -> Optional[Tuple[str, Dict[str, Any]]]:
+        inset_x1, inset_y1, inset_x2, inset_y2 = self._outline_bbox()
+        return 'rect', {'x': inset_x1 - offset_x, 'y': inset_y1 - offset_y,
+                        'width': inset_x2 - inset_x1, 'height': inset_y2 - inset_y1}
+
+    def clip_image_to_geometry(self, pil_image: Image.Image, size: Optional[Tuple[int, int]] = None,
+                               region: Optional[Tuple[int, int, int, int]] = None, prefitted: bool = False) -> Image.Image:
+        # region (x0, y0, x1, y1): only that part of the size result (a tile); the mask is a solid
+        # rectangle, so the part is simply the fitted region of the image
+        if region and size:
+            return self._fit_image(pil_image, size, region, prefitted)
 
-    def clip_image_to_geometry(self, pil_image: Image.Image) -> Image.Image:
         # Always ensure the input image is RGBA
         im_rgba = pil_image.convert('RGBA')
 
         # If it's a text container, or if clipping is not desired for image containers,
         # return the image as is, preserving its original alpha channel.
         if self.container_type == 'Text' or (self.container_type == 'Image' and not self.clip_image):
+            if size and im_rgba.size != tuple(size):
+                return im_rgba.resize(size, Image.Resampling.LANCZOS)
             return im_rgba
 
         # For image containers where clipping is enabled:
         x1, y1, x2, y2 = self.get_bbox
-        w, h = int(x2 - x1), int(y2 - y1)
+        # size: output pixels (e.g. the export's paste size); defaults to the 72-dpi bbox
+        w, h = size if size else (int(x2 - x1), int(y2 - y1))
         if w <= 0 or h <= 0:
             # Return a tiny transparent image if dimensions are invalid
             return Image.new('RGBA', (1,1), (0,0,0,0)) 
@@ -1,6 +1,6 @@
 from typing import List, Dict, Optional, Any, Tuple
 import math
-from PIL import Image, ImageDraw, ImageFont
+from PIL import Image, ImageDraw, ImageFont, ImageChops
 from shapes.base_shape import Shape
 
 class Triangle(Shape):
@@ -9,54 +9,81 @@ class Triangle(Shape):
 
     def draw_shape(self, canvas=None, draw: Optional[ImageDraw.ImageDraw]=None):
             if not self.coords or len(self.coords) < 4: return
-            x1_outer, y1_outer, x2_outer, y2_outer = self.coords
-            half_line_width = self.line_width / 2.0
-
-            # Calculate outer vertices based on the bounding box
-            base_y_outer = max(y1_outer, y2_outer)
-            apex_y_outer = min(y1_outer, y2_outer)
-            left_x_outer = min(x1_outer, x2_outer)
-            right_x_outer = max(x1_outer, x2_outer)
-            center_x_outer = (left_x_outer + right_x_outer) / 2
-
-            outer_pts = [(left_x_outer, base_y_outer), (center_x_outer, apex_y_outer), (right_x_outer, base_y_outer)]
-
-            # Calculate center of the outer bounding box for scaling towards center
-            bbox_center_x = (left_x_outer + right_x_outer) / 2
-            bbox_center_y = (apex_y_outer + base_y_outer) / 2
-
-            inner_pts_flat = [] # Use a flat list for Tkinter
-            inner_pts_pil = [] # Use a list of tuples for PIL
-
-            # Calculate inner vertices by moving outer vertices towards the center
-            for ox, oy in outer_pts:
-                # Vector from center to outer vertex
-                vx, vy = ox - bbox_center_x, oy - bbox_center_y
-                dist = math.sqrt(vx**2 + vy**2)
-
-                if dist > 0:
-                    # Normalize the vector and move inwards by half_line_width
-                    nx, ny = vx / dist, vy / dist
-                    ix = ox - nx * half_line_width
-                    iy = oy - ny * half_line_width
-                else: # Handle the case where the vertex is at the center (shouldn't happen for a triangle)
-                     ix, iy = ox, oy
-
-                inner_pts_flat.extend([ix, iy])
-                inner_pts_pil.append((ix, iy))
+            inner_pts_pil = self._outline_points() # Use a list of tuples for PIL
+            inner_pts_flat = [c for pt in inner_pts_pil for c in pt] # Use a flat list for Tkinter
 
             if canvas:
                 canvas.create_polygon(inner_pts_flat, outline=self.color, width=self.line_width, fill='')
             elif draw:
                 draw.polygon(inner_pts_pil, outline=self.color, width=self.line_width)
 
-    def clip_image_to_geometry(self, pil_image: Image.Image) -> Image.Image:
+    def _outline_points(self) -> List[Tuple[float, float]]:
+        """Vertices of the border's centre line (outer vertices moved half the line width towards the centre)."""
+        x1_outer, y1_outer, x2_outer, y2_outer = self.coords
+        half_line_width = self.line_width / 2.0
+
+        # Calculate outer vertices based on the bounding box
+        base_y_outer = max(y1_outer, y2_outer)
+        apex_y_outer = min(y1_outer, y2_outer)
+        left_x_outer = min(x1_outer, x2_outer)
+        right_x_outer = max(x1_outer, x2_outer)
+        center_x_outer = (left_x_outer + right_x_outer) / 2
+
+        outer_pts = [(left_x_outer, base_y_outer), (center_x_outer, apex_y_outer), (right_x_outer, base_y_outer)]
+
+        # Calculate center of the outer bounding box for scaling towards center
+        bbox_center_x = (left_x_outer + right_x_outer) / 2
+        bbox_center_y = (apex_y_outer + base_y_outer) / 2
+
+        inner_pts = []
+
+        # Calculate inner vertices by moving outer vertices towards the center
+        for ox, oy in outer_pts:
+            # Vector from center to outer vertex
+            vx, vy = ox - bbox_center_x, oy - bbox_center_y
+            dist = math.sqrt(vx**2 + vy**2)
+
+            if dist > 0:
+                # Normalize the vector and move inwards by half_line_width
+                nx, ny = vx / dist, vy / dist
+                ix = ox - nx * half_line_width
+                iy = oy - ny * half_line_width
+            else: # Handle the case where the vertex is at the center (shouldn't happen for a triangle)
+                 ix, iy = ox, oy
+
+            inner_pts.append((ix, iy))
+
+        return inner_pts
+
+    def pdf_outline_path(self, pdf, offset_x: float = 0, offset_y: float = 0):
+        path = pdf.beginPath()
+        for i, (ix, iy) in enumerate(self._outline_points()):
+            if i == 0:
+                path.moveTo(ix - offset_x, iy - offset_y)
+            else:
+                path.lineTo(ix - offset_x, iy - offset_y)
+        path.close()
+        return path
+
+    def svg_outline_geometry(self, offset_x: float = 0, offset_y: float = 0) -> Optional[Tuple[str, Dict[str, Any]]]:
+        return 'polygon', {'points': [(ix - offset_x, iy - offset_y) for ix, iy in self._outline_points()]}
+
+    def svg_clip_geometry(self, x: float, y: float, width: float, height: float) -> Optional[Tuple[str, Dict[str, Any]]]:
+        # Same triangle as the raster mask: apex at the top centre, base along the bottom
+        return 'polygon', {'points': [(x, y + height), (x + width / 2, y), (x + width, y + height)]}
+
+    def clip_image_to_geometry(self, pil_image: Image.Image, size: Optional[Tuple[int, int]] = None,
+                               region: Optional[Tuple[int, int, int, int]] = None, prefitted: bool = False) -> Image.Image:
         x1, y1, x2, y2 = self.get_bbox
-        w, h = int(x2 - x1), int(y2 - y1)
+        # size: output pixels (e.g. the export's paste size); defaults to the 72-dpi bbox
+        w, h = size if size else (int(x2 - x1), int(y2 - y1))
         if w <= 0 or h <= 0: return Image.new('RGBA', (1,1))
-        im = pil_image.convert('RGBA').resize((w, h), Image.Resampling.LANCZOS)
-        mask = Image.new('L', (w, h), 0); mdraw = ImageDraw.Draw(mask)
-        mask_pts = [(0, h), (w/2, 0), (w, h)]; mdraw.polygon(mask_pts, fill=255); im.putalpha(mask)
+        # region (x0, y0, x1, y1): only that part of the result (a tile); the mask is drawn shifted to match
+        ox, oy = region[:2] if region else (0, 0)
+        im = self._fit_image(pil_image, (w, h), region, prefitted)
+        mask = Image.new('L', im.size, 0); mdraw = ImageDraw.Draw(mask)
+        mask_pts = [(-ox, h - oy), (w/2 - ox, -oy), (w - ox, h - oy)]; mdraw.polygon(mask_pts, fill=255)
+        im.putalpha(ImageChops.multiply(im.getchannel('A'), mask)) # keep the content's own transparency inside the triangle
         return im
 
     def contains_point(self, x: int, y: int) -> bool:
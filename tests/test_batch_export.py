@@ -0,0 +1,63 @@
+# tests/test_batch_export.py
+
+import json
+import re
+
+import pytest
+
+pytest.importorskip("reportlab")
+pypdf = pytest.importorskip("pypdf")
+
+from batch_export import BatchExporter, load_jobs
+
+
+def _template(path, width, height):
+    path.write_text(json.dumps({'layers': [{'name': 'Background', 'shapes': {
+        '0': {'sid': 0, 'shape_type': 'rectangle', 'coords': [0, 0, width, height], 'name': '@name',
+              'container_type': 'Text', 'color': 'black', 'line_width': 1, 'text': '',
+              'font_name': 'Arial Unicode', 'font_size': 12},
+    }}]}))
+
+
+@pytest.fixture
+def mixed_manifest(tmp_path):
+    _template(tmp_path / 'card.json', 180, 252)
+    _template(tmp_path / 'token.json', 72, 72)
+    (tmp_path / 'cards.csv').write_text('@name\n' + ''.join(f"Card {i}\n" for i in range(10)))
+    (tmp_path / 'tokens.csv').write_text('@name,@qty\nWound,40\nGold,10\n')
+    manifest = tmp_path / 'jobs.json'
+    manifest.write_text(json.dumps({'jobs': [{'output': 'mixed.pdf', 'margin': 0.25, 'profile': 'draft', 'components': [
+        {'template': 'card.json', 'data': 'cards.csv', 'size': '2.5,3.5', 'per_page': 6},
+        {'template': 'token.json', 'data': 'tokens.csv', 'size': [1, 1]}]}]}))
+    return manifest
+
+
+def test_load_mixed_job(mixed_manifest, tmp_path):
+    (job,) = load_jobs(str(mixed_manifest))
+    assert job.template is None
+    assert [(c.size, c.per_page) for c in job.components] == [((2.5, 3.5), 6), ((1.0, 1.0), None)]
+    assert job.components[0].template == str(tmp_path / 'card.json')
+
+
+def test_mixed_job_rejects_job_level_template(tmp_path):
+    manifest = tmp_path / 'jobs.json'
+    manifest.write_text(json.dumps([{'output': 'x.pdf', 'template': 'card.json',
+                                     'components': [{'template': 'token.json'}]}]))
+    with pytest.raises(ValueError, match='components'):
+        load_jobs(str(manifest))
+
+
+def test_mixed_job_puts_cards_and_tokens_on_shared_pages(mixed_manifest, tmp_path):
+    from utils.font_manager import FontManager
+
+    batch = BatchExporter(FontManager(use_tk=False), use_cache=False)
+    assert batch.run(load_jobs(str(mixed_manifest))) == 0
+
+    reader = pypdf.PdfReader(str(tmp_path / 'mixed.pdf'), strict=True)
+    # 10 cards at 6 a page need two pages; the 50 tokens fill the space beside them
+    texts = [page.extract_text() for page in reader.pages]
+    assert len(reader.pages) >= 2
+    assert sum(len(re.findall(r'Card \d', text)) for text in texts) == 10
+    assert sum(text.count('Wound') for text in texts) == 40
+    assert sum(text.count('Gold') for text in texts) == 10
+    assert 'Card 0' in texts[0] and 'Wound' in texts[0]
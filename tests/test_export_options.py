@@ -0,0 +1,15 @@
+# tests/test_export_options.py
+
+from utils.export_options import RenderOptions
+
+
+def test_renderer_settings_come_from_the_profile():
+    draft = RenderOptions(profile='draft').export_profile()
+    assert (draft.text_mode, draft.outline_mode, draft.template_form) == ('vector', 'vector', True)
+    default = RenderOptions().export_profile()
+    assert (default.text_mode, default.outline_mode, default.template_form) == ('raster', 'raster', False)
+
+
+def test_render_options_override_the_profile():
+    profile = RenderOptions(profile='draft', outline_mode='raster', template_form=False).export_profile()
+    assert (profile.outline_mode, profile.template_form) == ('raster', False)
@@ -0,0 +1,51 @@
+# tests/test_imposition.py
+
+from itertools import combinations
+
+import pytest
+
+from utils.imposition import plan_imposition
+
+LETTER = (612.0, 792.0)
+CARD = (180.0, 252.0)   # 2.5x3.5"
+TOKEN = (72.0, 72.0)    # 1x1"
+
+
+def _assert_no_overlaps(plan):
+    for a, b in combinations(plan.slots, 2):
+        assert (a.x + a.width <= b.x + 1e-6 or b.x + b.width <= a.x + 1e-6 or
+                a.y + a.height <= b.y + 1e-6 or b.y + b.height <= a.y + 1e-6), (a, b)
+    for slot in plan.slots:
+        assert slot.x >= plan.margin - 1e-6 and slot.x + slot.width <= plan.page_size[0] - plan.margin + 1e-6
+        assert slot.y >= plan.margin - 1e-6 and slot.y + slot.height <= plan.page_size[1] - plan.margin + 1e-6
+
+
+def test_nine_up_cards():
+    plan = plan_imposition(LETTER, [CARD], rotation='never')
+    assert plan.per_page == 9
+    assert plan.component_size == CARD
+    _assert_no_overlaps(plan)
+
+
+def test_mixed_sizes_share_a_page():
+    plan = plan_imposition(LETTER, [CARD, TOKEN], 18, 9, rotation='auto', counts=[6, None])
+    cards, tokens = plan.slots_for(0), plan.slots_for(1)
+    assert len(cards) == 6
+    assert len(tokens) > 0
+    assert {(slot.width, slot.height) for slot in cards} <= {CARD, CARD[::-1]}
+    assert all((slot.width, slot.height) == TOKEN for slot in tokens)
+    assert plan.per_page == len(cards) + len(tokens)
+    _assert_no_overlaps(plan)
+
+
+def test_smaller_kinds_fill_the_space_left():
+    # Listed smallest first: the cards are still placed first, the tokens go around them
+    plan = plan_imposition(LETTER, [TOKEN, CARD], rotation='never', counts=[None, 6])
+    assert len(plan.slots_for(1)) == 6
+    assert len(plan.slots_for(0)) >= 30
+    _assert_no_overlaps(plan)
+
+
+def test_component_too_large_for_the_page():
+    with pytest.raises(ValueError):
+        plan_imposition(LETTER, [CARD, (900.0, 900.0)])
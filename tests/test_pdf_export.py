@@ -0,0 +1,71 @@
+# tests/test_pdf_export.py
+
+import json
+import random
+import re
+
+import pytest
+
+pytest.importorskip("reportlab")
+from PIL import Image, ImageDraw
+
+from utils.pdf_export import ImageRegistry
+
+
+def _photo(size=(180, 252)):
+    """Continuous-tone noise standing in for a photograph."""
+    rng = random.Random(7)
+    img = Image.new('RGB', size)
+    img.putdata([(rng.randrange(256), rng.randrange(256), rng.randrange(256)) for _ in range(size[0] * size[1])])
+    return img
+
+
+def _line_art(size=(180, 252)):
+    img = Image.new('RGB', size, (250, 245, 230))
+    draw = ImageDraw.Draw(img)
+    draw.rectangle((10, 10, size[0] - 10, size[1] - 10), outline=(20, 20, 20), width=3)
+    draw.line((10, 60, size[0] - 10, 60), fill=(180, 30, 30), width=2)
+    return img
+
+
+def test_auto_codec_classifies_photos_and_line_art():
+    assert ImageRegistry.is_photographic(_photo())
+    assert not ImageRegistry.is_photographic(_line_art())
+    registry = ImageRegistry('auto')
+    assert registry.codec_for(_photo()) == 'jpeg'
+    assert registry.codec_for(_line_art()) == 'flate'
+
+
+def _image_filters(path):
+    """The /Filter of every image XObject in the PDF."""
+    with open(path, 'rb') as f:
+        data = f.read()
+    return [m.group(1) for m in re.finditer(rb'/Subtype\s*/Image\b[^>]*?/Filter\s*\[?\s*/(\w+)', data)] + \
+           [m.group(1) for m in re.finditer(rb'/Filter\s*\[?\s*/(\w+)[^>]*?/Subtype\s*/Image\b', data)]
+
+
+def test_mixed_sheet_keeps_line_art_cards_on_flate(tmp_path):
+    from exporter import PdfExporter, load_template
+    from utils.export_options import PageLayout, RenderOptions, CacheOptions
+    from utils.font_manager import FontManager
+
+    _photo().save(tmp_path / 'photo.png')
+    _line_art().save(tmp_path / 'art.png')
+    template = {'layers': [{'name': 'Background', 'shapes': {
+        '0': {'sid': 0, 'shape_type': 'rectangle', 'coords': [0, 0, 180, 252], 'name': '@art',
+              'container_type': 'Image', 'color': 'black', 'line_width': 1, 'path': ''},
+    }}]}
+    template_path = tmp_path / 'template.json'
+    template_path.write_text(json.dumps(template))
+
+    font_manager = FontManager(use_tk=False)
+    exporter = PdfExporter(load_template(str(template_path), font_manager), font_manager)
+    # One photo card among eight line-art cards on a 9-up sheet
+    records = [{'@art': str(tmp_path / 'photo.png')}] + [{'@art': str(tmp_path / 'art.png')}] * 8
+    out = str(tmp_path / 'mixed.pdf')
+    exporter.export_to_pdf(out, records=iter(records), layout=PageLayout(use_card=True, cards_per_page=9),
+                           render=RenderOptions(image_codec='auto'), cache=CacheOptions(use_cache=False))
+
+    filters = _image_filters(out)
+    assert filters.count(b'DCTDecode') == 1
+    assert filters.count(b'FlateDecode') == 1 # The eight identical line-art cards, embedded once
@@ -0,0 +1,89 @@
+# tests/test_pdf_merge.py
+
+import re
+
+import pytest
+
+pytest.importorskip("reportlab")
+pypdf = pytest.importorskip("pypdf")
+from PIL import Image
+from reportlab.pdfgen import canvas as pdf_canvas
+from reportlab.lib.pagesizes import LETTER
+
+from utils.pdf_merge import merge_pdfs, PdfShardReader
+
+
+def _write_shard(path, first_page, pages, back):
+    """A shard like PdfExporter writes: numbered pages, each with the same back image and font."""
+    pdf = pdf_canvas.Canvas(str(path), pagesize=LETTER)
+    for number in range(first_page, first_page + pages):
+        pdf.drawImage(back, 72, 72, 144, 144)
+        pdf.setFont('Helvetica', 24)
+        pdf.drawString(72, 600, f"Page {number}")
+        pdf.showPage()
+    pdf.save()
+    return str(path)
+
+
+@pytest.fixture
+def shards(tmp_path):
+    back = pdf_canvas.ImageReader(Image.new('RGB', (32, 32), (200, 30, 30)))
+    return [_write_shard(tmp_path / 'part-0.pdf', 1, 3, back),
+            _write_shard(tmp_path / 'part-1.pdf', 4, 2, back),
+            _write_shard(tmp_path / 'part-2.pdf', 6, 3, back)]
+
+
+def _image_objects(path):
+    with open(path, 'rb') as f:
+        return len(re.findall(rb'/Subtype\s*/Image\b', f.read()))
+
+
+def test_merge_keeps_page_count_and_order(shards, tmp_path):
+    out = str(tmp_path / 'merged.pdf')
+    assert merge_pdfs(shards, out) == 8
+
+    reader = pypdf.PdfReader(out, strict=True)
+    assert len(reader.pages) == 8
+    texts = [page.extract_text() for page in reader.pages]
+    assert [int(re.search(r'Page (\d+)', text).group(1)) for text in texts] == list(range(1, 9))
+
+
+def test_merge_writes_shared_objects_once(shards, tmp_path):
+    out = str(tmp_path / 'merged.pdf')
+    merge_pdfs(shards, out)
+
+    # Every shard embeds the back image; the merged file holds it once
+    assert sum(_image_objects(path) for path in shards) == 3
+    assert _image_objects(out) == 1
+    reader = pypdf.PdfReader(out, strict=True)
+    images = set()
+    for page in reader.pages:
+        xobjects = page['/Resources']['/XObject']
+        images.update(xobjects.raw_get(name).idnum for name in xobjects)
+    assert len(images) == 1
+
+
+def test_merged_file_reads_back_as_a_shard(shards, tmp_path):
+    out = str(tmp_path / 'merged.pdf')
+    merge_pdfs(shards, out)
+    assert len(PdfShardReader(out).page_numbers()) == 8
+
+
+def test_sharded_export_matches_single_process_pages(tmp_path):
+    from exporter import PdfExporter, load_template
+    from utils.export_options import PageLayout, RenderOptions, CacheOptions, RunOptions
+    from utils.font_manager import FontManager
+
+    font_manager = FontManager(use_tk=False)
+    exporter = PdfExporter(load_template(None, font_manager), font_manager)
+    records = [{'@name': f"Card {i}"} for i in range(20)]
+    options = dict(layout=PageLayout(use_card=True, cards_per_page=9),
+                   render=RenderOptions(profile='draft', template_form=True), cache=CacheOptions(use_cache=False))
+    single, sharded = str(tmp_path / 'single.pdf'), str(tmp_path / 'sharded.pdf')
+    exporter.export_to_pdf(single, records=iter(records), **options)
+    exporter.export_to_pdf(sharded, records=iter(records), run=RunOptions(shard_workers=2, shard_pages=1), **options)
+
+    assert len(pypdf.PdfReader(sharded, strict=True).pages) == len(pypdf.PdfReader(single).pages) == 3
+    # The template form every shard defines is written once
+    with open(sharded, 'rb') as f:
+        assert len(re.findall(rb'/Subtype\s*/Form\b', f.read())) == 1
@@ -0,0 +1,44 @@
+# tests/test_tiling.py
+
+import pytest
+
+pytest.importorskip("reportlab")
+pypdf = pytest.importorskip("pypdf")
+
+from utils.card_renderer import CardRenderer
+
+
+def test_copies_of_a_tiled_component_reuse_its_tiles(tmp_path, monkeypatch):
+    from exporter import PdfExporter, load_template
+    from utils.export_options import PageLayout, RenderOptions, CacheOptions
+    from utils.font_manager import FontManager
+
+    rendered = []
+    render_tile = CardRenderer.render_tile
+    monkeypatch.setattr(CardRenderer, 'render_tile',
+                        lambda self, box: rendered.append(box) or render_tile(self, box))
+
+    font_manager = FontManager(use_tk=False)
+    exporter = PdfExporter(load_template(None, font_manager), font_manager)
+    out = str(tmp_path / 'board.pdf')
+    # A 12x16" board on letter pages, printed three times
+    exporter.export_to_pdf(out, records=iter([{'@name': 'Board', '@qty': 3}]),
+                           layout=PageLayout(custom_size=(12, 16), tile=True),
+                           render=RenderOptions(profile='draft'), cache=CacheOptions(use_cache=False))
+
+    pages = len(pypdf.PdfReader(out).pages)
+    assert pages % 3 == 0 and pages > 3
+    assert len(rendered) == pages // 3
+
+
+def test_tiled_export_prints_no_pipeline_report(tmp_path, capsys):
+    from exporter import PdfExporter, load_template
+    from utils.export_options import PageLayout, RenderOptions, CacheOptions
+    from utils.font_manager import FontManager
+
+    font_manager = FontManager(use_tk=False)
+    exporter = PdfExporter(load_template(None, font_manager), font_manager)
+    exporter.export_to_pdf(str(tmp_path / 'board.pdf'), layout=PageLayout(custom_size=(12, 16), tile=True),
+                           render=RenderOptions(profile='draft'), cache=CacheOptions(use_cache=False))
+    # Tiles are written on the calling thread; there are no pipeline stages to report on
+    assert 'ExportPipeline' not in capsys.readouterr().out
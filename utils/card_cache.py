@@ -0,0 +1,227 @@
+# utils/card_cache.py
+
+import hashlib
+import io
+import json
+import os
+import tempfile
+import zipfile
+from collections import OrderedDict
+from typing import List, Dict, Optional, Any, Tuple, Iterable
+
+from PIL import Image
+
+from utils.record_source import QUANTITY_COLUMNS
+
+# Bump when the renderer's output changes for the same inputs, so stale entries stop matching
+CACHE_FORMAT_VERSION = 1
+DEFAULT_CACHE_MAX_MB = 1024
+# Rasters kept in memory for reuse by duplicate rows within one export
+DEFAULT_RECENT_MAX_MB = 256
+
+
+def default_cache_dir() -> str:
+    """~/.cache/prototy/cards (or under $XDG_CACHE_HOME when it is set)."""
+    base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'prototy', 'cards')
+
+
+def file_stamp(path: Optional[str]) -> Optional[Tuple[str, int, int]]:
+    """(absolute path, mtime in ns, size) of a file the render reads, or None if it does not exist."""
+    if not path or not isinstance(path, str):
+        return None
+    full_path = os.path.abspath(path)
+    try:
+        st = os.stat(full_path)
+    except OSError:
+        return None
+    return full_path, st.st_mtime_ns, st.st_size
+
+
+def _digest(payload: Any) -> str:
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+
+def template_fingerprint(model_data: Dict[str, Any], layers: List[Any], font_manager,
+                         settings: Dict[str, Any]) -> str:
+    """
+    Hash of everything a rendered card depends on apart from its row: the template
+    (DrawingModel.to_dict()), the font files its Text containers resolve to, the image files
+    the template itself references, and the render settings (DPI, output size, modes...).
+    """
+    fonts = set()
+    assets = set()
+    for layer in layers:
+        for shape in layer.shapes.values():
+            if shape.container_type == 'Text' and font_manager is not None:
+                fonts.add(file_stamp(font_manager.get_font_filepath(shape.font_name, shape.font_weight, shape.font_slant)))
+            elif shape.container_type == 'Image' and shape.path:
+                assets.add((shape.path, file_stamp(shape.path)))
+    return _digest({
+        'version': CACHE_FORMAT_VERSION,
+        'model': model_data,
+        'fonts': sorted(fonts, key=str),
+        'assets': sorted(assets, key=str),
+        'settings': settings,
+    })
+
+
+class CardCache:
+    """
+    On-disk, content-addressed store of rendered cards (full cards or render_dynamic_parts() lists).
+
+    An entry's key hashes the template fingerprint, the row's values and the mtime/size of any
+    image file the row points an Image container at, so editing the template, a font, an asset
+    or a row only misses the cards it affects. Entries are small zip files of PNGs written
+    atomically, so several worker processes can share one directory. Reads refresh an entry's
+    mtime and trim() evicts the least recently used entries once the directory exceeds max_bytes.
+    """
+
+    def __init__(self, cache_dir: str, template_key: str, image_columns: Iterable[str] = (),
+                 max_bytes: int = DEFAULT_CACHE_MAX_MB * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.template_key = template_key
+        self.image_columns = sorted(set(image_columns))
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def key_for(self, row_data: Dict[str, Any]) -> str:
+        assets = {col: file_stamp(row_data.get(col)) for col in self.image_columns if col in row_data}
+        # Changing how many copies to print does not change the card
+        values = {col: val for col, val in row_data.items() if col not in QUANTITY_COLUMNS}
+        return _digest({'template': self.template_key, 'row': values, 'assets': assets})
+
+    def _path_for(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], key + '.zip')
+
+    def get(self, key: str) -> Optional[Any]:
+        """The cached card for key (an Image, or a list of (Image, (x, y)) parts), or None on a miss."""
+        path = self._path_for(key)
+        try:
+            with zipfile.ZipFile(path) as archive:
+                index = json.loads(archive.read('index.json'))
+                images = []
+                for i in range(len(index['positions'])):
+                    img = Image.open(io.BytesIO(archive.read(f'{i}.png')))
+                    img.load()
+                    images.append(img)
+            os.utime(path) # LRU: a hit counts as a use
+        except (OSError, KeyError, ValueError, zipfile.BadZipFile):
+            self.misses += 1
+            return None
+        self.hits += 1
+        if index['kind'] == 'card':
+            return images[0]
+        return [(img, tuple(pos)) for img, pos in zip(images, index['positions'])]
+
+    def put(self, key: str, card: Any):
+        """Stores a rendered card (Image) or dynamic parts list under key."""
+        if isinstance(card, Image.Image):
+            kind, entries = 'card', [(card, None)]
+        else:
+            kind, entries = 'parts', list(card)
+        path = self._path_for(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as fh, zipfile.ZipFile(fh, 'w', zipfile.ZIP_STORED) as archive:
+                for i, (img, _) in enumerate(entries):
+                    buf = io.BytesIO()
+                    img.save(buf, 'PNG', compress_level=1)
+                    archive.writestr(f'{i}.png', buf.getvalue())
+                archive.writestr('index.json', json.dumps({'kind': kind, 'positions': [pos for _, pos in entries]}))
+            os.replace(tmp_path, path) # Readers only ever see complete entries
+        except OSError as e:
+            print(f"CardCache: Could not write {path}: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def trim(self) -> int:
+        """Evicts least recently used entries until the cache fits max_bytes; returns the bytes removed."""
+        entries = []
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if name.endswith('.zip'):
+                    path = os.path.join(root, name)
+                    try:
+                        st = os.stat(path)
+                    except OSError:
+                        continue
+                    entries.append((st.st_mtime_ns, st.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, path in sorted(entries):
+            if total - removed <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                removed += size
+            except OSError:
+                pass
+        return removed
+
+    def summary(self) -> str:
+        return f"CardCache: {self.hits} hits, {self.misses} misses in {self.cache_dir}."
+
+
+def card_nbytes(card: Any) -> int:
+    """Approximate memory held by a rendered card (an Image or a list of (Image, (x, y)) parts)."""
+    if isinstance(card, Image.Image):
+        return card.width * card.height * len(card.getbands())
+    return sum(img.width * img.height * len(img.getbands()) for img, _ in card or [])
+
+
+class RecentCards:
+    """
+    In-memory LRU of the cards rendered so far in one export, keyed by row_fingerprint()
+    (see utils/card_renderer.py), so duplicate rows reuse the raster instead of rendering again.
+    Bounded by max_bytes of pixel data; the ImageRegistry then embeds the shared raster once.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_RECENT_MAX_MB * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._cards: 'OrderedDict[str, Tuple[Any, int]]' = OrderedDict()
+        self._bytes = 0
+        self.reused = 0
+        self.rendered = 0
+
+    def get(self, fingerprint: str) -> Optional[Any]:
+        entry = self._cards.get(fingerprint)
+        if entry is None:
+            return None
+        self._cards.move_to_end(fingerprint)
+        self.reused += 1
+        return entry[0]
+
+    def put(self, fingerprint: str, card: Any):
+        self.rendered += 1
+        size = card_nbytes(card)
+        if size > self.max_bytes or fingerprint in self._cards:
+            return
+        self._cards[fingerprint] = (card, size)
+        self._bytes += size
+        while self._bytes > self.max_bytes:
+            _, (_, evicted_size) = self._cards.popitem(last=False)
+            self._bytes -= evicted_size
+
+    def summary(self) -> str:
+        return f"RecentCards: {self.rendered} unique cards rendered, {self.reused} duplicates reused."
+
+
+def render_cached(renderer, cache: Optional[CardCache], row_data: Dict[str, Any],
+                  target_size_points: Tuple[float, float], dynamic_only: bool = False) -> Any:
+    """Renders one card through renderer (see CardRenderer), reusing and filling cache when given."""
+    key = cache.key_for(row_data) if cache else None
+    if key:
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+    if dynamic_only:
+        card = renderer.render_dynamic_parts(row_data)
+    else:
+        card = renderer.render_merged_card(row_data, target_size_points)
+    if key:
+        cache.put(key, card)
+    return card
@@ -0,0 +1,556 @@
+# utils/card_renderer.py
+
+import hashlib
+import json
+import math
+import os
+import threading
+from collections import OrderedDict
+from typing import List, Dict, Optional, Any, Tuple, Iterable, Callable
+
+from PIL import Image, ImageDraw
+
+from utils.geometry import get_layers_bounds, vector_text_shapes
+
+# Fitted Image container pictures kept in memory by an ImageCache
+DEFAULT_IMAGE_CACHE_MB = 256
+
+
+def rotate_image_90_clockwise(img: Image.Image) -> Image.Image:
+    """Rotates a rendered card a quarter turn clockwise (used by the 8-up layout)."""
+    return img.transpose(Image.Transpose.ROTATE_270)
+
+
+def output_size_for(size_points: Tuple[float, float], render_dpi: int = 300) -> Tuple[int, int]:
+    """Pixel size of a cell of size_points at render_dpi, rounded the way the export sizes its cells."""
+    width_points, height_points = size_points
+    return (max(1, int(round(width_points * render_dpi / 72.0))),
+            max(1, int(round(height_points * render_dpi / 72.0))))
+
+
+def bound_columns_for(layers: List[Any], columns: Iterable[Any]) -> List[str]:
+    """The columns that some shape is named after, i.e. the only row values that change a rendered card."""
+    shape_names = {shape.name for layer in layers for shape in layer.shapes.values()}
+    return [str(c) for c in columns if str(c) in shape_names]
+
+
+def row_fingerprint(row_data: Dict[str, Any], bound_columns: Iterable[str]) -> str:
+    """Hash of a row's bound values; two rows with the same fingerprint render the same card."""
+    bound = {col: row_data.get(col) for col in bound_columns}
+    return hashlib.sha1(json.dumps(bound, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+
+class ImageCache:
+    """
+    Image container pictures decoded and fitted at their paste size, keyed by
+    CardRenderer._image_key(). One instance may be shared by several renderers (the jobs of a
+    batch export), so art used by several decks is decoded once per process. Thread-safe and
+    bounded to max_bytes of pixels; the least recently used pictures are dropped first.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_IMAGE_CACHE_MB * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._images: 'OrderedDict[Tuple[Any, ...], Tuple[Optional[Image.Image], int]]' = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_load(self, key: Tuple[Any, ...], load: Callable[[], Optional[Image.Image]]) -> Optional[Image.Image]:
+        """The cached picture for key, or load()'s result (cached too, None included for missing files)."""
+        with self._lock:
+            entry = self._images.get(key)
+            if entry is not None:
+                self._images.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+        # Decoded outside the lock, so renderers on other threads are not held up
+        img = load()
+        size = img.width * img.height * len(img.getbands()) if img is not None else 0
+        with self._lock:
+            self.misses += 1
+            if size <= self.max_bytes and key not in self._images:
+                self._images[key] = (img, size)
+                self._bytes += size
+                while self._bytes > self.max_bytes:
+                    _, (_, evicted_size) = self._images.popitem(last=False)
+                    self._bytes -= evicted_size
+        return img
+
+
+class CardRenderer:
+    """
+    Renders merged cards from a list of layers without touching Tkinter.
+
+    DrawingView uses this for in-process export, and the process pool workers in
+    utils/parallel_render.py each hold their own instance built from the model's to_dict() output.
+    """
+
+    def __init__(self, layers: List[Any], render_dpi: int = 300,
+                 model_bounds: Optional[Tuple[float, float, float, float]] = None,
+                 vector_text: bool = False, vector_outlines: bool = False,
+                 output_size: Optional[Tuple[int, int]] = None,
+                 image_cache: Optional[ImageCache] = None):
+        self.layers = layers
+        self.render_dpi = render_dpi
+        # When True, Text containers whose font ReportLab can embed (and that nothing rasterized
+        # is stacked over, see vector_text_shapes) are left out of the raster;
+        # utils/pdf_export.VectorCardWriter draws them as PDF text instead.
+        self.vector_text = vector_text
+        # When True, shape borders are left out of the raster and stroked as PDF paths instead.
+        self.vector_outlines = vector_outlines
+        self._vector_text_shapes = vector_text_shapes(layers, vector_outlines) if vector_text else set()
+        self.model_bounds = model_bounds or get_layers_bounds(layers)
+
+        # The one model-to-pixel transform used for every shape. With output_size the card is
+        # rasterized straight at its final pixel size (no resampling afterwards); without it,
+        # at render_dpi over the model bounds.
+        min_x, min_y, max_x, max_y = self.model_bounds
+        width_72dpi = max(1, int(round(max_x - min_x)))
+        height_72dpi = max(1, int(round(max_y - min_y)))
+        if output_size:
+            self.canvas_size = (max(1, int(output_size[0])), max(1, int(output_size[1])))
+        else:
+            self.canvas_size = (max(1, int(round(width_72dpi * render_dpi / 72.0))),
+                                max(1, int(round(height_72dpi * render_dpi / 72.0))))
+        self.scale = (self.canvas_size[0] / width_72dpi, self.canvas_size[1] / height_72dpi)
+        # Text is laid out at a single DPI; the smaller axis keeps it inside its box when the
+        # output stretches the card unevenly.
+        self.text_dpi = 72.0 * min(self.scale)
+
+        # Image container content at paste size (pass a shared ImageCache to reuse it across renderers)
+        self._image_cache = image_cache if image_cache is not None else ImageCache()
+
+        # Filled in by prepare_template(); until then every card is drawn from scratch.
+        self.template_columns: set = set()
+        self._template_background: Optional[Image.Image] = None
+        self._template_segments: List[Tuple[Any, bool, Any]] = []
+        # Filled in by prepare_tiles(): Text containers are then only laid out (layout_pil_text),
+        # and render_tile() draws the part of each layout a tile shows
+        self._tiled = False
+        self._text_layouts: Dict[int, Optional[Dict[str, Any]]] = {}
+
+    def merge_row(self, row_data: Dict[str, Any]):
+        """Pushes a CSV row into the shapes named after its columns ('@<field>')."""
+        for key, val in row_data.items():
+            shape_name = str(key)
+            for layer in self.layers:
+                for shape in layer.shapes.values():
+                    if shape.name == shape_name:
+                        if shape.container_type == 'Text':
+                            shape.text = str(val)
+                            if self._is_vector_text(shape):
+                                continue
+                            if self._tiled:
+                                self._text_layouts[id(shape)] = shape.layout_pil_text(self.text_dpi)
+                                continue
+                            # Render straight at the output resolution for high-resolution PIL text rendering
+                            shape._draw_text_content(draw_pil=True, render_dpi=self.text_dpi)
+                        elif shape.container_type == 'Image':
+                            # The picture itself is decoded at paste size by _image_content()
+                            shape.path = str(val).strip()
+
+    def _is_vector_text(self, shape) -> bool:
+        return shape in self._vector_text_shapes
+
+    def prepare_template(self, columns: Iterable[Any]):
+        """
+        Splits the template into merge-bound shapes (named after one of `columns`) and static shapes,
+        then rasterizes the static shapes once at the output resolution.
+
+        Static shapes drawn before the first merge-bound shape go straight into the background.
+        Static shapes stacked above a merge-bound shape keep their place in the stacking order:
+        their content is sized once and only pasted (and outlined) per card.
+        """
+        self.template_columns = {str(c) for c in columns}
+        min_x, min_y, _, _ = self.model_bounds
+        scale = self.scale
+
+        background = self._new_canvas((255, 255, 255, 255))
+        background_draw = ImageDraw.Draw(background)
+        segments: List[Tuple[Any, bool, Any]] = []
+        static_count = bound_count = 0
+
+        for layer in self.layers:
+            for sid in sorted(layer.shapes.keys()):
+                shape = layer.shapes[sid]
+                if shape.name in self.template_columns:
+                    bound_count += 1
+                    segments.append((shape, True, None))
+                    continue
+
+                static_count += 1
+                if shape.container_type == 'Text' and not self._is_vector_text(shape):
+                    # Static text may have been rendered for the screen/another DPI; lay it out for this output
+                    shape._draw_text_content(draw_pil=True, render_dpi=self.text_dpi)
+                if not segments:
+                    self._draw_shape(background, background_draw, shape, min_x, min_y, scale)
+                else:
+                    segments.append((shape, False, self._content_patch(shape, min_x, min_y, scale)))
+
+        self._template_background = background
+        self._template_segments = segments
+        print(f"CardRenderer.prepare_template: Cached {static_count} static shapes; {bound_count} merge-bound shapes drawn per card.")
+
+    def _new_canvas(self, fill: Tuple[int, int, int, int]) -> Image.Image:
+        """Allocates an RGBA canvas covering the model bounds at the output resolution."""
+        return Image.new("RGBA", self.canvas_size, fill)
+
+    def _uses_template_cache(self, row_data: Dict[str, Any]) -> bool:
+        """The cached background is only valid if the row binds nothing outside the prepared columns."""
+        if self._template_background is None:
+            return False
+        return all(str(key) in self.template_columns for key in row_data.keys())
+
+    def flatten_card(self, row_data: Dict[str, Any]) -> Image.Image:
+        """
+        Renders the full card into a high-resolution image (flattened) of canvas_size.
+        Merges CSV data by matching each row field to shapes named '@<field>'.
+        Draws all shapes (text and images) into a single RGBA image, each at its final pixel size.
+        Adjusts for shape.line_width to inset content and avoid border clipping.
+        When prepare_template() has run, only the merge-bound shapes are drawn over the cached static layers.
+        """
+        print("\nCardRenderer.flatten_card: Starting flattening process.")
+        min_x, min_y, _, _ = self.model_bounds
+        scale = self.scale
+
+        self.merge_row(row_data)
+
+        if self._uses_template_cache(row_data):
+            canvas = self._template_background.copy()
+            self._draw_segments(canvas, min_x, min_y, scale)
+            print("CardRenderer.flatten_card: Finished flattening (static layers from cache).")
+            return canvas
+
+        # Create the base canvas for the card at high resolution.
+        canvas = self._new_canvas((255, 255, 255, 255))
+        draw = ImageDraw.Draw(canvas) # Get a draw context for drawing outlines later
+
+        # Draw each shape into the canvas
+        for layer in self.layers:
+            print(f"CardRenderer.flatten_card: Layer '{layer.name}'")
+            for sid in sorted(layer.shapes.keys()):
+                shape = layer.shapes[sid]
+                if shape.container_type == 'Text' and shape.name not in row_data and not self._is_vector_text(shape):
+                    # Static text is laid out for this output (merge_row did the bound ones)
+                    shape._draw_text_content(draw_pil=True, render_dpi=self.text_dpi)
+                self._draw_shape(canvas, draw, shape, min_x, min_y, scale)
+
+        print("CardRenderer.flatten_card: Finished flattening.")
+        return canvas
+
+    def static_layer(self) -> Optional[Image.Image]:
+        """The cached background (static shapes below the first merge-bound shape), or None before prepare_template()."""
+        return self._template_background
+
+    def render_dynamic_parts(self, row_data: Dict[str, Any]) -> List[Tuple[Image.Image, Tuple[int, int]]]:
+        """
+        Renders only what changes per card: the merge-bound shapes and the static shapes stacked
+        above them, as a list of (image, (x, y)) patches at the output resolution in stacking order.
+        Each merge-bound Image container's content is its own patch, so repeated pictures
+        (icons, portraits) come out pixel-identical across cards; everything between them is
+        composited into transparent patches cropped to what they cover. Drawn in order over
+        static_layer() they give the same card as flatten_card().
+        """
+        if not self._uses_template_cache(row_data):
+            raise ValueError("CardRenderer.render_dynamic_parts: prepare_template() must cover every column of the row.")
+        min_x, min_y, _, _ = self.model_bounds
+        scale = self.scale
+        self.merge_row(row_data)
+
+        parts: List[Tuple[Image.Image, Tuple[int, int]]] = []
+        run = self._new_canvas((255, 255, 255, 0))
+        draw = ImageDraw.Draw(run)
+
+        def flush_run():
+            coverage = run.getchannel('A').getbbox()
+            if coverage:
+                parts.append((run.crop(coverage), (coverage[0], coverage[1])))
+
+        for shape, is_bound, static_patch in self._template_segments:
+            patch = self._content_patch(shape, min_x, min_y, scale) if is_bound else static_patch
+            if is_bound and patch is not None and shape.container_type == 'Image':
+                flush_run()
+                parts.append(patch)
+                run = self._new_canvas((255, 255, 255, 0))
+                draw = ImageDraw.Draw(run)
+            elif patch is not None:
+                self._paste_patch(run, patch, transparent=True)
+            self._draw_outline(draw, shape, min_x, min_y, scale)
+        flush_run()
+        return parts
+
+    def prepare_tiles(self):
+        """
+        Lays every Text container out at the output DPI (word wrap and line positions only, no
+        pixels) and switches merge_row() to doing the same, so render_tile() can draw just the
+        lines a tile shows. Nothing the size of the whole component is rasterized.
+        """
+        self._tiled = True
+        for layer in self.layers:
+            for shape in layer.shapes.values():
+                if shape.container_type == 'Text' and not self._is_vector_text(shape):
+                    self._text_layouts[id(shape)] = shape.layout_pil_text(self.text_dpi)
+
+    def render_tile(self, tile: Tuple[int, int, int, int]) -> Image.Image:
+        """
+        Renders only the pixels tile = (x0, y0, x1, y1) of the component (in canvas_size pixels)
+        of the row last given to merge_row() (call it once per row, before its tiles): the same
+        pixels flatten_card(row_data).crop(tile) would give, but memory stays bounded by the tile.
+        Image containers resample just the part of their picture the tile shows (the decoded file
+        is cached between tiles); text draws only the lines of its layout (see prepare_tiles) that
+        cross the tile. Used for components larger than a page.
+        """
+        tx0, ty0, tx1, ty1 = tile
+        min_x, min_y, _, _ = self.model_bounds
+        scale = self.scale
+
+        canvas = Image.new("RGBA", (tx1 - tx0, ty1 - ty0), (255, 255, 255, 255))
+        draw = ImageDraw.Draw(canvas)
+        for layer in self.layers:
+            for sid in sorted(layer.shapes.keys()):
+                shape = layer.shapes[sid]
+                patch = self._tile_patch(shape, tile, min_x, min_y, scale)
+                if patch is not None:
+                    self._paste_patch(canvas, patch)
+                self._draw_outline(draw, shape, min_x, min_y, scale, offset=(tx0, ty0))
+        return canvas
+
+    def _tile_patch(self, shape, tile: Tuple[int, int, int, int], min_x: float, min_y: float,
+                    scale: Tuple[float, float]) -> Optional[Tuple[Image.Image, Tuple[int, int]]]:
+        """The part of a shape's content inside tile, positioned relative to the tile, or None if none of it is."""
+        box = self._content_box(shape, min_x, min_y, scale)
+        if box is None:
+            return None
+        x, y, w, h = box
+        layout = None
+        if shape.container_type == 'Text':
+            layout = self._text_layouts.get(id(shape))
+            if layout is None or self._is_vector_text(shape):
+                return None
+            w, h = layout['size'] # Overflowing text is pasted beyond the box, as in flatten_card
+        tx0, ty0, tx1, ty1 = tile
+        left, top, right, bottom = max(x, tx0), max(y, ty0), min(x + w, tx1), min(y + h, ty1)
+        if left >= right or top >= bottom:
+            return None
+        region = (left - x, top - y, right - x, bottom - y)
+        if layout is not None:
+            img = shape.draw_text_region(layout, region)
+        elif shape.container_type == 'Image' and shape.path:
+            img = self._image_region(shape, (w, h), region)
+        else:
+            # In-memory content (an Image container without a path): resample just the region too
+            content = getattr(shape, 'content', None)
+            img = shape._fit_image(content, (w, h), region) if isinstance(content, Image.Image) else None
+        return (img, (left - tx0, top - ty0)) if img is not None else None
+
+    def _image_region(self, shape, size: Tuple[int, int], region: Tuple[int, int, int, int]) -> Optional[Image.Image]:
+        """
+        Only region (x0, y0, x1, y1) of an Image container's picture at paste size. The decoded file
+        is cached (every tile of the component needs it); the fitted regions are not.
+        """
+        path = shape.path
+        source = self._image_cache.get_or_load(self._image_key(shape, path, None), lambda: shape._open_image_file(path))
+        if source is None:
+            return None
+        return shape.clip_image_to_geometry(source, size=size, region=region)
+
+    def _draw_segments(self, canvas: Image.Image, min_x: float, min_y: float, scale: Tuple[float, float]):
+        """Draws the prepared segments (merge-bound shapes and the static shapes above them) onto canvas."""
+        draw = ImageDraw.Draw(canvas)
+        for shape, is_bound, static_patch in self._template_segments:
+            if is_bound:
+                self._draw_shape(canvas, draw, shape, min_x, min_y, scale)
+                continue
+            if static_patch is not None:
+                self._paste_patch(canvas, static_patch)
+            self._draw_outline(draw, shape, min_x, min_y, scale)
+
+    def _draw_shape(self, canvas: Image.Image, draw: ImageDraw.ImageDraw, shape,
+                    min_x: float, min_y: float, scale: Tuple[float, float]):
+        """Pastes one shape's content and draws its outline onto the high-resolution canvas."""
+        patch = self._content_patch(shape, min_x, min_y, scale)
+        if patch is not None:
+            self._paste_patch(canvas, patch)
+        self._draw_outline(draw, shape, min_x, min_y, scale)
+
+    @staticmethod
+    def _paste_patch(canvas: Image.Image, patch: Tuple[Image.Image, Tuple[int, int]], transparent: bool = False):
+        img, position = patch
+        if transparent:
+            # paste() with the image as its own mask squares the alpha channel; on a transparent
+            # canvas composite instead so soft edges keep their coverage. Patches can hang off the canvas.
+            x, y = position
+            left, top = max(0, -x), max(0, -y)
+            if left or top:
+                img = img.crop((left, top, img.width, img.height))
+            if img.width > 0 and img.height > 0 and x + left < canvas.width and y + top < canvas.height:
+                canvas.alpha_composite(img, (x + left, y + top))
+            return
+        canvas.paste(img, position, img)
+
+    def _content_patch(self, shape, min_x: float, min_y: float,
+                       scale: Tuple[float, float]) -> Optional[Tuple[Image.Image, Tuple[int, int]]]:
+        """
+        Returns the shape's content (text/image) sized for the high-resolution canvas,
+        together with its paste position, or None when the shape has nothing to paste.
+        """
+        sid = shape.sid
+        box = self._content_box(shape, min_x, min_y, scale)
+        if box is None:
+            return None
+        paste_x_hires, paste_y_hires, paste_width_hires, paste_height_hires = box
+
+        if shape.container_type == 'Image':
+            img = self._image_content(shape, (paste_width_hires, paste_height_hires))
+            return (img, (paste_x_hires, paste_y_hires)) if img is not None else None
+
+        content = getattr(shape, 'content', None)
+        if not isinstance(content, Image.Image) or self._is_vector_text(shape):
+            return None
+
+        img = content.convert('RGBA')
+
+        if shape.container_type == 'Text':
+            # For text, we assume _draw_text_content has already generated
+            # the image at the correct high-resolution dimensions.
+            # No resizing should occur here to prevent fuzziness.
+            if img.size != (paste_width_hires, paste_height_hires):
+                print(f"Warning: Text image size mismatch for shape {sid}. "
+                      f"Expected ({paste_width_hires}, {paste_height_hires}), got {img.size}. "
+                      f"This indicates an issue in _draw_text_content, but no resizing performed here.")
+            # img is used directly as generated by _draw_text_content
+        elif img.size != (paste_width_hires, paste_height_hires):
+            img = img.resize((paste_width_hires, paste_height_hires), Image.Resampling.LANCZOS)
+
+        return img, (paste_x_hires, paste_y_hires)
+
+    @staticmethod
+    def _content_box(shape, min_x: float, min_y: float,
+                     scale: Tuple[float, float]) -> Optional[Tuple[int, int, int, int]]:
+        """The (x, y, width, height) in canvas pixels that a shape's content is pasted into, inside its border."""
+        scale_x, scale_y = scale
+        # raw bbox in 72dpi coordinates
+        x0_72dpi, y0_72dpi, x1_72dpi, y1_72dpi = shape.get_bbox
+
+        # compute inset half border in 72dpi
+        inset_72dpi = (shape.line_width or 0)
+
+        # adjust bbox for content in 72dpi
+        adj_x0_72dpi = x0_72dpi + inset_72dpi
+        adj_y0_72dpi = y0_72dpi + inset_72dpi
+        adj_x1_72dpi = x1_72dpi - inset_72dpi
+        adj_y1_72dpi = y1_72dpi - inset_72dpi
+
+        # Convert adjusted bbox to high-resolution pixels for pasting
+        paste_x_hires = int(round((adj_x0_72dpi - min_x) * scale_x))
+        paste_y_hires = int(round((adj_y0_72dpi - min_y) * scale_y))
+        paste_width_hires = max(1, int(round((adj_x1_72dpi - adj_x0_72dpi) * scale_x)))
+        paste_height_hires = max(1, int(round((adj_y1_72dpi - adj_y0_72dpi) * scale_y)))
+
+        if paste_width_hires <= 0 or paste_height_hires <= 0:
+            return None
+        return paste_x_hires, paste_y_hires, paste_width_hires, paste_height_hires
+
+    def _image_content(self, shape, size: Tuple[int, int]) -> Optional[Image.Image]:
+        """
+        An Image container's picture decoded from shape.path and fitted/clipped once, directly
+        at its paste size. Shapes without a path fall back to their in-memory content.
+        """
+        if not shape.path:
+            content = getattr(shape, 'content', None)
+            if not isinstance(content, Image.Image):
+                return None
+            img = content.convert('RGBA')
+            return img if img.size == size else img.resize(size, Image.Resampling.LANCZOS)
+
+        key = self._image_key(shape, shape.path, size)
+        return self._image_cache.get_or_load(key, lambda: shape.render_image_content(size))
+
+    @staticmethod
+    def _image_key(shape, path: str, size: Tuple[int, int]) -> Tuple[Any, ...]:
+        """(path, file mtime and size, paste size, shape type, clip flag): changes to the file miss the cache."""
+        try:
+            st = os.stat(path)
+            stamp = (st.st_mtime_ns, st.st_size)
+        except OSError:
+            stamp = None
+        return (path, stamp, size, shape.shape_type, shape.clip_image)
+
+    def prefetch_images(self, row_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Decodes and fits the pictures row_data points merge-bound Image containers at, straight
+        into the image cache, without touching the shapes. Run ahead of rendering (see
+        utils/export_pipeline.py) so row N+k's files are loaded while row N is composited.
+        Returns row_data unchanged.
+        """
+        min_x, min_y, _, _ = self.model_bounds
+        for shape, is_bound, _ in self._template_segments:
+            if not is_bound or shape.container_type != 'Image' or shape.name not in row_data:
+                continue
+            path = str(row_data[shape.name]).strip()
+            box = self._content_box(shape, min_x, min_y, self.scale)
+            if not path or box is None:
+                continue
+            size = (box[2], box[3])
+            key = self._image_key(shape, path, size)
+            self._image_cache.get_or_load(key, lambda: shape.render_image_content(size, path=path))
+        return row_data
+
+    def _draw_outline(self, draw: ImageDraw.ImageDraw, shape,
+                      min_x: float, min_y: float, scale: Tuple[float, float],
+                      offset: Tuple[int, int] = (0, 0)):
+        """Draws the shape's border onto the high-resolution canvas (shifted by -offset pixels when drawing a tile)."""
+        if self.vector_outlines:
+            return
+        sid = shape.sid
+        scale_x, scale_y = scale
+        x0_72dpi, y0_72dpi, x1_72dpi, y1_72dpi = shape.get_bbox
+
+        # draw outline on original bbox (scaled to high-res canvas)
+        raw_px_hires = int(round((x0_72dpi - min_x) * scale_x)) - offset[0]
+        raw_py_hires = int(round((y0_72dpi - min_y) * scale_y)) - offset[1]
+        raw_w_hires  = int(round((x1_72dpi - x0_72dpi) * scale_x))
+        raw_h_hires  = int(round((y1_72dpi - y0_72dpi) * scale_y))
+
+        # Scale line width for drawing outline on high-res canvas
+        line_width_hires = max(1, int(round(shape.line_width * min(scale))))
+
+        if shape.line_width and shape.color:
+            coords_hires = [raw_px_hires, raw_py_hires, raw_px_hires + raw_w_hires, raw_py_hires + raw_h_hires]
+            try:
+                if shape.shape_type == 'rectangle':
+                    draw.rectangle(coords_hires, outline=shape.color, width=line_width_hires)
+                elif shape.shape_type == 'oval':
+                    draw.ellipse(coords_hires, outline=shape.color, width=line_width_hires)
+                elif shape.shape_type == 'triangle':
+                    cx_hires = (coords_hires[0] + coords_hires[2]) // 2
+                    pts_hires = [(coords_hires[0], coords_hires[3]), (cx_hires, coords_hires[1]), (coords_hires[2], coords_hires[3])]
+                    draw.polygon(pts_hires, outline=shape.color, width=line_width_hires)
+                elif shape.shape_type == 'hexagon':
+                    cx_hires = (coords_hires[0] + coords_hires[2]) / 2
+                    cy_hires = (coords_hires[1] + coords_hires[3]) / 2
+                    hw_hires = (coords_hires[2] - coords_hires[0]) / 2
+                    hh_hires = (coords_hires[3] - coords_hires[1]) / 2
+                    pts_hires = [
+                        (int(cx_hires + hw_hires * math.cos(math.radians(60 * i - 30))),
+                         int(cy_hires + hh_hires * math.sin(math.radians(60 * i - 30))))
+                        for i in range(6)
+                    ]
+                    draw.polygon(pts_hires, outline=shape.color, width=line_width_hires)
+            except Exception as e:
+                print(f"Outline error for shape {sid}: {e}")
+
+    def render_merged_card(self,
+                           row_data: Dict[str, Any],
+                           target_size_points: Tuple[float, float]) -> Image.Image:
+        """
+        Flattens the card for one row at the target size (in points) at render_dpi.
+        A renderer built with that output_size (see output_size_for) returns the flattened card
+        as-is; otherwise the card is resampled once to the target size.
+        """
+        flattened = self.flatten_card(row_data)
+        target_pixels = output_size_for(target_size_points, self.render_dpi)
+        if flattened.size == target_pixels:
+            return flattened
+        return flattened.resize(target_pixels, Image.Resampling.LANCZOS)
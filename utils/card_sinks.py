@@ -0,0 +1,57 @@
+# utils/card_sinks.py
+
+from abc import ABC, abstractmethod
+from typing import List, Dict, Any, Tuple, Iterable, Iterator
+
+from utils.record_source import quantity_of
+
+
+class CardSink(ABC):
+    """
+    An output that takes every rendered card of an export alongside (or instead of) the PDF
+    pages: deck sheets, per-card image files... The exporter renders each row once and hands
+    the raster to every sink (see fan_out), so adding an output never adds a render pass.
+
+    Subclasses must implement add_card, close and abort (abstract methods); card_pixels lets a sink that only needs
+    small rasters (deck sheets) keep a PDF-less export from rendering at print size, and a sink
+    with needs_raster = False (SVG, drawn from the row itself) gets None for the card, so an
+    export with only such sinks renders nothing at all.
+    Sinks are context managers: closed when the block succeeds, aborted when it raises.
+    """
+
+    needs_raster = True
+
+    def card_pixels(self, card_size: Tuple[int, int]) -> Tuple[int, int]:
+        """The raster size this sink needs for cards that would render at card_size pixels (default: all of it)."""
+        return card_size
+
+    @abstractmethod
+    def add_card(self, row: Dict[str, Any], card: Any, copies: int = 1):
+        """Takes one row's rendered card (an RGBA Image, or None for sinks that do not need it); copies is the row's quantity (at least 1)."""
+
+    @abstractmethod
+    def close(self) -> Any:
+        """Finishes the output once every card has been added."""
+
+    @abstractmethod
+    def abort(self):
+        """Drops unfinished output after a failed or cancelled export."""
+
+    def __enter__(self) -> 'CardSink':
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+        return False
+
+
+def fan_out(cards: Iterable[Tuple[Dict[str, Any], Any]], sinks: List[CardSink]) -> Iterator[Tuple[Dict[str, Any], Any]]:
+    """Passes (row, card) pairs through unchanged, handing each card to every sink first (one call per row, with its quantity)."""
+    for row, card in cards:
+        copies = quantity_of(row)
+        for sink in sinks:
+            sink.add_card(row, card, copies)
+        yield row, card
@@ -0,0 +1,175 @@
+# utils/deck_sheets.py
+
+import json
+import os
+import queue
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import List, Dict, Optional, Any, Tuple
+
+from PIL import Image
+
+from utils.card_sinks import CardSink
+from utils.pdf_export import atomic_output
+
+# Tabletop Simulator custom decks: up to 10x7 cards per sheet image, sheets at most 4096 px a side,
+# and the last slot of every sheet holds the face shown for hidden cards
+TTS_COLUMNS = 10
+TTS_ROWS = 7
+TTS_MAX_SHEET_PX = 4096
+HIDDEN_CARD_COLOR = (40, 40, 40)
+
+
+def sheet_card_size(card_size_points: Tuple[float, float], render_dpi: int, columns: int = TTS_COLUMNS,
+                    rows: int = TTS_ROWS, max_sheet_px: int = TTS_MAX_SHEET_PX) -> Tuple[int, int]:
+    """
+    Pixel size of one card on a sheet: the card at render_dpi, scaled down (keeping its aspect)
+    just enough that columns x rows of them fit within max_sheet_px in both directions.
+    """
+    width = card_size_points[0] * render_dpi / 72.0
+    height = card_size_points[1] * render_dpi / 72.0
+    factor = min(1.0, max_sheet_px / (columns * width), max_sheet_px / (rows * height))
+    return max(1, int(width * factor)), max(1, int(height * factor))
+
+
+class DeckSheetWriter(CardSink):
+    """
+    Assembles rendered cards into Tabletop Simulator deck sheets (export_path 'deck.png' gives
+    deck_01.png, deck_02.png, ... as PNG or, for .jpg/.jpeg, JPEG) plus deck.json describing the
+    sheets for the TTS custom deck dialog.
+
+    As a CardSink it can share another export's render pass: with no card_size the slot size is
+    taken from the first card (scaled down to fit max_sheet_px) and every card is resized to it.
+    Cards are pasted into preallocated sheet buffers that are reused from sheet to sheet; a full
+    sheet is encoded and written on a writer thread (Pillow releases the GIL while compressing)
+    while the next one is filled, so at most writers + 1 sheets are ever in memory.
+
+        with DeckSheetWriter('out/deck.png', (409, 572)) as writer:
+            for card in cards:
+                writer.add(card)
+    """
+
+    def __init__(self, export_path: str, card_size: Optional[Tuple[int, int]] = None, columns: int = TTS_COLUMNS,
+                 rows: int = TTS_ROWS, hidden_image: Optional[str] = None, jpeg_quality: int = 90, writers: int = 2,
+                 max_sheet_px: int = TTS_MAX_SHEET_PX):
+        self.stem, ext = os.path.splitext(export_path)
+        if ext.lower() not in ('', '.png', '.jpg', '.jpeg'):
+            raise ValueError(f"Deck sheets are written as .png or .jpg images, not {export_path}.")
+        self.ext = ext or '.png'
+        # Made up front, like CardImageWriter's directory, so a missing one never fails the export after rendering
+        os.makedirs(os.path.dirname(os.path.abspath(export_path)), exist_ok=True)
+        self.format = 'JPEG' if self.ext.lower() in ('.jpg', '.jpeg') else 'PNG'
+        self.columns = columns
+        self.rows = rows
+        self.max_sheet_px = max_sheet_px
+        self.cards_per_sheet = columns * rows - 1 # The last slot is the hidden card
+        self.jpeg_quality = jpeg_quality
+        self.hidden_image = hidden_image
+        self.writers = max(1, writers)
+        self.sheets: List[Dict[str, Any]] = []
+        self.card_size: Optional[Tuple[int, int]] = None
+        self._sheet: Optional[Image.Image] = None
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._pending: List[Future] = []
+        self._count = 0
+        if card_size:
+            self._allocate(card_size)
+
+    def _allocate(self, card_size: Tuple[int, int]):
+        """Fixes the slot size and sets up the sheet buffers and writer threads (on the first card when no size was given)."""
+        self.card_size = card_size
+        self.sheet_size = (self.columns * card_size[0], self.rows * card_size[1])
+        self.hidden_card = self._hidden_card(self.hidden_image)
+        self._free: 'queue.Queue[Image.Image]' = queue.Queue()
+        for _ in range(self.writers + 1):
+            self._free.put(Image.new('RGB', self.sheet_size, (255, 255, 255)))
+        self._pool = ThreadPoolExecutor(max_workers=self.writers, thread_name_prefix='deck-sheet')
+        print(f"DeckSheetWriter: {self.columns}x{self.rows} sheets of {self.sheet_size[0]}x{self.sheet_size[1]} px, "
+              f"cards {card_size[0]}x{card_size[1]} px, {self.format}.")
+
+    def card_pixels(self, card_size: Tuple[int, int]) -> Tuple[int, int]:
+        """Sheets only need cards at slot size: card_size scaled down to fit the sheet limit (fixes the slot size)."""
+        if self.card_size is None:
+            self._allocate(sheet_card_size(card_size, 72, self.columns, self.rows, self.max_sheet_px))
+        return self.card_size
+
+    def _hidden_card(self, path: Optional[str]) -> Image.Image:
+        """The hidden-card face at card size: the given picture, or a plain dark card."""
+        if path:
+            try:
+                with Image.open(path) as img:
+                    return img.convert('RGB').resize(self.card_size, Image.Resampling.LANCZOS)
+            except OSError as e:
+                print(f"DeckSheetWriter: Cannot read hidden card image {path}: {e}; using a plain card.")
+        return Image.new('RGB', self.card_size, HIDDEN_CARD_COLOR)
+
+    def _slot(self, index: int) -> Tuple[int, int]:
+        return (index % self.columns) * self.card_size[0], (index // self.columns) * self.card_size[1]
+
+    def add(self, card: Image.Image) -> Optional[str]:
+        """Places the next card; returns the sheet's path when this card completed a sheet (queued for writing)."""
+        if self.card_size is None:
+            self.card_pixels(card.size)
+        if self._sheet is None:
+            self._sheet = self._free.get() # Blocks while every buffer is still being written
+            self._sheet.paste((255, 255, 255), (0, 0) + self.sheet_size)
+        if card.size != self.card_size:
+            card = card.resize(self.card_size, Image.Resampling.LANCZOS)
+        position = self._slot(self._count)
+        if card.mode == 'RGBA':
+            self._sheet.paste(card, position, card)
+        else:
+            self._sheet.paste(card.convert('RGB'), position)
+        self._count += 1
+        return self._flush() if self._count == self.cards_per_sheet else None
+
+    def add_card(self, row: Dict[str, Any], card: Image.Image, copies: int = 1):
+        """CardSink entry point: places the row's card copies times."""
+        for _ in range(copies):
+            self.add(card)
+
+    def _flush(self) -> Optional[str]:
+        if self._sheet is None or not self._count:
+            return None
+        self._sheet.paste(self.hidden_card, self._slot(self.columns * self.rows - 1))
+        path = f"{self.stem}_{len(self.sheets) + 1:02d}{self.ext}"
+        self.sheets.append({'image': os.path.basename(path), 'columns': self.columns, 'rows': self.rows,
+                            'cards': self._count, 'hidden_slot': self.columns * self.rows})
+        self._pending.append(self._pool.submit(self._write, self._sheet, path))
+        self._sheet, self._count = None, 0
+        return path
+
+    def _write(self, sheet: Image.Image, path: str):
+        try:
+            with atomic_output(path) as part_path:
+                if self.format == 'JPEG':
+                    sheet.save(part_path, format='JPEG', quality=self.jpeg_quality)
+                else:
+                    sheet.save(part_path, format='PNG')
+        finally:
+            self._free.put(sheet)
+
+    def close(self) -> List[Dict[str, Any]]:
+        """Writes the last (partial) sheet, waits for every write (re-raising errors) and writes the deck description."""
+        self._flush()
+        try:
+            for future in self._pending:
+                future.result()
+        finally:
+            if self._pool:
+                self._pool.shutdown(wait=True)
+        if self.card_size is None:
+            print("DeckSheetWriter: No cards, no sheets written.")
+            return self.sheets
+        description = {'card_size': list(self.card_size), 'sheet_size': list(self.sheet_size),
+                       'cards': sum(sheet['cards'] for sheet in self.sheets), 'sheets': self.sheets}
+        with atomic_output(self.stem + '.json') as part_path:
+            with open(part_path, 'w') as f:
+                json.dump(description, f, indent=2)
+        print(f"DeckSheetWriter: {description['cards']} cards on {len(self.sheets)} sheets ({self.stem}_NN{self.ext}).")
+        return self.sheets
+
+    def abort(self):
+        """Drops the sheet being filled and waits for queued writes (used when the export fails or is cancelled)."""
+        self._sheet = None
+        if self._pool:
+            self._pool.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,128 @@
+# utils/export_options.py
+
+from typing import Dict, Optional, Any, Tuple
+
+from utils.card_cache import DEFAULT_CACHE_MAX_MB
+from utils.export_pipeline import DEFAULT_QUEUE_DEPTH
+from utils.export_profiles import ExportProfile, get_export_profile
+from utils.tiling import DEFAULT_TILE_OVERLAP_IN
+
+# Pages each worker writes per partial PDF in a sharded export
+DEFAULT_SHARD_PAGES = 50
+
+
+class PageLayout:
+    """
+    Where the components go on the pages of a PDF export: page ('LETTER' or 'A4'), 2.5x3.5" cards
+    with use_card (cards_per_page 8 or 9) or components of custom_size (W, H) inches, margin and
+    gutter in inches, the rotation policy ('auto', 'never', 'always'; None picks one for the
+    layout), and with tile=True one component across pages overlapping by tile_overlap inches.
+    """
+
+    KEYS = ('page', 'use_card', 'custom_size', 'cards_per_page', 'margin', 'gutter', 'rotation', 'tile', 'tile_overlap')
+
+    def __init__(self, page: str = 'LETTER', use_card: bool = False, custom_size: Optional[Tuple[float, float]] = None,
+                 cards_per_page: Optional[int] = None, margin: float = 0.0, gutter: float = 0.0,
+                 rotation: Optional[str] = None, tile: bool = False, tile_overlap: float = DEFAULT_TILE_OVERLAP_IN):
+        self.page = page.upper()
+        self.use_card = use_card
+        self.custom_size = custom_size
+        self.cards_per_page = cards_per_page
+        self.margin = max(0.0, margin)
+        self.gutter = max(0.0, gutter)
+        self.rotation = rotation
+        self.tile = tile
+        self.tile_overlap = max(0.0, tile_overlap)
+
+    def __repr__(self):
+        return (f"PageLayout(page={self.page}, use_card={self.use_card}, cards={self.cards_per_page}, "
+                f"size={self.custom_size}, margin={self.margin}, gutter={self.gutter}, rotation={self.rotation}, "
+                f"tile={self.tile})")
+
+
+class RenderOptions:
+    """
+    How cards are drawn and encoded: an ExportProfile by name (profile, default print) with any of
+    its text_mode, outline_mode ('raster' or 'vector'), template_form (the static template written
+    once as a PDF form), image_codec, jpeg_quality and page_compression overridden; None keeps the
+    profile's.
+    """
+
+    KEYS = ('profile', 'text_mode', 'outline_mode', 'template_form', 'image_codec', 'jpeg_quality', 'page_compression')
+
+    def __init__(self, profile: Optional[str] = None, text_mode: Optional[str] = None, outline_mode: Optional[str] = None,
+                 template_form: Optional[bool] = None, image_codec: Optional[str] = None, jpeg_quality: Optional[int] = None,
+                 page_compression: Optional[bool] = None):
+        self.profile = profile
+        self.text_mode = text_mode
+        self.outline_mode = outline_mode
+        self.template_form = template_form
+        self.image_codec = image_codec
+        self.jpeg_quality = jpeg_quality
+        self.page_compression = page_compression
+
+    def export_profile(self) -> ExportProfile:
+        """The named profile with this export's overrides applied (raises ValueError for an unknown name)."""
+        base = get_export_profile(self.profile)
+        return ExportProfile(base.name, base.render_dpi,
+                             image_codec=self.image_codec or base.image_codec,
+                             jpeg_quality=self.jpeg_quality or base.jpeg_quality,
+                             text_mode=self.text_mode or base.text_mode,
+                             outline_mode=self.outline_mode or base.outline_mode,
+                             template_form=base.template_form if self.template_form is None else self.template_form,
+                             page_compression=base.page_compression if self.page_compression is None else self.page_compression,
+                             ascii85=base.ascii85, description=base.description)
+
+    def __repr__(self):
+        return (f"RenderOptions(profile={self.profile}, text_mode={self.text_mode}, outline_mode={self.outline_mode}, "
+                f"template_form={self.template_form}, image_codec={self.image_codec}, jpeg_quality={self.jpeg_quality}, "
+                f"page_compression={self.page_compression})")
+
+
+class CacheOptions:
+    """The on-disk card cache: whether to use it, where (None: ~/.cache/prototy/cards) and its size cap."""
+
+    KEYS = ('use_cache', 'cache_dir', 'cache_max_mb')
+
+    def __init__(self, use_cache: bool = True, cache_dir: Optional[str] = None, cache_max_mb: int = DEFAULT_CACHE_MAX_MB):
+        self.use_cache = use_cache
+        self.cache_dir = cache_dir
+        self.cache_max_mb = cache_max_mb
+
+    def __repr__(self):
+        return f"CacheOptions(use_cache={self.use_cache}, cache_dir={self.cache_dir}, cache_max_mb={self.cache_max_mb})"
+
+
+class RunOptions:
+    """
+    How the export's work is spread: render worker processes, the depth of the pipeline queues
+    (0 runs the stages in turn), and shard_workers processes writing shard_pages pages each.
+    """
+
+    KEYS = ('workers', 'queue_depth', 'shard_workers', 'shard_pages')
+
+    def __init__(self, workers: int = 1, queue_depth: int = DEFAULT_QUEUE_DEPTH, shard_workers: int = 1,
+                 shard_pages: int = DEFAULT_SHARD_PAGES):
+        self.workers = max(1, workers)
+        self.queue_depth = max(0, queue_depth)
+        self.shard_workers = max(1, shard_workers)
+        self.shard_pages = max(1, shard_pages)
+
+    def __repr__(self):
+        return (f"RunOptions(workers={self.workers}, queue_depth={self.queue_depth}, "
+                f"shard_workers={self.shard_workers}, shard_pages={self.shard_pages})")
+
+
+def export_options(values: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Sorts flat option values (CLI or batch manifest names, e.g. {'page': 'A4', 'workers': 4}) into
+    the layout, render, cache and run option objects export_to_pdf takes. Options not given keep
+    their defaults; keys that belong to none of them raise ValueError.
+    """
+    known = PageLayout.KEYS + RenderOptions.KEYS + CacheOptions.KEYS + RunOptions.KEYS
+    unknown = sorted(set(values) - set(known))
+    if unknown:
+        raise ValueError(f"Unknown export options: {', '.join(unknown)}.")
+    pick = lambda keys: {key: values[key] for key in keys if key in values}
+    return dict(layout=PageLayout(**pick(PageLayout.KEYS)), render=RenderOptions(**pick(RenderOptions.KEYS)),
+                cache=CacheOptions(**pick(CacheOptions.KEYS)), run=RunOptions(**pick(RunOptions.KEYS)))
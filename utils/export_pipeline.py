@@ -0,0 +1,178 @@
+# utils/export_pipeline.py
+
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from typing import List, Dict, Optional, Any, Callable, Iterable, Iterator
+
+DEFAULT_QUEUE_DEPTH = 16
+
+# Marks the end of a stage's output (or carries the exception that stopped it)
+_END = object()
+_current_stage = threading.local()
+
+
+class _StageError:
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+class PipelineStage:
+    """
+    One stage of an ExportPipeline: a thread that pulls items from its input, processes them
+    and puts the results on a bounded queue for the next stage. Keeps track of how long it
+    spent working, waiting for input and waiting for room downstream.
+    """
+
+    def __init__(self, pipeline: 'ExportPipeline', name: str, depth: int):
+        self.pipeline = pipeline
+        self.name = name
+        self.queue: 'queue.Queue[Any]' = queue.Queue(maxsize=max(1, depth))
+        self.items = 0
+        self.wait_in = 0.0   # blocked on the upstream queue
+        self.wait_out = 0.0  # blocked on a full output queue
+        self.started = 0.0
+        self.finished = 0.0
+        self.thread: Optional[threading.Thread] = None
+
+    def start(self, produce: Iterable[Any]):
+        self.thread = threading.Thread(target=self._run, args=(produce,), name=f"export-{self.name}", daemon=True)
+        self.thread.start()
+
+    def _run(self, produce: Iterable[Any]):
+        _current_stage.stage = self
+        self.started = time.perf_counter()
+        try:
+            for item in produce:
+                self.items += 1
+                if not self._put(item):
+                    return
+            self._put(_END)
+        except BaseException as e: # Handed to the consumer, which re-raises it
+            self._put(_StageError(e))
+        finally:
+            self.finished = time.perf_counter()
+
+    def _put(self, item: Any) -> bool:
+        start = time.perf_counter()
+        while not self.pipeline.stopped.is_set():
+            try:
+                self.queue.put(item, timeout=0.1)
+                self.wait_out += time.perf_counter() - start
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def output(self) -> Iterator[Any]:
+        """The stage's results, in order. Time blocked here is charged to the stage (or consumer) reading them."""
+        while True:
+            start = time.perf_counter()
+            item = _END
+            while not self.pipeline.stopped.is_set():
+                try:
+                    item = self.queue.get(timeout=0.1)
+                    break
+                except queue.Empty:
+                    continue
+            reader = getattr(_current_stage, 'stage', None) or self.pipeline.consumer
+            reader.wait_in += time.perf_counter() - start
+            if item is _END:
+                return
+            if isinstance(item, _StageError):
+                raise item.error
+            yield item
+
+    def busy(self) -> float:
+        end = self.finished or time.perf_counter()
+        return max(0.0, (end - self.started) - self.wait_in - self.wait_out) if self.started else 0.0
+
+
+class _Consumer:
+    """Stand-in stage for the thread that drains the last queue (the PDF writer)."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.items = 0
+        self.wait_in = 0.0
+        self.wait_out = 0.0
+
+
+class ExportPipeline:
+    """
+    Runs an export as a chain of threaded stages joined by bounded queues, so reading rows,
+    decoding images, rendering cards and writing pages overlap instead of taking turns:
+    while the writer assembles page P, the renderer works on the next page's cards and the
+    decoder loads the pictures for the rows after that. Queue depths bound how far ahead each
+    stage may run (and so the memory in flight). Pillow and zlib release the GIL for decoding,
+    resampling and compression, which is where the overlap comes from.
+
+        pipeline = ExportPipeline(queue_depth=16)
+        rows = pipeline.source('read', records)
+        rows = pipeline.stage('decode', prefetch, rows)
+        cards = pipeline.source('render', render(rows))
+        for card in pipeline.drain('write', cards): ...
+        print(pipeline.report())
+    """
+
+    def __init__(self, queue_depth: int = DEFAULT_QUEUE_DEPTH, depths: Optional[Dict[str, int]] = None):
+        self.queue_depth = queue_depth
+        self.depths = depths or {}
+        self.stages: List[PipelineStage] = []
+        self.stopped = threading.Event()
+        self.consumer = _Consumer('write')
+        self.started = time.perf_counter()
+
+    def source(self, name: str, items: Iterable[Any], depth: Optional[int] = None) -> Iterator[Any]:
+        """Iterates items on a stage thread; items may itself read from earlier stages."""
+        stage = PipelineStage(self, name, depth or self.depths.get(name, self.queue_depth))
+        self.stages.append(stage)
+        stage.start(items)
+        return stage.output()
+
+    def stage(self, name: str, fn: Callable[[Any], Any], upstream: Iterable[Any],
+              depth: Optional[int] = None) -> Iterator[Any]:
+        """Applies fn to every item of upstream on its own thread, keeping the order."""
+        return self.source(name, (fn(item) for item in upstream), depth)
+
+    def drain(self, name: str, items: Iterable[Any]) -> Iterator[Any]:
+        """Wraps the final consumer loop (run on the calling thread) so its time shows in report()."""
+        self.consumer.name = name
+        for item in items:
+            self.consumer.items += 1
+            yield item
+
+    def close(self):
+        """Stops every stage; threads blocked on a full queue give up within a tenth of a second."""
+        self.stopped.set()
+
+    def report(self) -> str:
+        """Per-stage items, busy time and utilization (busy share of the export's wall time)."""
+        wall = max(1e-9, time.perf_counter() - self.started)
+        lines = [f"ExportPipeline: {wall:.2f} s wall"]
+        for stage in self.stages:
+            busy = stage.busy()
+            lines.append(f"  {stage.name:<8} {stage.items:>6} items  busy {busy:7.2f} s ({busy / wall:4.0%})  "
+                         f"waiting for input {stage.wait_in:6.2f} s, for output {stage.wait_out:6.2f} s")
+        writer_busy = max(0.0, wall - self.consumer.wait_in)
+        lines.append(f"  {self.consumer.name:<8} {self.consumer.items:>6} items  busy {writer_busy:7.2f} s "
+                     f"({writer_busy / wall:4.0%})  waiting for input {self.consumer.wait_in:6.2f} s")
+        return "\n".join(lines)
+
+
+@contextmanager
+def export_pipeline(queue_depth: int = DEFAULT_QUEUE_DEPTH, depths: Optional[Dict[str, int]] = None):
+    """
+    Yields an ExportPipeline for one export (None when queue_depth is 0, meaning every stage runs
+    inline on the calling thread), stops its threads afterwards and prints the utilization report.
+    """
+    if queue_depth <= 0:
+        yield None
+        return
+    pipeline = ExportPipeline(queue_depth, depths)
+    try:
+        yield pipeline
+    finally:
+        pipeline.close()
+    print(pipeline.report())
@@ -0,0 +1,58 @@
+# utils/export_profiles.py
+
+from typing import Dict, Optional
+
+
+class ExportProfile:
+    """
+    A named bundle of export settings: the DPI cards are rasterized at, how rasters are
+    encoded in the PDF ('flate' = lossless, 'jpeg' = DCT at jpeg_quality, 'auto' = JPEG for
+    photographic rasters only), whether text and shape borders are rasterized or drawn as PDF
+    text and paths, whether the static template is written once as a PDF form, whether page
+    content streams are compressed and whether streams are ASCII85-wrapped.
+    """
+
+    def __init__(self, name: str, render_dpi: int, image_codec: str = 'flate', jpeg_quality: int = 90,
+                 text_mode: str = 'raster', outline_mode: str = 'raster', template_form: bool = False,
+                 page_compression: bool = True, ascii85: bool = False, description: str = ''):
+        self.name = name
+        self.render_dpi = render_dpi
+        self.image_codec = image_codec
+        self.jpeg_quality = jpeg_quality
+        self.text_mode = text_mode
+        self.outline_mode = outline_mode
+        self.template_form = template_form
+        self.page_compression = page_compression
+        self.ascii85 = ascii85
+        self.description = description
+
+    def __repr__(self):
+        return (f"ExportProfile({self.name!r}, dpi={self.render_dpi}, codec={self.image_codec}, "
+                f"jpeg_quality={self.jpeg_quality}, text={self.text_mode}, outlines={self.outline_mode}, "
+                f"template_form={self.template_form}, page_compression={self.page_compression})")
+
+
+EXPORT_PROFILES: Dict[str, ExportProfile] = {
+    # Playtest copies: a third of the print resolution (a ninth of the pixels), JPEG rasters, and
+    # vector text and borders so names, rules and cut lines stay sharp at the low DPI. The template
+    # is stored once, so each card only adds its merged content.
+    'draft': ExportProfile('draft', 100, image_codec='jpeg', jpeg_quality=75, text_mode='vector',
+                           outline_mode='vector', template_form=True,
+                           description='Fast, small proofs for playtesting'),
+    # The long-standing export: 300 DPI lossless with text baked into the card images. The JPEG
+    # quality only applies when --image-codec auto/jpeg asks for JPEG rasters.
+    'print': ExportProfile('print', 300, image_codec='flate', jpeg_quality=92, text_mode='raster',
+                           description='300 DPI lossless output for printing'),
+    # Print shop masters: 600 DPI lossless with selectable vector text and stroked borders.
+    'archive': ExportProfile('archive', 600, image_codec='flate', text_mode='vector', outline_mode='vector',
+                             description='600 DPI lossless with selectable text'),
+}
+DEFAULT_PROFILE = 'print'
+
+
+def get_export_profile(name: Optional[str] = None) -> ExportProfile:
+    """Looks up a profile by name (case-insensitive); None gives the default 'print' profile."""
+    key = (name or DEFAULT_PROFILE).strip().lower()
+    if key not in EXPORT_PROFILES:
+        raise ValueError(f"Unknown export profile '{name}'. Choose one of: {', '.join(EXPORT_PROFILES)}.")
+    return EXPORT_PROFILES[key]
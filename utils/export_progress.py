@@ -0,0 +1,94 @@
+# utils/export_progress.py
+
+import threading
+import time
+from typing import Optional, Any, Iterable, Iterator
+
+
+class ExportCancelled(Exception):
+    """Raised inside an export when its ExportProgress has been cancelled."""
+
+
+class ExportProgress:
+    """
+    Progress and cancellation shared between an export running on a worker thread and
+    whoever is watching it (the GUI's progress dialog polls snapshot()).
+
+    The export calls card_done()/page_done() as it places cards and finishes pages; both
+    raise ExportCancelled once cancel() has been called, so the export unwinds at the next
+    card and never reaches pdf.save(). total_cards is optional: without it no ETA is given.
+    """
+
+    def __init__(self, total_cards: Optional[int] = None):
+        self.total_cards = total_cards
+        self.cards_done = 0
+        self.pages_done = 0
+        self.started = time.perf_counter()
+        self.finished: Optional[float] = None
+        self._cancelled = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def cancel(self):
+        """Asks the export to stop; safe to call from any thread."""
+        self._cancelled.set()
+
+    def check(self):
+        """Raises ExportCancelled if cancel() has been called."""
+        if self._cancelled.is_set():
+            raise ExportCancelled("Export cancelled.")
+
+    def card_done(self, count: int = 1):
+        with self._lock:
+            self.cards_done += count
+        self.check()
+
+    def page_done(self):
+        with self._lock:
+            self.pages_done += 1
+        self.check()
+
+    def finish(self):
+        self.finished = time.perf_counter()
+
+    def track(self, cards: Iterable[Any]) -> Iterator[Any]:
+        """Passes cards through, counting each as it reaches the writer (and stopping there if the export was cancelled)."""
+        self.check()
+        for card in cards:
+            self.card_done()
+            yield card
+
+    def snapshot(self) -> dict:
+        """Cards and pages done, elapsed seconds, cards per second, fraction done and ETA (None when unknown)."""
+        with self._lock:
+            cards, pages = self.cards_done, self.pages_done
+        elapsed = max(1e-9, (self.finished or time.perf_counter()) - self.started)
+        rate = cards / elapsed
+        fraction = eta = None
+        if self.total_cards:
+            fraction = min(1.0, cards / self.total_cards)
+            eta = (self.total_cards - cards) / rate if rate > 0 else None
+        return {'cards': cards, 'pages': pages, 'total_cards': self.total_cards, 'elapsed': elapsed,
+                'cards_per_second': rate, 'fraction': fraction, 'eta': eta}
+
+    def status_text(self) -> str:
+        """One-line summary for a status label, e.g. '45 / 120 cards, 5 pages, 3.2 cards/s, about 24 s left'."""
+        snap = self.snapshot()
+        cards = f"{snap['cards']} / {snap['total_cards']} cards" if snap['total_cards'] else f"{snap['cards']} cards"
+        text = f"{cards}, {snap['pages']} pages, {snap['cards_per_second']:.1f} cards/s"
+        if snap['eta'] is not None:
+            text += f", about {format_duration(snap['eta'])} left"
+        return text
+
+
+def format_duration(seconds: float) -> str:
+    """'42 s', '3 min 05 s' or '1 h 02 min'."""
+    seconds = int(round(seconds))
+    if seconds < 60:
+        return f"{seconds} s"
+    if seconds < 3600:
+        return f"{seconds // 60} min {seconds % 60:02d} s"
+    return f"{seconds // 3600} h {(seconds % 3600) // 60:02d} min"
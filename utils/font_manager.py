@@ -1,13 +1,14 @@
-import tkinter as tk
-from tkinter import ttk, filedialog, messagebox
-from tkinter import font as tkFont
+# Tkinter is imported lazily (see FontManager.__init__/get_tk_font) so headless exports never load it
+import hashlib
 import os
 import platform
 import re
-from typing import Optional
+from typing import Optional, TYPE_CHECKING
 
 # Import PIL/Pillow for image rendering
-from PIL import Image, ImageDraw, ImageFont, ImageTk
+from PIL import Image, ImageDraw, ImageFont
+if TYPE_CHECKING:
+    from tkinter import font as tkFont
 
 # Import ReportLab modules
 from reportlab.pdfgen import canvas
@@ -33,12 +34,25 @@ class FontManager:
         re.compile(r'\b\d{1,3}(?:\s*pt)?\b', re.IGNORECASE)
     ]
 
-    def __init__(self):
-        # Cache Tkinter's known font families for better indexing
-        self._tk_families_set = set(tkFont.families())
+    def __init__(self, use_tk: bool = True):
+        # Cache Tkinter's known font families for better indexing. Headless (use_tk=False) the
+        # family names are read from the font files themselves instead, which is where
+        # fontconfig (and so Tk) takes them from, so fonts resolve the same without a Tk interpreter.
+        if use_tk:
+            from tkinter import font as tkFont
+            self._tk_families_set = set(tkFont.families())
+        else:
+            self._tk_families_set = self._file_font_families()
         self._system_fonts_by_family = self._index_system_fonts()
         
         self._default_font_path = self._set_default_font_path()
+
+        # Font file path -> name registered with ReportLab's pdfmetrics (None if it could not be registered)
+        self._reportlab_fonts = {}
+        # (family, weight, slant) -> resolved file, and (file, pixel size) -> loaded PIL font, so
+        # every card (and every job of a batch export sharing this FontManager) reuses them
+        self._font_paths = {}
+        self._pil_fonts = {}
         
         if not self._default_font_path:
             print("Warning: Could not find a reliable default system font path. Font display/export might be impacted.")
@@ -96,12 +110,22 @@ class FontManager:
         
         return None # No default font path found
 
+    def _file_font_families(self) -> set:
+        """Family names stored in the scanned font files (what Tk would list), read with PIL."""
+        families = set()
+        for _, path in self._scan_common_font_dirs():
+            try:
+                families.add(ImageFont.truetype(path, 12).getname()[0])
+            except Exception: # Unreadable or unsupported font file; Tk would not list it either
+                continue
+        return families
+
     def get_families(self):
         print(self._tk_families_set)
         return sorted(list(self._tk_families_set))
 
     # Existing method for Tkinter fonts (renamed for clarity as per previous suggestions)
-    def get_tk_font(self, family: str, size: int = 12, weight: str = 'normal', slant: str = 'roman') -> tkFont.Font:
+    def get_tk_font(self, family: str, size: int = 12, weight: str = 'normal', slant: str = 'roman') -> 'tkFont.Font':
         """
         Get a Tkinter font object (tkFont.Font) for the specified font family, size, weight, and slant.
         Tkinter handles the font resolution internally.
@@ -117,6 +141,7 @@ class FontManager:
         """
         # Tkinter font creation is direct using its attributes.
         # It handles its own internal fallbacks if a specific combination isn't available.
+        from tkinter import font as tkFont
         return tkFont.Font(family=family, size=size, weight=weight, slant=slant)
 
     # NEW METHOD for PIL fonts
@@ -136,16 +161,53 @@ class FontManager:
         """
         font_path = self.get_font_filepath(family, weight, slant)
         if font_path:
+            key = (font_path, size)
+            if key in self._pil_fonts:
+                return self._pil_fonts[key]
             try:
                 # PIL font size is typically in pixels for ImageDraw.text
-                return ImageFont.truetype(font_path, size)
+                font = ImageFont.truetype(font_path, size)
             except Exception as e:
                 print(f"FontManager: Error loading PIL font from {font_path} (size: {size}): {e}")
-                return None
+                font = None
+            self._pil_fonts[key] = font
+            return font
         else:
             print(f"FontManager: No font file found for PIL family '{family}' weight '{weight}' slant '{slant}'.")
             return None # Return None if no font file is found
 
+    def get_reportlab_font(self, family: str, weight: str = 'normal', slant: str = 'roman') -> Optional[str]:
+        """
+        Registers the font file that get_font_filepath() resolves for this family/weight/slant
+        with ReportLab (pdfmetrics/TTFont) and returns the registered font name.
+        Each file is registered once. Returns None if there is no file or ReportLab cannot
+        embed it (e.g. CFF-flavoured .otf), so callers can fall back to rasterized text.
+        """
+        font_path = self.get_font_filepath(family, weight, slant)
+        if not font_path:
+            return None
+        if font_path in self._reportlab_fonts:
+            cached_name = self._reportlab_fonts[font_path]
+            # A FontManager pickled into another process keeps its cache but not ReportLab's registry
+            if cached_name is None or cached_name in pdfmetrics.getRegisteredFontNames():
+                return cached_name
+
+        # The full path's hash keeps same-named files in different directories (a user font shadowing
+        # a system one) from sharing a name; it is stable, so parallel workers register the same names
+        path_hash = hashlib.sha1(os.path.abspath(font_path).encode('utf-8')).hexdigest()[:8]
+        font_name = f"PT-{re.sub(r'[^A-Za-z0-9_-]', '', os.path.splitext(os.path.basename(font_path))[0])}-{path_hash}"
+        try:
+            if font_path.lower().endswith('.ttc'):
+                pdfmetrics.registerFont(TTFont(font_name, font_path, subfontIndex=0))
+            else:
+                pdfmetrics.registerFont(TTFont(font_name, font_path))
+        except Exception as e:
+            print(f"FontManager: ReportLab could not register {font_path}: {e}")
+            font_name = None
+
+        self._reportlab_fonts[font_path] = font_name
+        return font_name
+
     def get_weights_for_family(self, family):
         """
         Returns a sorted list of available weights (e.g., 'normal', 'bold', 'light')
@@ -280,7 +342,24 @@ class FontManager:
             
         return indexed_fonts
 
+    def __getstate__(self):
+        # Loaded PIL fonts stay behind when a FontManager is sent to render worker processes;
+        # each worker loads the few it needs
+        state = self.__dict__.copy()
+        state['_pil_fonts'] = {}
+        return state
+
     def get_font_filepath(self, tk_family, weight="normal", slant="roman"):
+        """
+        Attempts to find the actual font file path (TTF/OTF/TTC) that best matches
+        the given Tkinter font family, weight, and slant (resolved once per combination).
+        """
+        key = (tk_family, weight, slant)
+        if key not in self._font_paths:
+            self._font_paths[key] = self._find_font_filepath(tk_family, weight, slant)
+        return self._font_paths[key]
+
+    def _find_font_filepath(self, tk_family, weight="normal", slant="roman"):
         """
         Attempts to find the actual font file path (TTF/OTF/TTC) that best matches
         the given Tkinter font family, weight, and slant.
@@ -152,6 +152,50 @@ def _update_coords_if_valid(shape: "Shape", new_bbox: List[float]) -> bool:
         return False # Indicate no significant change
 
 
+def get_layers_bounds(layers) -> Tuple[int, int, int, int]:
+    """
+    Returns the union bounding box (min_x, min_y, max_x, max_y) of every shape in the given layers.
+    Falls back to a 100x100 box when there are no shapes.
+    """
+    xs, ys = [], []
+    for layer in layers:
+        for shape in layer.shapes.values():
+            min_x, min_y, max_x, max_y = shape.get_bbox
+            xs.extend([min_x, max_x])
+            ys.extend([min_y, max_y])
+
+    if not xs or not ys:
+        return (0, 0, 100, 100)
+    return (min(xs), min(ys), max(xs), max(ys))
+
+
 def calculate_snap(model, x, y):
     inc = model.grid_minor_px
-    return (round(x / inc) * inc, round(y / inc) * inc)
\ No newline at end of file
+    return (round(x / inc) * inc, round(y / inc) * inc)
+
+def _boxes_overlap(a, b) -> bool:
+    return a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]
+
+
+def vector_text_shapes(layers, vector_outlines: bool = False) -> set:
+    """
+    The Text shapes that can be drawn as vector PDF text without changing the card: their font can
+    be embedded and nothing stacked above them that stays in the raster (image content, raster
+    text, borders unless vector_outlines) overlaps them. Vector text is drawn after the card's
+    raster, so text with raster content above it stays in the raster to keep the stacking order.
+    Shared by CardRenderer (what to leave out of the raster) and VectorCardWriter (what to draw).
+    """
+    vector = set()
+    raster_above = [] # Boxes of raster content stacked above the shapes seen so far
+    stacked = [layer.shapes[sid] for layer in layers for sid in sorted(layer.shapes.keys())]
+    for shape in reversed(stacked):
+        bbox = shape.get_bbox
+        if (shape.container_type == 'Text' and shape.pdf_font_name() is not None
+                and not any(_boxes_overlap(bbox, other) for other in raster_above)):
+            vector.add(shape)
+            in_raster = False
+        else:
+            in_raster = shape.container_type in ('Text', 'Image')
+        if in_raster or (shape.line_width and shape.color and not vector_outlines):
+            raster_above.append(bbox)
+    return vector
@@ -0,0 +1,178 @@
+# utils/image_export.py
+
+import hashlib
+import json
+import math
+import os
+import re
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Dict, Optional, Any, Tuple
+
+from PIL import Image
+
+from utils.card_sinks import CardSink
+from utils.pdf_export import atomic_output
+
+# Per-card image formats: file extension and Pillow format name
+IMAGE_FORMATS: Dict[str, Tuple[str, str]] = {
+    'png': ('.png', 'PNG'),
+    'webp': ('.webp', 'WEBP'),
+    'jpeg': ('.jpg', 'JPEG'),
+}
+# Written next to the images: the content hash behind every file, so re-exports skip unchanged cards
+IMAGE_MANIFEST = '.prototy-images.json'
+# Characters kept as-is in a file name taken from a data column; anything else becomes '_'
+_UNSAFE_NAME = re.compile(r'[^A-Za-z0-9._-]+')
+
+
+def card_file_stem(value: Any, index: int) -> str:
+    """A file name (without extension) for a card from its name column value; card_0001 etc. when it is empty."""
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        value = ''
+    if isinstance(value, float) and value.is_integer():
+        value = int(value) # pandas reads an integer column with gaps as floats
+    stem = _UNSAFE_NAME.sub('_', str(value).strip()).strip('._')
+    return stem[:120] or f"card_{index + 1:04d}"
+
+
+class CardFileNames:
+    """
+    Deterministic file names for one file per card: the row's name_column value made file-safe
+    (the first row wins a repeated name, later rows get -2, -3, ...), or card_0001, card_0002, ...
+    by row without a column, so the same data always gives the same files.
+    """
+
+    def __init__(self, name_column: Optional[str], ext: str):
+        self.name_column = name_column
+        self.ext = ext
+        self.count = 0
+        self._seen: Dict[str, int] = {}
+
+    def next(self, row: Dict[str, Any]) -> str:
+        """The file name for the next row (raises ValueError if name_column is not one of its columns)."""
+        if self.count == 0 and row and self.name_column and self.name_column not in row:
+            raise ValueError(f"Name column '{self.name_column}' is not in the data (columns: {', '.join(map(str, row))}).")
+        stem = card_file_stem(row.get(self.name_column) if self.name_column else None, self.count)
+        self.count += 1
+        seen = self._seen.get(stem.lower(), 0) + 1
+        self._seen[stem.lower()] = seen
+        return (stem if seen == 1 else f"{stem}-{seen}") + self.ext
+
+
+class CardImageWriter(CardSink):
+    """
+    Writes one image file per card into a directory (export_card_images' output): PNG, WebP or JPEG.
+
+    File names come from a data column or the row number (see CardFileNames). Hashing the
+    pixels, encoding and writing run on a pool of writer threads (Pillow releases the GIL while
+    compressing) while the next cards render. The manifest file in the
+    directory maps each file to the hash of the pixels and encoder settings it was written from;
+    a card whose hash matches, with the file still as it was left, is not encoded or written again.
+
+        with CardImageWriter('out/cards', 'webp', name_column='Name') as writer:
+            for row, card in cards:
+                writer.add(row, card)
+    """
+
+    def __init__(self, directory: str, image_format: str = 'png', name_column: Optional[str] = None,
+                 quality: int = 90, writers: int = 2):
+        if image_format not in IMAGE_FORMATS:
+            raise ValueError(f"Unknown image format '{image_format}'. Choose one of: {', '.join(IMAGE_FORMATS)}.")
+        self.directory = directory
+        self.ext, self.format = IMAGE_FORMATS[image_format]
+        self.name_column = name_column
+        self.quality = quality
+        self.settings = f"{self.format}:{quality if self.format != 'PNG' else ''}"
+        os.makedirs(directory, exist_ok=True)
+        self.manifest_path = os.path.join(directory, IMAGE_MANIFEST)
+        self._previous = self._load_manifest()
+        self.files: Dict[str, Dict[str, Any]] = {}  # file name -> manifest entry
+        self.written = 0
+        self.skipped = 0
+        self._names = CardFileNames(name_column, self.ext)
+        self._lock = threading.Lock()
+        self._writers = max(1, writers)
+        self._pool = ThreadPoolExecutor(max_workers=self._writers, thread_name_prefix='card-image')
+        # At most a few cards per writer wait to be encoded, so memory stays flat however long the deck
+        self._pending: 'deque[Future]' = deque()
+        print(f"CardImageWriter: {self.format} files in {directory}, names from "
+              f"{name_column or 'the row number'}, {self._writers} writers, {len(self._previous)} files from an earlier export.")
+
+    def _load_manifest(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            with open(self.manifest_path, 'r') as f:
+                return json.load(f).get('files', {})
+        except (OSError, ValueError, AttributeError):
+            return {}
+
+    def add(self, row: Dict[str, Any], card: Image.Image) -> str:
+        """Queues one card for writing and returns its file name."""
+        name = self._names.next(row)
+        while len(self._pending) >= 2 * self._writers:
+            self._pending.popleft().result() # Re-raises a failed write
+        self._pending.append(self._pool.submit(self._write, name, card))
+        return name
+
+    def add_card(self, row: Dict[str, Any], card: Image.Image, copies: int = 1):
+        """CardSink entry point: one file per row, whatever its quantity."""
+        self.add(row, card)
+
+    def _write(self, name: str, card: Image.Image):
+        if self.format != 'PNG' and card.mode != 'RGB':
+            # JPEG has no alpha, and WebP only keeps it at a cost: flatten onto white like the PDF page
+            background = Image.new('RGB', card.size, (255, 255, 255))
+            background.paste(card, (0, 0), card if card.mode == 'RGBA' else None)
+            card = background
+        digest = hashlib.sha256(f"{self.settings}:{card.mode}:{card.size}".encode('utf-8'))
+        digest.update(card.tobytes())
+        entry = {'hash': digest.hexdigest()}
+        path = os.path.join(self.directory, name)
+        previous = self._previous.get(name)
+        if previous and previous.get('hash') == entry['hash'] and self._unchanged_on_disk(path, previous):
+            with self._lock:
+                self.files[name] = previous
+                self.skipped += 1
+            return
+        with atomic_output(path) as part_path:
+            if self.format == 'PNG':
+                card.save(part_path, format='PNG')
+            else:
+                card.save(part_path, format=self.format, quality=self.quality)
+        st = os.stat(path)
+        entry.update(size=st.st_size, mtime_ns=st.st_mtime_ns)
+        with self._lock:
+            self.files[name] = entry
+            self.written += 1
+
+    @staticmethod
+    def _unchanged_on_disk(path: str, entry: Dict[str, Any]) -> bool:
+        """The file is still the one this writer left (not deleted, replaced or edited since)."""
+        try:
+            st = os.stat(path)
+        except OSError:
+            return False
+        return st.st_size == entry.get('size') and st.st_mtime_ns == entry.get('mtime_ns')
+
+    def close(self) -> Dict[str, Dict[str, Any]]:
+        """Waits for every write (re-raising errors) and saves the manifest. Returns the files of this export."""
+        try:
+            while self._pending:
+                self._pending.popleft().result()
+        finally:
+            self._pool.shutdown(wait=True)
+        # Files of earlier exports that this one did not produce stay listed (and on disk) until overwritten
+        files = {name: entry for name, entry in self._previous.items() if name not in self.files}
+        files.update(self.files)
+        with atomic_output(self.manifest_path) as part_path:
+            with open(part_path, 'w') as f:
+                json.dump({'format': self.format, 'files': files}, f, indent=1, sort_keys=True)
+        stale = len(self._previous.keys() - self.files.keys())
+        print(f"CardImageWriter: {len(self.files)} cards, {self.written} written, {self.skipped} unchanged"
+              + (f", {stale} files from an earlier export not produced this time" if stale else "") + ".")
+        return self.files
+
+    def abort(self):
+        """Waits for writes already running and drops the rest (the manifest keeps what was finished before)."""
+        self._pool.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,213 @@
+# utils/imposition.py
+
+from typing import List, Tuple, Optional, Sequence
+
+# How components may be turned on the page: 'auto' turns them wherever that fits more per page,
+# 'never' keeps them upright, 'always' turns every one a quarter clockwise
+ROTATION_POLICIES = ('auto', 'never', 'always')
+# Slack for float sizes: 3 x 2.5" cards do fit a 7.5" wide area
+_EPSILON = 1e-6
+
+
+class Slot:
+    """
+    One component's place on a page: bottom-left corner (x, y) and footprint (width, height) in
+    points, PDF coordinates. A rotated component is turned a quarter clockwise, so its footprint
+    is its upright size transposed. component indexes the plan's component sizes.
+    """
+
+    def __init__(self, x: float, y: float, width: float, height: float, rotated: bool = False, component: int = 0):
+        self.x, self.y = x, y
+        self.width, self.height = width, height
+        self.rotated = rotated
+        self.component = component
+
+    def __repr__(self):
+        return (f"Slot(x={self.x:.1f}, y={self.y:.1f}, {self.width:.1f}x{self.height:.1f}"
+                f"{', rotated' if self.rotated else ''}, component={self.component})")
+
+
+class ImpositionPlan:
+    """
+    Where every component goes on a page, worked out once per export by plan_imposition: the
+    slots in filling order (top row first, left to right within each block of the same size and
+    turn), with the upright size of each component kind. Pages are filled by pairing the next
+    cards with the slots, so nothing about the layout is recomputed per page.
+    """
+
+    def __init__(self, page_size: Tuple[float, float], component_sizes: Sequence[Tuple[float, float]],
+                 slots: Sequence[Slot], margin: float = 0.0, gutter: float = 0.0):
+        self.page_size = page_size
+        self.component_sizes = tuple(component_sizes)
+        self.slots = tuple(slots)
+        self.margin = margin
+        self.gutter = gutter
+        self._raster_layouts = {}
+
+    @property
+    def per_page(self) -> int:
+        return len(self.slots)
+
+    @property
+    def component_size(self) -> Tuple[float, float]:
+        """The upright size of the (first) component kind, which single-size exports render at."""
+        return self.component_sizes[0]
+
+    def slots_for(self, component: int) -> Tuple[Slot, ...]:
+        """The slots of one component kind, in filling order."""
+        return tuple(slot for slot in self.slots if slot.component == component)
+
+    def bounds(self) -> Tuple[float, float, float, float]:
+        """The box (x, y, width, height in points) around all the slots."""
+        x0 = min(slot.x for slot in self.slots)
+        y0 = min(slot.y for slot in self.slots)
+        x1 = max(slot.x + slot.width for slot in self.slots)
+        y1 = max(slot.y + slot.height for slot in self.slots)
+        return x0, y0, x1 - x0, y1 - y0
+
+    def raster_layout(self, dpi: int) -> Tuple[Tuple[int, int], Tuple[Tuple[int, int, int, int], ...]]:
+        """
+        For drawing a page as one raster at dpi: the raster's pixel size (the slots' bounds) and each
+        slot's (x, y, width, height) in it, y from the top. Computed once per DPI.
+        """
+        if dpi not in self._raster_layouts:
+            bx, by, bw, bh = self.bounds()
+            scale = dpi / 72
+            boxes = tuple((int(round((slot.x - bx) * scale)), int(round((by + bh - slot.y - slot.height) * scale)),
+                           int(round(slot.width * scale)), int(round(slot.height * scale))) for slot in self.slots)
+            self._raster_layouts[dpi] = ((int(round(bw * scale)), int(round(bh * scale))), boxes)
+        return self._raster_layouts[dpi]
+
+    def describe(self) -> str:
+        kinds = []
+        for index, (width, height) in enumerate(self.component_sizes):
+            slots = self.slots_for(index)
+            turned = sum(1 for slot in slots if slot.rotated)
+            kinds.append(f"{len(slots)} x {width / 72:.2f}x{height / 72:.2f} in" + (f" ({turned} turned)" if turned else ""))
+        return (f"{self.per_page} per {self.page_size[0] / 72:.2f}x{self.page_size[1] / 72:.2f} in page: {', '.join(kinds)}, "
+                f"margin {self.margin / 72:.2f} in, gutter {self.gutter / 72:.2f} in")
+
+
+def _fit(length: float, size: float, gutter: float) -> int:
+    """How many components of size fit along length with gutter between neighbours."""
+    return max(0, int((length + gutter + _EPSILON) // (size + gutter)))
+
+
+def _fill_area(area: Tuple[float, float, float, float], size: Tuple[float, float], gutter: float,
+               rotation: str, limit: Optional[int], first_turn: Optional[bool] = None
+               ) -> Tuple[List[Tuple[float, float, float, float, bool]], List[Tuple[float, float, float, float]]]:
+    """
+    Guillotine packing of one component size into a free area (x, y from the top-left, width, height):
+    each free rectangle gets the best grid of the allowed turns, and the strips it leaves beside and
+    below are filled the same way, so e.g. 2x3" tokens fill the leftover strip of an upright grid
+    turned. Returns the placed footprints (x, y, width, height, rotated), top-left based, and the
+    rectangles left free. first_turn forces the turn of the first grid ('auto' tries both).
+    """
+    placed: List[Tuple[float, float, float, float, bool]] = []
+    left_free: List[Tuple[float, float, float, float]] = []
+    todo = [area]
+    while todo:
+        x, y, width, height = todo.pop(0)
+        if limit is not None and len(placed) >= limit:
+            left_free.append((x, y, width, height))
+            continue
+        turns = [False, True] if rotation == 'auto' else [rotation == 'always']
+        if first_turn is not None and not placed:
+            turns = [first_turn]
+        best = None
+        for turned in turns:
+            fw, fh = (size[1], size[0]) if turned else size
+            cols, rows = _fit(width, fw, gutter), _fit(height, fh, gutter)
+            if cols * rows and (best is None or cols * rows > best[0]):
+                best = (cols * rows, cols, rows, fw, fh, turned)
+        if best is None:
+            left_free.append((x, y, width, height))
+            continue
+        count, cols, rows, fw, fh, turned = best
+        if limit is not None:
+            count = min(count, limit - len(placed))
+            rows = -(-count // cols)
+        for i in range(count):
+            placed.append((x + (i % cols) * (fw + gutter), y + (i // cols) * (fh + gutter), fw, fh, turned))
+        used_w = min(cols, count) * (fw + gutter) - gutter
+        used_h = rows * (fh + gutter) - gutter
+        right_w, below_h = width - used_w - gutter, height - used_h - gutter
+        # Cut along whichever edge leaves the larger free piece
+        tall = [(x + used_w + gutter, y, right_w, height), (x, y + used_h + gutter, used_w, below_h)]
+        wide = [(x + used_w + gutter, y, right_w, used_h), (x, y + used_h + gutter, width, below_h)]
+        largest = lambda pieces: max(w * h if w > 0 and h > 0 else 0 for _, _, w, h in pieces)
+        todo.extend(piece for piece in (tall if largest(tall) >= largest(wide) else wide)
+                    if piece[2] > _EPSILON and piece[3] > _EPSILON)
+    return placed, left_free
+
+
+def plan_imposition(page_size: Tuple[float, float], component_sizes: Sequence[Tuple[float, float]],
+                    margin: float = 0.0, gutter: float = 0.0, rotation: str = 'auto',
+                    counts: Optional[Sequence[Optional[int]]] = None,
+                    max_per_page: Optional[int] = None) -> ImpositionPlan:
+    """
+    Lays out one page for components of the given upright sizes (points) inside margin, gutter
+    points apart, turned as the rotation policy allows, and returns the plan every page of the
+    export reuses. Components keep their exact size: nothing is stretched to fill the page.
+
+    Several sizes (cards, tokens, tiles) share a page: the largest kinds are placed first and the
+    smaller ones fill the space they leave. counts caps each kind's slots per page (None: as many
+    as fit), max_per_page caps them all. The slots are centred on the page as one block.
+    Raises ValueError when a component does not fit inside the margins at all.
+    """
+    if rotation not in ROTATION_POLICIES:
+        raise ValueError(f"Unknown rotation policy '{rotation}'. Choose one of: {', '.join(ROTATION_POLICIES)}.")
+    page_w, page_h = page_size
+    area_w, area_h = page_w - 2 * margin, page_h - 2 * margin
+    counts = list(counts) if counts is not None else [None] * len(component_sizes)
+    for width, height in component_sizes:
+        upright = width <= area_w + _EPSILON and height <= area_h + _EPSILON
+        turned = height <= area_w + _EPSILON and width <= area_h + _EPSILON
+        if not (upright if rotation == 'never' else turned if rotation == 'always' else upright or turned):
+            raise ValueError(f"A {width / 72:.2f}x{height / 72:.2f} in component does not fit on a "
+                             f"{page_w / 72:.2f}x{page_h / 72:.2f} in page inside {margin / 72:.2f} in margins "
+                             f"(rotation '{rotation}'); use --tile to print it across several pages.")
+
+    def pack(first_turn: Optional[bool]) -> List[Tuple[float, float, float, float, bool, int]]:
+        free = [(0.0, 0.0, area_w, area_h)]
+        placed = []
+        for index in sorted(range(len(component_sizes)), key=lambda i: -component_sizes[i][0] * component_sizes[i][1]):
+            remaining: List[Tuple[float, float, float, float]] = []
+            for area in sorted(free, key=lambda a: -a[2] * a[3]):
+                limit = counts[index]
+                if limit is not None:
+                    limit -= sum(1 for p in placed if p[5] == index)
+                kind_placed, kind_free = _fill_area(area, component_sizes[index], gutter, rotation, limit,
+                                                    first_turn if not placed else None)
+                placed.extend(footprint + (index,) for footprint in kind_placed)
+                remaining.extend(kind_free)
+            free = remaining
+        return placed
+
+    placed = pack(None)
+    if rotation == 'auto':
+        # Greedy packing takes the fuller first grid, but starting turned can leave more usable strips
+        turned = pack(True)
+        if len(turned) > len(placed):
+            placed = turned
+    if max_per_page is not None:
+        placed = placed[:max(1, max_per_page)]
+    # Centre the block of slots in the printable area and convert to PDF coordinates (y up)
+    used_w = max(p[0] + p[2] for p in placed)
+    used_h = max(p[1] + p[3] for p in placed)
+    ox = margin + (area_w - used_w) / 2
+    top = page_h - margin - (area_h - used_h) / 2
+    slots = [Slot(ox + x, top - y - height, width, height, turned, index) for x, y, width, height, turned, index in placed]
+    return ImpositionPlan(page_size, component_sizes, slots, margin, gutter)
+
+
+def fit_to_area(size: Tuple[float, float], area: Tuple[float, float], rotation: str = 'auto') -> Tuple[float, float]:
+    """
+    The largest upright size with size's proportions that fits area (points) as the rotation policy
+    allows: one component per page, enlarged or shrunk without being distorted.
+    """
+    width, height = size
+    upright = min(area[0] / width, area[1] / height)
+    turned = min(area[0] / height, area[1] / width)
+    scale = upright if rotation == 'never' else turned if rotation == 'always' else max(upright, turned)
+    return width * scale, height * scale
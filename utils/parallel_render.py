@@ -0,0 +1,104 @@
+# utils/parallel_render.py
+
+import copy
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Optional, Any, Tuple, Iterable, Iterator
+
+from utils.card_renderer import CardRenderer, row_fingerprint
+from utils.card_cache import CardCache, RecentCards, render_cached
+
+# Each worker process keeps its own renderer (and therefore its own copy of the shapes),
+# built once by _init_worker and reused for every card that process renders.
+_worker_renderer: Optional[CardRenderer] = None
+_worker_cache: Optional[CardCache] = None
+
+
+def _init_worker(model_data: Dict[str, Any], font_manager, render_dpi: int, columns: List[str],
+                 vector_text: bool = False, vector_outlines: bool = False,
+                 output_size: Optional[Tuple[int, int]] = None, card_cache: Optional[CardCache] = None):
+    """
+    Process pool initializer: rebuilds the template layers from the model's to_dict() output
+    and caches the static (non merge-bound) shapes once per worker.
+    With card_cache, workers look cards up in (and add them to) the shared on-disk cache.
+    """
+    global _worker_renderer, _worker_cache
+    # Imported here so the parent process does not pay for it unless a pool is started
+    from model import Layer
+
+    layers = [Layer.from_dict(copy.deepcopy(layer_data), font_manager, render_content=False)
+              for layer_data in model_data.get('layers', [])]
+    _worker_renderer = CardRenderer(layers, render_dpi, vector_text=vector_text,
+                                    vector_outlines=vector_outlines, output_size=output_size)
+    _worker_renderer.prepare_template(columns)
+    _worker_cache = card_cache
+
+
+def _render_in_worker(job: Tuple[Dict[str, Any], Tuple[float, float], bool]):
+    row_data, target_size_points, dynamic_only = job
+    return render_cached(_worker_renderer, _worker_cache, row_data, target_size_points, dynamic_only)
+
+
+def render_cards_parallel(model_data: Dict[str, Any],
+                          font_manager,
+                          records: Iterable[Dict[str, Any]],
+                          target_size_points: Tuple[float, float],
+                          workers: int,
+                          render_dpi: int = 300,
+                          columns: Optional[List[str]] = None,
+                          vector_text: bool = False,
+                          vector_outlines: bool = False,
+                          dynamic_only: bool = False,
+                          output_size: Optional[Tuple[int, int]] = None,
+                          max_in_flight: Optional[int] = None,
+                          card_cache: Optional[CardCache] = None,
+                          bound_columns: Optional[List[str]] = None,
+                          recent: Optional[RecentCards] = None) -> Iterator[Tuple[Dict[str, Any], Any]]:
+    """
+    Renders every record on a process pool and yields (record, finished card) pairs in record order.
+    Records are pulled from the iterable only as queue space frees up.
+
+    At most max_in_flight cards (default: four per worker) are queued or waiting to be
+    consumed at any time, so a large deck never holds every raster in memory at once.
+    With dynamic_only the workers return CardRenderer.render_dynamic_parts() instead of full cards.
+    With card_cache, cards already in the on-disk cache are loaded instead of rendered.
+    With bound_columns, rows whose bound values match a card in recent (or one still being
+    rendered) share that card instead of being submitted again.
+    """
+    recent = recent if recent is not None else RecentCards()
+    max_in_flight = max_in_flight or workers * 4
+    print(f"render_cards_parallel: Rendering with {workers} worker processes.")
+
+    with ProcessPoolExecutor(max_workers=workers,
+                             initializer=_init_worker,
+                             initargs=(model_data, font_manager, render_dpi, columns or [],
+                                       vector_text, vector_outlines, output_size, card_cache)) as pool:
+        pending = deque()
+        in_flight: Dict[str, Any] = {} # fingerprint -> future, for duplicates of a card not back yet
+
+        def next_card():
+            row, fingerprint, card, future = pending.popleft()
+            if card is None:
+                card = future.result()
+                if fingerprint is not None and in_flight.get(fingerprint) is future:
+                    del in_flight[fingerprint]
+                    recent.put(fingerprint, card)
+            return row, card
+
+        for row_data in records:
+            fingerprint = row_fingerprint(row_data, bound_columns) if bound_columns is not None else None
+            card = recent.get(fingerprint) if fingerprint is not None else None
+            if card is not None:
+                pending.append((row_data, fingerprint, card, None))
+            elif fingerprint is not None and fingerprint in in_flight:
+                recent.reused += 1
+                pending.append((row_data, fingerprint, None, in_flight[fingerprint]))
+            else:
+                future = pool.submit(_render_in_worker, (row_data, target_size_points, dynamic_only))
+                if fingerprint is not None:
+                    in_flight[fingerprint] = future
+                pending.append((row_data, fingerprint, None, future))
+            if len(pending) >= max_in_flight:
+                yield next_card()
+        while pending:
+            yield next_card()
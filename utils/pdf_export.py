@@ -0,0 +1,308 @@
+# utils/pdf_export.py
+
+import hashlib
+import io
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+from typing import List, Dict, Optional, Any, Tuple
+
+from PIL import Image, ImageColor
+from reportlab import rl_config
+from reportlab.lib.utils import ImageReader
+
+from utils.geometry import get_layers_bounds, vector_text_shapes
+
+
+def card_transform(x: float, y: float, width: float, height: float,
+                   model_size: Tuple[float, float], rotated: bool = False) -> Tuple[float, ...]:
+    """
+    Returns the ReportLab transform (a, b, c, d, e, f) that maps card coordinates
+    (72-dpi units from the model's top-left, y growing downwards) onto a page cell.
+
+    (x, y) is the bottom-left corner of the cell in points and (width, height) its size.
+    With rotated=True the card is turned a quarter clockwise inside the cell, matching
+    rotate_image_90_clockwise in the raster path.
+    """
+    model_w, model_h = model_size
+    if rotated:
+        return (0, -height / model_w, -width / model_h, 0, x + width, y + height)
+    return (width / model_w, 0, 0, -height / model_h, x, y + height)
+
+
+def model_size_for(layers: List[Any]) -> Tuple[int, int]:
+    """Size of the card in 72-dpi units, rounded the same way CardRenderer sizes its canvas."""
+    min_x, min_y, max_x, max_y = get_layers_bounds(layers)
+    return max(1, int(round(max_x - min_x))), max(1, int(round(max_y - min_y)))
+
+
+# Flat art is almost entirely a few dozen colours (fills, paper, antialiased edges between them);
+# a raster where more than PHOTO_TONAL_FRACTION of the pixels fall outside its PHOTO_FLAT_COLORS
+# most common colours is treated as photographic (see ImageRegistry.is_photographic)
+PHOTO_FLAT_COLORS = 64
+PHOTO_TONAL_FRACTION = 0.05
+# Rasters are classified from a nearest-neighbour sample of at most this many pixels per side
+PHOTO_SAMPLE_SIZE = 512
+
+
+# Exports currently inside pdf_stream_encoding(), and the rl_config.useA85 they replaced
+_stream_encoding_lock = threading.Lock()
+_stream_encoding_users = 0
+_stream_encoding_previous = None
+
+
+@contextmanager
+def pdf_stream_encoding(ascii85: bool = False):
+    """
+    Sets whether ReportLab wraps streams (images, page content, forms) in ASCII85 for the
+    duration of an export. ReportLab's default is ASCII85, which only matters for 7-bit
+    transports, makes every stream 25% larger and is encoded in pure Python; binary
+    streams are much faster to write.
+    The setting is process-wide, so concurrent exports (batch jobs on threads) share it: the
+    first one in sets it and the last one out restores ReportLab's previous value.
+    """
+    global _stream_encoding_users, _stream_encoding_previous
+    with _stream_encoding_lock:
+        if _stream_encoding_users == 0:
+            _stream_encoding_previous = rl_config.useA85
+            rl_config.useA85 = 1 if ascii85 else 0
+        elif bool(rl_config.useA85) != ascii85:
+            print("pdf_export: Concurrent exports asked for different stream encodings; "
+                  f"keeping {'ASCII85' if rl_config.useA85 else 'binary'} streams.")
+        _stream_encoding_users += 1
+    try:
+        yield
+    finally:
+        with _stream_encoding_lock:
+            _stream_encoding_users -= 1
+            if _stream_encoding_users == 0:
+                rl_config.useA85 = _stream_encoding_previous
+
+
+@contextmanager
+def atomic_output(path: str):
+    """
+    Yields a temporary path next to path to write the export to, and moves it over path only
+    once the block finishes. If the export fails or is cancelled the temporary file is
+    removed, so path is never left half-written (and an earlier file there survives).
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.' + os.path.basename(path) + '.', suffix='.part')
+    os.close(fd)
+    # mkstemp creates the file private to its owner; give it the permissions a plain open() would
+    umask = os.umask(0)
+    os.umask(umask)
+    os.chmod(tmp_path, 0o666 & ~umask)
+    try:
+        yield tmp_path
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+class ImageRegistry:
+    """
+    Embeds every raster an export draws at most once per PDF.
+
+    Images are keyed by a hash of their pixels (plus mode, size and mask), and each distinct
+    image is written once as a small form wrapping its image XObject. Repeats (the same icon on
+    200 cards, a back page on every other sheet, identical cards) only add a doForm reference.
+
+    image_codec='jpeg' stores opaque rasters as JPEG at jpeg_quality (ReportLab passes the JPEG
+    through as a DCTDecode stream); 'flate' keeps every raster lossless; 'auto' classifies each
+    raster and uses JPEG for photographic content and Flate for flat colour/line art (text, borders,
+    fills), which compresses well losslessly and would show JPEG ringing. Rasters with
+    transparency are always stored losslessly so their soft mask survives.
+    """
+
+    def __init__(self, image_codec: str = 'flate', jpeg_quality: int = 90):
+        self._forms: Dict[str, str] = {}
+        self.references = 0
+        self.image_codec = image_codec
+        self.jpeg_quality = jpeg_quality
+        self.codec_counts: Dict[str, int] = {'jpeg': 0, 'flate': 0}
+
+    @staticmethod
+    def image_key(img: Image.Image, mask: Optional[str] = None) -> str:
+        digest = hashlib.md5(img.tobytes())
+        digest.update(f"{img.mode}{img.size}{mask}".encode())
+        return digest.hexdigest()
+
+    @staticmethod
+    def is_photographic(img: Image.Image) -> bool:
+        """
+        True for continuous-tone content (photos, painted art, gradients), False for flat colour
+        and line art. Works on a nearest-neighbour sample (which only picks existing pixels): flat
+        art puts nearly every pixel in its most common colours, while continuous tone spreads
+        them over thousands. A raster counts as photographic once about a twentieth of it is, so
+        callers classify each card on its own rather than a sheet of several.
+        """
+        sample = img
+        if max(img.size) > PHOTO_SAMPLE_SIZE:
+            ratio = PHOTO_SAMPLE_SIZE / max(img.size)
+            sample = img.resize((max(1, int(img.width * ratio)), max(1, int(img.height * ratio))),
+                                Image.Resampling.NEAREST)
+        pixels = sample.width * sample.height
+        counts = sorted((count for count, _ in sample.convert('RGB').getcolors(pixels)), reverse=True)
+        tonal = pixels - sum(counts[:PHOTO_FLAT_COLORS])
+        return tonal > PHOTO_TONAL_FRACTION * pixels
+
+    def codec_for(self, img: Image.Image) -> str:
+        """'jpeg' or 'flate' for an opaque raster, following image_codec."""
+        if self.image_codec == 'auto':
+            return 'jpeg' if self.is_photographic(img) else 'flate'
+        return 'jpeg' if self.image_codec == 'jpeg' else 'flate'
+
+    def image_reader(self, img: Image.Image, mask: Optional[str] = None) -> ImageReader:
+        """Wraps img for drawImage, JPEG-encoded when the codec picks JPEG and nothing would be lost to transparency."""
+        if self.image_codec in ('jpeg', 'auto'):
+            opaque = img
+            if img.mode == 'RGBA' and img.getchannel('A').getextrema() == (255, 255):
+                opaque = img.convert('RGB')
+            if opaque.mode in ('RGB', 'L') and self.codec_for(opaque) == 'jpeg':
+                self.codec_counts['jpeg'] += 1
+                buf = io.BytesIO()
+                opaque.save(buf, 'JPEG', quality=self.jpeg_quality)
+                buf.seek(0)
+                return ImageReader(buf)
+        self.codec_counts['flate'] += 1
+        return ImageReader(img)
+
+    def draw_image(self, pdf, img: Image.Image, x: float, y: float, width: float, height: float,
+                   mask: Optional[str] = None) -> str:
+        """
+        Draws img into the rectangle (x, y, width, height), embedding its pixels only the first time
+        they are seen. Returns the image's form name, for placing it again with draw_form.
+        """
+        key = self.image_key(img, mask)
+        form_name = self._forms.get(key)
+        if form_name is None:
+            form_name = f"Img{key}"
+            # Unit-square form; the caller's scaling below sizes it per use
+            pdf.beginForm(form_name, lowerx=0, lowery=0, upperx=1, uppery=1)
+            pdf.drawImage(self.image_reader(img, mask), 0, 0, width=1, height=1, mask=mask)
+            pdf.endForm()
+            self._forms[key] = form_name
+        self.draw_form(pdf, form_name, x, y, width, height)
+        return form_name
+
+    def draw_form(self, pdf, form_name: str, x: float, y: float, width: float, height: float):
+        """Places an image draw_image already embedded into the rectangle (x, y, width, height)."""
+        self.references += 1
+        pdf.saveState()
+        pdf.translate(x, y)
+        pdf.scale(width, height)
+        pdf.doForm(form_name)
+        pdf.restoreState()
+
+    def summary(self) -> str:
+        return (f"ImageRegistry: {len(self._forms)} distinct images embedded for {self.references} placements "
+                f"({self.codec_counts['jpeg']} JPEG, {self.codec_counts['flate']} Flate).")
+
+
+class TemplateFormWriter:
+    """
+    Writes the static part of the card template once per PDF as a Form XObject
+    (beginForm/endForm) and stamps it into every card cell with doForm. Only each card's
+    dynamic parts (see CardRenderer.render_dynamic_parts) are drawn per card, through an
+    ImageRegistry so parts that repeat between cards are embedded once.
+    """
+
+    def __init__(self, model_size: Tuple[float, float], registry: Optional[ImageRegistry] = None,
+                 form_name: str = 'CardTemplate'):
+        self.model_size = model_size
+        self.registry = registry or ImageRegistry()
+        self.form_name = form_name
+        self.layer_size: Tuple[int, int] = (1, 1)
+        self.defined = False
+
+    def define(self, pdf, static_layer: Image.Image):
+        """Adds the form to the document; call once, before the first draw_card()."""
+        model_w, model_h = self.model_size
+        self.layer_size = static_layer.size
+        pdf.beginForm(self.form_name, lowerx=0, lowery=0, upperx=model_w, uppery=model_h)
+        pdf.drawImage(self.registry.image_reader(static_layer.convert('RGB')), 0, 0, width=model_w, height=model_h)
+        pdf.endForm()
+        self.defined = True
+
+    def draw_card(self, pdf, transform: Tuple[float, ...],
+                  dynamic_parts: Optional[List[Tuple[Image.Image, Tuple[int, int]]]] = None):
+        """Draws the template form plus the card's dynamic parts into the cell given by transform (see card_transform)."""
+        model_w, model_h = self.model_size
+        px_w = model_w / self.layer_size[0]
+        px_h = model_h / self.layer_size[1]
+        pdf.saveState()
+        pdf.transform(*transform)
+        # card_transform points y downwards; images and forms are drawn y-up
+        pdf.transform(1, 0, 0, -1, 0, model_h)
+        pdf.doForm(self.form_name)
+        for img, (left, top) in dynamic_parts or []:
+            self.registry.draw_image(pdf, img, left * px_w, model_h - (top + img.height) * px_h,
+                                     img.width * px_w, img.height * px_h, mask='auto')
+        pdf.restoreState()
+
+
+class VectorCardWriter:
+    """
+    Draws the vector parts of a card on top of its raster: Text containers as real PDF text
+    and/or shape borders as stroked paths.
+
+    Text lines are laid out by Shape.layout_text_for_pdf (the same wrapping the PIL path uses) and
+    drawn with the TTF that FontManager registers with ReportLab; borders come from each shape's
+    pdf_outline_path. Everything is drawn in stacking order after the card's raster, so only text
+    that nothing rasterized is stacked over is drawn here (vector_text_shapes); the rest, and shapes
+    whose font cannot be embedded, are left to the raster renderer (see CardRenderer's
+    vector_text/vector_outlines flags). Text in ovals, triangles and hexagons is clipped to the
+    shape's outline, as the raster clips it.
+    """
+
+    def __init__(self, layers: List[Any], render_dpi: int = 300, text: bool = True, outlines: bool = False):
+        self.layers = layers
+        self.render_dpi = render_dpi
+        self.text = text
+        self.outlines = outlines
+        self.model_bounds = get_layers_bounds(layers)
+        self.model_size = model_size_for(layers)
+        self._vector_text = vector_text_shapes(layers, outlines) if text else set()
+
+    def draw_card(self, pdf, row_data: Dict[str, Any], transform: Tuple[float, ...]):
+        """Draws the vector text/borders of one card, with the row's values merged in."""
+        min_x, min_y, _, _ = self.model_bounds
+        pdf.saveState()
+        pdf.transform(*transform)
+        for layer in self.layers:
+            for sid in sorted(layer.shapes.keys()):
+                shape = layer.shapes[sid]
+                if shape in self._vector_text:
+                    self._draw_text(pdf, shape, row_data, min_x, min_y)
+                if self.outlines:
+                    shape.draw_pdf_outline(pdf, min_x, min_y)
+        pdf.restoreState()
+
+    def _draw_text(self, pdf, shape, row_data: Dict[str, Any], min_x: float, min_y: float):
+        text = str(row_data[shape.name]) if shape.name in row_data else shape.text
+        layout = shape.layout_text_for_pdf(text, self.render_dpi)
+        if not layout:
+            return
+
+        x0, y0, _, _ = shape.get_bbox
+        inset = shape.line_width or 0
+        origin_x, origin_y = x0 + inset - min_x, y0 + inset - min_y
+        r, g, b = ImageColor.getrgb(layout['color'])[:3]
+
+        pdf.saveState()
+        if shape.shape_type != 'rectangle': # Rectangular text is not clipped in the raster either
+            clip = shape.pdf_outline_path(pdf, min_x, min_y)
+            if clip is not None:
+                pdf.clipPath(clip, stroke=0, fill=0)
+        pdf.setFillColorRGB(r / 255.0, g / 255.0, b / 255.0)
+        pdf.setFont(layout['font_name'], layout['font_size'])
+        for line, line_x, baseline_y in layout['lines']:
+            # The cell transform points y downwards; flip back so glyphs stay upright
+            text_obj = pdf.beginText()
+            text_obj.setTextTransform(1, 0, 0, -1, origin_x + line_x, origin_y + baseline_y)
+            text_obj.textOut(line)
+            pdf.drawText(text_obj)
+        pdf.restoreState()
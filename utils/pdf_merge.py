@@ -0,0 +1,256 @@
+# utils/pdf_merge.py
+
+import hashlib
+import re
+from typing import List, Dict, Optional, BinaryIO
+
+# "12 0 R" (an indirect reference) inside an object's dictionary
+_REFERENCE = re.compile(rb'(\d+)\s+(\d+)\s+R\b')
+_OBJECT_HEADER = re.compile(rb'(\d+)\s+(\d+)\s+obj\b')
+_STREAM_KEYWORD = re.compile(rb'>>\s*stream(\r\n|\n|\r)')
+_LENGTH = re.compile(rb'/Length\s+(\d+)(\s+(\d+)\s+R)?')
+_PAGE_TYPE = re.compile(rb'/Type\s*/Page\b(?!s)')
+# /Parent of a page is rewritten to the merged page tree, never followed
+_PARENT = re.compile(rb'/Parent\s+\d+\s+\d+\s+R')
+
+
+class PdfObject:
+    """One indirect object of a PDF: its value (usually a dictionary) and, for streams, the raw stream bytes."""
+
+    __slots__ = ('head', 'stream')
+
+    def __init__(self, head: bytes, stream: Optional[bytes] = None):
+        self.head = head
+        self.stream = stream
+
+    def references(self, skip_parent: bool = True) -> List[int]:
+        head = _PARENT.sub(b'', self.head) if skip_parent else self.head
+        return [int(m.group(1)) for m in _REFERENCE.finditer(head)]
+
+
+class PdfShardReader:
+    """
+    Reads the objects of a PDF written by ReportLab (one of PdfExporter's shard files): a classic
+    xref table, no object or xref streams, no encryption, direct or indirect stream /Length.
+    Not a general PDF parser; pdf_merge only ever reads files this package just wrote.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as f:
+            self.data = f.read()
+        self.offsets: Dict[int, int] = {}
+        self.trailer = b''
+        self._objects: Dict[int, PdfObject] = {}
+        self._read_xref()
+
+    @property
+    def header(self) -> bytes:
+        """The '%PDF-1.x' line plus the binary comment line after it."""
+        end = self.data.find(b'\n', self.data.find(b'\n') + 1)
+        return self.data[:end + 1]
+
+    def _read_xref(self):
+        start = self.data.rfind(b'startxref')
+        if start < 0:
+            raise ValueError(f"{self.path}: no startxref, not a complete PDF.")
+        xref_at = int(self.data[start + len(b'startxref'):].split()[0])
+        trailer_at = self.data.find(b'trailer', xref_at)
+        lines = self.data[xref_at:trailer_at].split(b'\n')
+        if not lines[0].strip() == b'xref':
+            raise ValueError(f"{self.path}: expected a classic xref table at {xref_at}.")
+        number = 0
+        for line in lines[1:]:
+            parts = line.split()
+            if len(parts) == 2:    # Subsection header: first object number, count
+                number = int(parts[0])
+            elif len(parts) == 3:  # offset, generation, n/f
+                if parts[2] == b'n':
+                    self.offsets[number] = int(parts[0])
+                number += 1
+        self.trailer = self.data[trailer_at:start]
+
+    def trailer_reference(self, key: bytes) -> Optional[int]:
+        match = re.search(rb'/' + key + rb'\s+(\d+)\s+\d+\s+R', self.trailer)
+        return int(match.group(1)) if match else None
+
+    def trailer_id(self) -> bytes:
+        match = re.search(rb'/ID\s*\[\s*<([0-9a-fA-F]*)>', self.trailer)
+        return match.group(1) if match else b''
+
+    def object(self, number: int) -> PdfObject:
+        """Parses (once) and returns object number."""
+        obj = self._objects.get(number)
+        if obj is not None:
+            return obj
+        offset = self.offsets.get(number)
+        if offset is None:
+            raise ValueError(f"{self.path}: object {number} is not in the xref table.")
+        header = _OBJECT_HEADER.match(self.data, offset)
+        if header is None or int(header.group(1)) != number:
+            raise ValueError(f"{self.path}: xref offset {offset} does not point at object {number}.")
+        body_at = header.end()
+        end = self.data.find(b'endobj', body_at)
+        stream = _STREAM_KEYWORD.search(self.data, body_at, end if end >= 0 else len(self.data))
+        if stream is None:
+            obj = PdfObject(self.data[body_at:end].strip())
+        else:
+            head = self.data[body_at:stream.start() + 2].strip()
+            length = _LENGTH.search(head)
+            if length is None:
+                raise ValueError(f"{self.path}: stream object {number} has no /Length.")
+            size = self._stream_length(length)
+            data_at = stream.end()
+            obj = PdfObject(head, self.data[data_at:data_at + size])
+        self._objects[number] = obj
+        return obj
+
+    def _stream_length(self, length: 're.Match') -> int:
+        if length.group(2): # /Length 12 0 R
+            return int(self.object(int(length.group(3))).head)
+        return int(length.group(1))
+
+    def page_numbers(self) -> List[int]:
+        """The object numbers of the document's pages, in order (walking nested /Pages nodes)."""
+        root = self.trailer_reference(b'Root')
+        catalog = self.object(root).head
+        pages = re.search(rb'/Pages\s+(\d+)\s+\d+\s+R', catalog)
+        if pages is None:
+            raise ValueError(f"{self.path}: catalog has no /Pages.")
+        found: List[int] = []
+
+        def walk(number: int):
+            node = self.object(number)
+            if _PAGE_TYPE.search(node.head):
+                found.append(number)
+                return
+            kids = re.search(rb'/Kids\s*\[([^\]]*)\]', node.head)
+            for match in _REFERENCE.finditer(kids.group(1) if kids else b''):
+                walk(int(match.group(1)))
+
+        walk(int(pages.group(1)))
+        return found
+
+
+class PdfMerger:
+    """
+    Concatenates PDFs (the shards of one export, in order) into one file, streaming each shard's
+    objects to the output with new object numbers and a single page tree.
+
+    Objects reached from the pages (images, forms, fonts, content streams) are written once per
+    distinct content: an object whose bytes, with its references resolved to already-written
+    objects, match one written earlier is replaced by a reference to that one. So the template
+    form, a back image or the standard fonts every shard defines end up in the merged file once.
+    Page content streams and font subsets that differ per shard are kept as they are.
+
+        merger = PdfMerger()
+        merger.merge(['part-0.pdf', 'part-1.pdf'], 'out.pdf')
+    """
+
+    CATALOG, PAGES = 1, 2
+
+    def __init__(self):
+        self._next_number = 3
+        self._written: Dict[bytes, int] = {}  # content digest -> merged object number
+        self._xref: Dict[int, int] = {}
+        self.objects_read = 0
+        self.objects_shared = 0
+
+    def merge(self, paths: List[str], output_path: str) -> int:
+        """Writes the pages of every PDF in paths, in order, to output_path. Returns the number of pages."""
+        if not paths:
+            raise ValueError("PdfMerger.merge: nothing to merge.")
+        kids: List[int] = []
+        ids: List[bytes] = []
+        with open(output_path, 'wb') as out:
+            header = PdfShardReader(paths[0]).header
+            out.write(header)
+            for path in paths:
+                shard = PdfShardReader(path)
+                ids.append(shard.trailer_id())
+                kids.extend(self._copy_shard(shard, out))
+            self._write(out, self.PAGES, b'<<\n/Count %d /Kids [ %s ] /Type /Pages\n>>' % (
+                len(kids), b' '.join(b'%d 0 R' % kid for kid in kids)))
+            self._write(out, self.CATALOG, b'<<\n/PageMode /UseNone /Pages %d 0 R /Type /Catalog\n>>' % self.PAGES)
+            info = self._new_number()
+            self._write(out, info, b'<<\n/Producer (prototy.py sharded export) /Title (untitled)\n>>')
+            self._write_xref(out, info, hashlib.md5(b''.join(ids)).hexdigest().encode())
+        print(f"PdfMerger: {len(paths)} shards, {len(kids)} pages, {self.objects_read} objects read, "
+              f"{self.objects_shared} shared instead of written again.")
+        return len(kids)
+
+    def _new_number(self) -> int:
+        number = self._next_number
+        self._next_number += 1
+        return number
+
+    def _write(self, out: BinaryIO, number: int, head: bytes, stream: Optional[bytes] = None):
+        self._xref[number] = out.tell()
+        out.write(b'%d 0 obj\n' % number)
+        out.write(head)
+        if stream is not None:
+            out.write(b'\nstream\n')
+            out.write(stream)
+            out.write(b'\nendstream')
+        out.write(b'\nendobj\n')
+
+    def _copy_shard(self, shard: PdfShardReader, out: BinaryIO) -> List[int]:
+        """Writes a shard's pages (and whatever they use that is not written yet); returns their merged numbers."""
+        renumbered: Dict[int, int] = {}
+        visiting = set()
+
+        def copy(number: int) -> int:
+            if number in renumbered:
+                return renumbered[number]
+            if number in visiting: # A reference cycle outside the page tree: give it a number now, write it below
+                renumbered[number] = self._new_number()
+                return renumbered[number]
+            visiting.add(number)
+            obj = shard.object(number)
+            self.objects_read += 1
+            for child in obj.references():
+                copy(child)
+            head = _REFERENCE.sub(lambda m: b'%d 0 R' % renumbered[int(m.group(1))], _PARENT.sub(b'', obj.head))
+            visiting.discard(number)
+            if number in renumbered: # Closed a cycle: keep the number handed out
+                self._write(out, renumbered[number], head, obj.stream)
+                return renumbered[number]
+            digest = hashlib.md5(head + b'\0' + (obj.stream if obj.stream is not None else b'')).digest()
+            merged = self._written.get(digest)
+            if merged is None:
+                merged = self._new_number()
+                self._write(out, merged, head, obj.stream)
+                self._written[digest] = merged
+            else:
+                self.objects_shared += 1
+            renumbered[number] = merged
+            return merged
+
+        pages = []
+        for number in shard.page_numbers():
+            obj = shard.object(number)
+            self.objects_read += 1
+            for child in obj.references():
+                copy(child)
+            head = _REFERENCE.sub(lambda m: b'%d 0 R' % renumbered[int(m.group(1))], _PARENT.sub(b'', obj.head))
+            # Every page hangs off the one merged page tree
+            head = head.rstrip()[:-2].rstrip() + b' /Parent %d 0 R\n>>' % self.PAGES
+            page = self._new_number()
+            self._write(out, page, head)
+            pages.append(page)
+        return pages
+
+    def _write_xref(self, out: BinaryIO, info: int, document_id: bytes):
+        size = self._next_number
+        xref_at = out.tell()
+        out.write(b'xref\n0 %d\n0000000000 65535 f \n' % size)
+        for number in range(1, size):
+            offset = self._xref.get(number)
+            out.write(b'%010d 00000 n \n' % offset if offset is not None else b'0000000000 00000 f \n')
+        out.write(b'trailer\n<<\n/ID [<%s><%s>] /Info %d 0 R /Root %d 0 R /Size %d\n>>\nstartxref\n%d\n%%%%EOF\n'
+                  % (document_id, document_id, info, self.CATALOG, size, xref_at))
+
+
+def merge_pdfs(paths: List[str], output_path: str) -> int:
+    """Concatenates the PDFs at paths (written by this package's exporter) into output_path; returns the page count."""
+    return PdfMerger().merge(paths, output_path)
@@ -0,0 +1,116 @@
+# utils/record_source.py
+
+import math
+from itertools import chain, islice
+from typing import List, Dict, Optional, Any, Tuple, Iterable, Iterator
+
+import pandas as pd
+
+# Rows converted to dicts at a time; bounds the memory used for records during export
+DEFAULT_CHUNK_SIZE = 1000
+# Columns that say how many copies of a row's card to print (first one present wins)
+QUANTITY_COLUMNS = ('@qty', 'qty', '@copies', 'copies')
+
+
+def iter_records(df: Optional[pd.DataFrame] = None, csv_path: Optional[str] = None,
+                 chunksize: int = DEFAULT_CHUNK_SIZE) -> Iterator[Dict[str, Any]]:
+    """
+    Yields merge records (one dict per row, same values as DataFrame.to_dict('records'))
+    without building the whole list up front.
+
+    With csv_path the file is streamed with read_csv(chunksize=...), so only one chunk of
+    the CSV is ever in memory; otherwise df is converted one chunk of rows at a time.
+    With no data at all a single empty record is yielded, so the template still exports once.
+    """
+    yielded = False
+    if csv_path:
+        for chunk in pd.read_csv(csv_path, chunksize=chunksize):
+            for record in chunk.to_dict('records'):
+                yielded = True
+                yield record
+    elif df is not None:
+        for start in range(0, len(df), chunksize):
+            for record in df.iloc[start:start + chunksize].to_dict('records'):
+                yielded = True
+                yield record
+    if not yielded:
+        yield {}
+
+
+def peek_columns(records: Iterable[Dict[str, Any]]) -> Tuple[List[str], Iterator[Dict[str, Any]]]:
+    """Returns the first record's keys and an iterator that still yields every record."""
+    records = iter(records)
+    first = next(records, None)
+    if first is None:
+        return [], iter(())
+    return list(first.keys()), chain([first], records)
+
+
+def batched(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    """Groups items into lists of at most size (one page worth of cards)."""
+    items = iter(items)
+    while True:
+        batch = list(islice(items, size))
+        if not batch:
+            return
+        yield batch
+
+
+def quantity_of(record: Dict[str, Any]) -> int:
+    """
+    Number of copies a record asks for through its quantity column (see QUANTITY_COLUMNS).
+    Rows without one, or with a blank cell, print once; unreadable values print once with a warning.
+    """
+    for column in QUANTITY_COLUMNS:
+        if column in record:
+            value = record[column]
+            if value is None or (isinstance(value, float) and math.isnan(value)) or str(value).strip() == '':
+                return 1
+            try:
+                return max(0, int(float(value)))
+            except (TypeError, ValueError):
+                print(f"record_source: Invalid quantity {value!r} in column '{column}'; printing one copy.")
+                return 1
+    return 1
+
+
+def skip_zero_quantity(records: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+    """Drops rows whose quantity is 0 before they are rendered."""
+    return (record for record in records if quantity_of(record) > 0)
+
+
+def expand_quantities(cards: Iterable[Tuple[Dict[str, Any], Any]],
+                      copies: Optional[Iterable[int]] = None) -> Iterator[Tuple[Dict[str, Any], Any]]:
+    """
+    Repeats each (record, card) pair quantity_of(record) times, lazily, so a card is rendered
+    once and placed as many times as its row asks for without building the expanded row list.
+    copies, when given, holds each pair's count in order instead (a shard's part of a row's copies).
+    """
+    counts = iter(copies) if copies is not None else None
+    for record, card in cards:
+        for _ in range(next(counts) if counts is not None else quantity_of(record)):
+            yield record, card
+
+
+def shard_records(records: Iterable[Dict[str, Any]], cards_per_shard: int) -> Iterator[List[Tuple[Dict[str, Any], int]]]:
+    """
+    Groups records into shards of exactly cards_per_shard cards (the last may hold fewer), counting
+    each row's quantity, as (record, copies) pairs. A row whose copies straddle two shards is split
+    between them, so with cards_per_shard a multiple of the cards per page every shard starts on a
+    fresh page. The records themselves are left as they are, so a shape bound to the quantity column
+    still shows the row's full quantity.
+    """
+    shard: List[Tuple[Dict[str, Any], int]] = []
+    cards = 0
+    for record in skip_zero_quantity(records):
+        remaining = quantity_of(record)
+        while remaining:
+            take = min(remaining, cards_per_shard - cards)
+            shard.append((record, take))
+            remaining -= take
+            cards += take
+            if cards == cards_per_shard:
+                yield shard
+                shard, cards = [], 0
+    if shard:
+        yield shard
@@ -0,0 +1,294 @@
+# utils/svg_export.py
+
+import base64
+import io
+import mimetypes
+import os
+import shutil
+from typing import List, Dict, Optional, Any, Tuple
+from urllib.parse import quote
+from xml.sax.saxutils import escape, quoteattr
+
+from PIL import Image, ImageColor
+
+from utils.card_sinks import CardSink
+from utils.geometry import get_layers_bounds
+from utils.image_export import CardFileNames
+from utils.pdf_export import atomic_output
+
+# How an SVG refers to the pictures of Image containers: a relative link to the file, or the file's bytes inline
+SVG_IMAGE_MODES = ('link', 'embed')
+# Browsers read these inline; anything else is re-encoded as PNG when embedded
+_WEB_IMAGE_TYPES = {'image/png', 'image/jpeg', 'image/gif', 'image/webp', 'image/svg+xml'}
+_FONT_FORMATS = {'.ttf': 'truetype', '.otf': 'opentype', '.woff': 'woff', '.woff2': 'woff2'}
+_FONT_TYPES = {'.ttf': 'font/ttf', '.otf': 'font/otf', '.woff': 'font/woff', '.woff2': 'font/woff2'}
+# Subdirectory of the export the linked font files are copied into
+SVG_FONT_DIR = 'fonts'
+
+
+def _number(value: float) -> str:
+    """Coordinates to 3 decimals without trailing zeros (a thousandth of a point is far below print resolution)."""
+    text = f"{value:.3f}".rstrip('0').rstrip('.')
+    return '0' if text in ('', '-0') else text
+
+
+def svg_element(tag: str, attributes: Dict[str, Any], **extra: Any) -> str:
+    """
+    One empty SVG element. Numbers are written compactly, a 'points' list of (x, y) pairs as
+    'x,y x,y ...', and underscores in extra's keyword names become hyphens (stroke_width=...).
+    """
+    parts = [tag]
+    for key, value in list(attributes.items()) + [(k.replace('_', '-'), v) for k, v in extra.items()]:
+        if key == 'points':
+            value = ' '.join(f"{_number(x)},{_number(y)}" for x, y in value)
+        elif isinstance(value, (int, float)):
+            value = _number(value)
+        parts.append(f"{key}={quoteattr(str(value))}")
+    return f"<{' '.join(parts)}/>"
+
+
+def _css_color(color: str) -> Optional[str]:
+    try:
+        r, g, b = ImageColor.getrgb(color)[:3]
+    except (ValueError, AttributeError):
+        return None
+    return f"#{r:02x}{g:02x}{b:02x}"
+
+
+class SvgCardWriter(CardSink):
+    """
+    Writes one SVG per card into a directory, built from the template's shapes rather than from
+    a raster: borders as rect/ellipse/polygon elements (Shape.svg_outline), text as <text> laid
+    out with the same wrapping as the raster and PDF paths (Shape.layout_vector_text at
+    render_dpi), and pictures as <image> elements clipped to their shape, linking to the picture
+    file (relative to the SVG) or, with images='embed', carrying its bytes as a data URI. Fonts
+    are referenced by family with @font-face rules: their files are copied into the directory's
+    fonts/ folder and linked from there, so the export can be served as it is, or with
+    images='embed' stored in each file as data URIs like the pictures.
+
+    Nothing is rasterized: shapes not bound to the data are turned into SVG once and reused for
+    every card, so a card costs the layout of its bound text plus string building. Each card's
+    file is written as soon as it is built. File names follow CardFileNames ('.svg').
+
+    As a CardSink (needs_raster = False) it can ride along any export's pass, or run on its own
+    through PdfExporter.export_to_sinks, which then renders nothing.
+    """
+
+    needs_raster = False
+
+    def __init__(self, directory: str, layers: List[Any], font_manager, name_column: Optional[str] = None,
+                 images: str = 'link', render_dpi: int = 300):
+        if images not in SVG_IMAGE_MODES:
+            raise ValueError(f"Unknown SVG image mode '{images}'. Choose one of: {', '.join(SVG_IMAGE_MODES)}.")
+        self.directory = directory
+        self.layers = layers
+        self.font_manager = font_manager
+        self.images = images
+        self.render_dpi = render_dpi
+        self.model_bounds = get_layers_bounds(layers)
+        min_x, min_y, max_x, max_y = self.model_bounds
+        self.size = (max(1, max_x - min_x), max(1, max_y - min_y))
+        self.files: List[str] = []
+        self._names = CardFileNames(name_column, '.svg')
+        self._static: Dict[Tuple[int, Any], Tuple[List[str], List[str], List[Tuple[str, str, str]]]] = {}
+        self._font_faces: Dict[Tuple[str, str, str], Optional[str]] = {}
+        self._data_uris: Dict[str, Optional[str]] = {}
+        self._font_files: Dict[str, str] = {} # Font file path -> its copy's name in fonts/
+        os.makedirs(directory, exist_ok=True)
+        print(f"SvgCardWriter: SVG files in {directory}, names from {name_column or 'the row number'}, "
+              f"images {'linked' if images == 'link' else 'embedded'}.")
+
+    def add_card(self, row: Dict[str, Any], card: Any = None, copies: int = 1):
+        """CardSink entry point: one file per row, whatever its quantity (the raster, if any, is not used)."""
+        self.write_card(row)
+
+    def write_card(self, row: Dict[str, Any]) -> str:
+        """Builds and writes the next row's SVG; returns its file name."""
+        name = self._names.next(row)
+        with atomic_output(os.path.join(self.directory, name)) as part_path:
+            with open(part_path, 'w', encoding='utf-8') as f:
+                f.write(self.card_svg(row))
+        self.files.append(name)
+        return name
+
+    def card_svg(self, row: Dict[str, Any]) -> str:
+        """The SVG document for one merge row, shapes in stacking order over a white card."""
+        min_x, min_y, _, _ = self.model_bounds
+        width, height = self.size
+        defs: List[str] = []
+        body: List[str] = [svg_element('rect', {'width': width, 'height': height}, fill='#ffffff')]
+        fonts: Dict[Tuple[str, str, str], None] = {}
+        for layer_index, layer in enumerate(self.layers):
+            for sid in sorted(layer.shapes.keys()):
+                shape = layer.shapes[sid]
+                if shape.name in row:
+                    shape_defs, shape_body, shape_fonts = self._shape_svg(shape, row, min_x, min_y, f"{layer_index}-{sid}")
+                else: # Static shapes look the same on every card
+                    key = (layer_index, sid)
+                    if key not in self._static:
+                        self._static[key] = self._shape_svg(shape, {}, min_x, min_y, f"{layer_index}-{sid}")
+                    shape_defs, shape_body, shape_fonts = self._static[key]
+                defs.extend(shape_defs)
+                body.extend(shape_body)
+                fonts.update(dict.fromkeys(shape_fonts))
+        faces = [face for face in (self._font_face(*font) for font in fonts) if face]
+        if faces:
+            defs.insert(0, f"<style>{escape(''.join(faces))}</style>")
+        return ''.join([
+            '<?xml version="1.0" encoding="UTF-8"?>\n',
+            f'<svg xmlns="http://www.w3.org/2000/svg" xmlns:xlink="http://www.w3.org/1999/xlink" '
+            f'width="{_number(width / 72.0)}in" height="{_number(height / 72.0)}in" '
+            f'viewBox="0 0 {_number(width)} {_number(height)}">\n',
+            f"<defs>{''.join(defs)}</defs>\n" if defs else '',
+            '\n'.join(body),
+            '\n</svg>\n',
+        ])
+
+    def _shape_svg(self, shape, row: Dict[str, Any], min_x: float, min_y: float,
+                   element_id: str) -> Tuple[List[str], List[str], List[Tuple[str, str, str]]]:
+        """(defs, elements, fonts used) for one shape: its content (text or picture), then its border, like the raster."""
+        defs: List[str] = []
+        body: List[str] = []
+        fonts: List[Tuple[str, str, str]] = []
+        x0, y0, x1, y1 = shape.get_bbox
+        inset = shape.line_width or 0
+        box = (x0 + inset - min_x, y0 + inset - min_y, max(1, x1 - x0 - 2 * inset), max(1, y1 - y0 - 2 * inset))
+        # Content is cut to the shape like the raster's masks (Text to its box at least, as its raster is box-sized)
+        clip = shape.svg_clip_geometry(*box)
+        if shape.container_type == 'Text':
+            text = str(row[shape.name]) if shape.name in row else shape.text
+            element = self._text_element(shape, text, box)
+            if element:
+                clip = clip or ('rect', {'x': box[0], 'y': box[1], 'width': box[2], 'height': box[3]})
+                defs.append(f'<clipPath id="clip-{element_id}">{svg_element(*clip)}</clipPath>')
+                body.append(f'<g clip-path="url(#clip-{element_id})">{element}</g>')
+                fonts.append((shape.font_name, shape.font_weight, shape.font_slant))
+        elif shape.container_type == 'Image':
+            path = str(row[shape.name]).strip() if shape.name in row else shape.path
+            href = self._image_href(shape, path)
+            if href:
+                attributes = {'x': box[0], 'y': box[1], 'width': box[2], 'height': box[3],
+                              'preserveAspectRatio': 'none', 'xlink:href': href}
+                if clip:
+                    defs.append(f'<clipPath id="clip-{element_id}">{svg_element(*clip)}</clipPath>')
+                    attributes['clip-path'] = f"url(#clip-{element_id})"
+                body.append(svg_element('image', attributes))
+        outline = shape.svg_outline(min_x, min_y)
+        if outline:
+            body.append(outline)
+        return defs, body, fonts
+
+    def _text_element(self, shape, text: str, box: Tuple[float, float, float, float]) -> Optional[str]:
+        layout = shape.layout_vector_text(text, self.render_dpi)
+        if not layout or not layout['lines']:
+            return None
+        family = str(shape.font_name).replace("'", '')
+        attributes = {'font-family': f"'{family}', sans-serif", 'font-size': layout['font_size'],
+                      'fill': _css_color(layout['color']) or '#000000', 'xml:space': 'preserve'}
+        if shape.font_weight == 'bold':
+            attributes['font-weight'] = 'bold'
+        if shape.font_slant == 'italic':
+            attributes['font-style'] = 'italic'
+        spans = ''.join(f'<tspan x="{_number(box[0] + line_x)}" y="{_number(box[1] + baseline_y)}">{escape(line)}</tspan>'
+                        for line, line_x, baseline_y in layout['lines'])
+        return svg_element('text', attributes)[:-2] + f">{spans}</text>"
+
+    def _font_face(self, family: str, weight: str, slant: str) -> Optional[str]:
+        """
+        An @font-face rule for the font file FontManager resolves for this face, linking its copy in
+        fonts/ or, when embedding, carrying it as a data URI (None when there is none a browser reads).
+        """
+        key = (family, weight, slant)
+        if key not in self._font_faces:
+            rule = None
+            path = self.font_manager.get_font_filepath(family, weight, slant) if self.font_manager else None
+            font_format = _FONT_FORMATS.get(os.path.splitext(path)[1].lower()) if path else None
+            # .ttc collections and bitmap fonts are left to the viewer's own fonts
+            url = (self._font_data_uri(path) if self.images == 'embed' else self._font_copy(path)) if font_format else None
+            if url:
+                rule = (f"@font-face{{font-family:'{family.replace(chr(39), '')}';"
+                        f"font-weight:{'bold' if weight == 'bold' else 'normal'};"
+                        f"font-style:{'italic' if slant == 'italic' else 'normal'};"
+                        f"src:url('{url}') format('{font_format}');}}")
+            self._font_faces[key] = rule
+        return self._font_faces[key]
+
+    def _font_copy(self, path: str) -> Optional[str]:
+        """Copies a font file into fonts/ (once per export) and returns its URL relative to the SVGs."""
+        key = os.path.abspath(path)
+        if key not in self._font_files:
+            name = os.path.basename(path)
+            if name in self._font_files.values(): # Same file name from another directory
+                stem, ext = os.path.splitext(name)
+                name = f"{stem}-{len(self._font_files) + 1}{ext}"
+            try:
+                os.makedirs(os.path.join(self.directory, SVG_FONT_DIR), exist_ok=True)
+                shutil.copyfile(path, os.path.join(self.directory, SVG_FONT_DIR, name))
+            except OSError as e:
+                print(f"SvgCardWriter: Cannot copy font {path}: {e}; the viewer's own fonts are used.")
+                return None
+            self._font_files[key] = name
+        return f"{SVG_FONT_DIR}/{quote(self._font_files[key])}"
+
+    def _font_data_uri(self, path: str) -> Optional[str]:
+        key = f"font:{os.path.abspath(path)}"
+        if key not in self._data_uris:
+            try:
+                with open(path, 'rb') as f:
+                    self._data_uris[key] = (f"data:{_FONT_TYPES[os.path.splitext(path)[1].lower()]};base64,"
+                                            f"{base64.b64encode(f.read()).decode('ascii')}")
+            except OSError as e:
+                print(f"SvgCardWriter: Cannot read font {path}: {e}; the viewer's own fonts are used.")
+                self._data_uris[key] = None
+        return self._data_uris[key]
+
+    def _relative_url(self, path: str) -> str:
+        relative = os.path.relpath(os.path.abspath(path), os.path.abspath(self.directory))
+        return quote(relative.replace(os.sep, '/'))
+
+    def _image_href(self, shape, path: str) -> Optional[str]:
+        """The link or data URI for an Image container's picture; None (with a message) when there is none."""
+        if not path:
+            content = getattr(shape, 'content', None)
+            if isinstance(content, Image.Image): # A picture that only lives in the template, not in a file
+                key = f"content:{shape.sid}"
+                if key not in self._data_uris:
+                    self._data_uris[key] = self._png_data_uri(content)
+                return self._data_uris[key]
+            return None
+        if not os.path.exists(path):
+            print(f"SvgCardWriter: Image file not found at {path}, left out.")
+            return None
+        if self.images == 'link':
+            return self._relative_url(path)
+        # Template pictures repeat on every card: read and encode each file once
+        key = os.path.abspath(path)
+        if key not in self._data_uris:
+            self._data_uris[key] = self._file_data_uri(path)
+        return self._data_uris[key]
+
+    @staticmethod
+    def _file_data_uri(path: str) -> Optional[str]:
+        mime = mimetypes.guess_type(path)[0]
+        try:
+            if mime in _WEB_IMAGE_TYPES: # The file as it is, no decoding
+                with open(path, 'rb') as f:
+                    return f"data:{mime};base64,{base64.b64encode(f.read()).decode('ascii')}"
+            with Image.open(path) as img:
+                return SvgCardWriter._png_data_uri(img)
+        except OSError as e:
+            print(f"SvgCardWriter: Cannot read image {path}: {e}")
+            return None
+
+    @staticmethod
+    def _png_data_uri(img: Image.Image) -> str:
+        buf = io.BytesIO()
+        img.convert('RGBA').save(buf, format='PNG')
+        return f"data:image/png;base64,{base64.b64encode(buf.getvalue()).decode('ascii')}"
+
+    def close(self) -> List[str]:
+        print(f"SvgCardWriter: {len(self.files)} cards written to {self.directory}.")
+        return self.files
+
+    def abort(self):
+        """Each file is written whole as it is built, so there is nothing half-done to drop."""
@@ -0,0 +1,114 @@
+# utils/tiling.py
+
+import math
+from typing import List, Tuple, Optional
+
+# Page margin around a tile (room for crop marks and the label), in inches
+TILE_MARGIN_IN = 0.5
+DEFAULT_TILE_OVERLAP_IN = 0.25
+# Crop mark length and gap from the tile's corner, and registration target radius, in points
+CROP_MARK_LENGTH = 14
+CROP_MARK_GAP = 4
+TARGET_RADIUS = 6
+
+
+class Tile:
+    """One printable page of a component: its grid position and the part (x0, y0, x1, y1) of the component it shows, in points from the component's top-left."""
+
+    def __init__(self, row: int, col: int, rows: int, cols: int, x0: float, y0: float, x1: float, y1: float):
+        self.row = row
+        self.col = col
+        self.rows = rows
+        self.cols = cols
+        self.x0, self.y0, self.x1, self.y1 = x0, y0, x1, y1
+
+    @property
+    def width(self) -> float:
+        return self.x1 - self.x0
+
+    @property
+    def height(self) -> float:
+        return self.y1 - self.y0
+
+    def pixel_box(self, component_size: Tuple[float, float], canvas_size: Tuple[int, int]) -> Tuple[int, int, int, int]:
+        """The tile in the component's canvas pixels (CardRenderer.render_tile's tile argument)."""
+        sx, sy = canvas_size[0] / component_size[0], canvas_size[1] / component_size[1]
+        return (int(round(self.x0 * sx)), int(round(self.y0 * sy)),
+                int(round(self.x1 * sx)), int(round(self.y1 * sy)))
+
+    def __repr__(self):
+        return f"Tile(row={self.row}, col={self.col}, x={self.x0:.1f}-{self.x1:.1f}, y={self.y0:.1f}-{self.y1:.1f})"
+
+
+def _spans(length: float, printable: float, overlap: float) -> List[Tuple[float, float]]:
+    """Splits 0..length into pieces of at most printable that overlap their neighbours by overlap."""
+    if length <= printable:
+        return [(0.0, length)]
+    step = printable - overlap
+    count = math.ceil((length - overlap) / step)
+    return [(i * step, min(i * step + printable, length)) for i in range(count)]
+
+
+def plan_tiles(component_size: Tuple[float, float], printable_size: Tuple[float, float],
+               overlap: float) -> List[Tile]:
+    """
+    Splits a component (width, height in points) into page tiles of at most printable_size,
+    row by row from the top-left. Neighbouring tiles share an overlap-wide strip, so the
+    printed pages can be trimmed or glued edge to edge without gaps.
+    """
+    printable_w, printable_h = printable_size
+    overlap = max(0.0, min(overlap, printable_w / 2, printable_h / 2))
+    columns = _spans(component_size[0], printable_w, overlap)
+    rows = _spans(component_size[1], printable_h, overlap)
+    return [Tile(r, c, len(rows), len(columns), x0, y0, x1, y1)
+            for r, (y0, y1) in enumerate(rows) for c, (x0, x1) in enumerate(columns)]
+
+
+def draw_tile_marks(pdf, tile: Tile, tiles: List[Tile], origin: Tuple[float, float], label: Optional[str] = None):
+    """
+    Draws the assembly marks for one tile page. origin is where the tile's top-left corner sits on
+    the page (points, y up). Crop marks go in the margin at each corner; dashed lines show where
+    each neighbouring tile's edge falls inside this one; a registration target at the middle of
+    every strip shared with a neighbour is printed on both pages at the same spot of the component,
+    so the two line up when their targets are overlaid. The label names the tile in the margin.
+    """
+    ox, oy = origin
+
+    def page_point(x: float, y: float) -> Tuple[float, float]:
+        return ox + (x - tile.x0), oy - (y - tile.y0)
+
+    left, top = page_point(tile.x0, tile.y0)
+    right, bottom = page_point(tile.x1, tile.y1)
+    pdf.saveState()
+    pdf.setStrokeColorRGB(0, 0, 0)
+    pdf.setLineWidth(0.5)
+    for x, y, dx, dy in ((left, top, -1, 1), (right, top, 1, 1), (left, bottom, -1, -1), (right, bottom, 1, -1)):
+        pdf.line(x + dx * CROP_MARK_GAP, y, x + dx * (CROP_MARK_GAP + CROP_MARK_LENGTH), y)
+        pdf.line(x, y + dy * CROP_MARK_GAP, x, y + dy * (CROP_MARK_GAP + CROP_MARK_LENGTH))
+
+    by_position = {(t.row, t.col): t for t in tiles}
+    for dr, dc in ((0, -1), (0, 1), (-1, 0), (1, 0)):
+        other = by_position.get((tile.row + dr, tile.col + dc))
+        if other is None:
+            continue
+        # The strip both tiles print
+        sx0, sy0 = max(tile.x0, other.x0), max(tile.y0, other.y0)
+        sx1, sy1 = min(tile.x1, other.x1), min(tile.y1, other.y1)
+        pdf.setDash(3, 2)
+        if dc: # The neighbour's inner edge, where this page is trimmed when butting the pages together
+            edge_x = page_point(other.x0 if dc > 0 else other.x1, 0)[0]
+            pdf.line(edge_x, top, edge_x, bottom)
+        else:
+            edge_y = page_point(0, other.y0 if dr > 0 else other.y1)[1]
+            pdf.line(left, edge_y, right, edge_y)
+        pdf.setDash()
+        cx, cy = page_point((sx0 + sx1) / 2, (sy0 + sy1) / 2)
+        pdf.circle(cx, cy, TARGET_RADIUS, stroke=1, fill=0)
+        pdf.line(cx - TARGET_RADIUS * 1.5, cy, cx + TARGET_RADIUS * 1.5, cy)
+        pdf.line(cx, cy - TARGET_RADIUS * 1.5, cx, cy + TARGET_RADIUS * 1.5)
+
+    pdf.setFillColorRGB(0, 0, 0)
+    pdf.setFont('Helvetica', 7)
+    text = f"Tile {tile.row + 1}-{tile.col + 1} of {tile.rows}x{tile.cols} (row-column)"
+    pdf.drawString(left, bottom - CROP_MARK_GAP - 9, f"{label}  {text}" if label else text)
+    pdf.restoreState()
@@ -5,7 +5,7 @@ from tkinter import ttk, messagebox # For themed widgets and message boxes
 
 # For handling and displaying images on the Tkinter canvas
 # Import necessary components from PIL
-from PIL import Image, ImageTk, ImageDraw # Add ImageDraw here
+from PIL import Image, ImageTk
 import pandas as pd
 # Note: ImageDraw and ImageFont are likely used within the Shape's
 # _draw_text_content method or a PDF export utility, not directly
@@ -22,6 +22,8 @@ from model import DrawingModel, Layer# The view observes and displays the model
 
 # Assuming utility functions like _calculate_snap are in utils/geometry.py
 from utils.geometry import calculate_snap, parse_dimension # If used in canvas event handlers
+from utils.card_renderer import CardRenderer # Tk-free card rendering shared with export workers
+from utils.export_profiles import get_export_profile # Named export settings (draft/print/archive)
 
 # Assuming constants are in a central constants.py at the root level
 from constants import CANVAS_WIDTH, CANVAS_HEIGHT, PANEL_WIDTH, TOOLBAR_HEIGHT, PPI # Import necessary constants
@@ -49,8 +51,8 @@ class DrawingView(tk.Frame):
         self.grid_var = tk.BooleanVar(value=True)
         self.snap_var = tk.BooleanVar(value=True)
 
-        # Define RENDER_DPI here for consistency in the View
-        self.RENDER_DPI = 300
+        # Define RENDER_DPI here for consistency in the View (the default 'print' export profile's DPI)
+        self.RENDER_DPI = get_export_profile().render_dpi
 
 
         # Build UI
@@ -1024,137 +1026,69 @@ class DrawingView(tk.Frame):
 
     # Render a card as an image. This will be used in the future to render a Component class
     # but is primarily used for card exporting at the time.   
-    def flatten_card(self, row_data: dict, model: DrawingModel) -> Image.Image:
+    def flatten_card(self, row_data: dict, model: DrawingModel, profile: Optional[str] = None) -> Image.Image:
         """
-        Renders the full card into a high-resolution, unscaled image (flattened).
-        Merges CSV data by matching each row field to shapes named '@<field>'.
-        Draws all shapes (text and images) into a single RGBA image at the model's native pixel resolution.
-        Adjusts for shape.line_width to inset content and avoid border clipping.
+        Renders the full card into a high-resolution, unscaled image (flattened), at the DPI of
+        the named export profile (RENDER_DPI when none is given).
+        The drawing itself lives in CardRenderer so export workers can run it without Tkinter.
         """
-        print("\nDrawingView.flatten_card: Starting flattening process.")
-        # Compute overall model bounds
-        min_x, min_y, max_x, max_y = model.get_model_bounds()
-        width_72dpi = max(1, int(round(max_x - min_x)))
-        height_72dpi = max(1, int(round(max_y - min_y)))
-
-        # Calculate the dimensions of the canvas at the desired RENDER_DPI
-        scale_factor = self.RENDER_DPI / 72.0
-        canvas_width_hires = max(1, int(round(width_72dpi * scale_factor)))
-        canvas_height_hires = max(1, int(round(height_72dpi * scale_factor)))
-
-        # Create the base canvas for the card at high resolution.
-        canvas = Image.new("RGBA", (canvas_width_hires, canvas_height_hires), (255, 255, 255, 255))
-        draw = ImageDraw.Draw(canvas) # Get a draw context for drawing outlines later
-
-        # Merge CSV data into shapes: for each key, find shape named '@<field>'
-        for key, val in row_data.items():
-            shape_name = str(key)
-            for layer in model.layers:
-                for shape in layer.shapes.values():
-                    if shape.name == shape_name:
-                        if shape.container_type == 'Text':
-                            shape.text = str(val)
-                            # Pass RENDER_DPI to _draw_text_content for high-resolution PIL text rendering
-                            shape._draw_text_content(draw_pil=True, render_dpi=self.RENDER_DPI) 
-                        elif shape.container_type == 'Image':
-                            shape.path = str(val).strip()
-                            shape._load_image_content()
-
-        # Draw each shape into the canvas
-        for layer in model.layers:
-            print(f"DrawingView.flatten_card: Layer '{layer.name}'")
-            for sid in sorted(layer.shapes.keys()):
-                shape = layer.shapes[sid]
-                # raw bbox in 72dpi coordinates
-                x0_72dpi, y0_72dpi, x1_72dpi, y1_72dpi = shape.get_bbox
-                
-                # compute inset half border in 72dpi
-                inset_72dpi = (shape.line_width or 0)
-                
-                # adjust bbox for content in 72dpi
-                adj_x0_72dpi = x0_72dpi + inset_72dpi
-                adj_y0_72dpi = y0_72dpi + inset_72dpi
-                adj_x1_72dpi = x1_72dpi - inset_72dpi
-                adj_y1_72dpi = y1_72dpi - inset_72dpi
-                
-                # Convert adjusted bbox to high-resolution pixels for pasting
-                paste_x_hires = int(round((adj_x0_72dpi - min_x) * scale_factor))
-                paste_y_hires = int(round((adj_y0_72dpi - min_y) * scale_factor))
-                paste_width_hires = max(1, int(round((adj_x1_72dpi - adj_x0_72dpi) * scale_factor)))
-                paste_height_hires = max(1, int(round((adj_y1_72dpi - adj_y0_72dpi) * scale_factor)))
-
-                if paste_width_hires <= 0 or paste_height_hires <= 0:
-                    continue
-
-                # paste shape content (text/image)
-                content = getattr(shape, 'content', None)
-                if isinstance(content, Image.Image):
-                    img = content.convert('RGBA')
-                    
-                    if shape.container_type == 'Text':
-                        # For text, we assume _draw_text_content has already generated
-                        # the image at the correct high-resolution dimensions.
-                        # No resizing should occur here to prevent fuzziness.
-                        if img.size != (paste_width_hires, paste_height_hires):
-                            print(f"Warning: Text image size mismatch for shape {sid}. "
-                                  f"Expected ({paste_width_hires}, {paste_height_hires}), got {img.size}. "
-                                  f"This indicates an issue in _draw_text_content, but no resizing performed here.")
-                        # img is used directly as generated by _draw_text_content
-                    else: # For Image container types, resizing is necessary to fit the bounding box
-                        if img.size != (paste_width_hires, paste_height_hires):
-                            img = img.resize((paste_width_hires, paste_height_hires), Image.Resampling.LANCZOS)
-                    
-                    canvas.paste(img, (paste_x_hires, paste_y_hires), img)
-
-                # draw outline on original bbox (scaled to high-res canvas)
-                raw_px_hires = int(round((x0_72dpi - min_x) * scale_factor))
-                raw_py_hires = int(round((y0_72dpi - min_y) * scale_factor))
-                raw_w_hires  = int(round((x1_72dpi - x0_72dpi) * scale_factor))
-                raw_h_hires  = int(round((y1_72dpi - y0_72dpi) * scale_factor))
-                
-                # Scale line width for drawing outline on high-res canvas
-                line_width_hires = max(1, int(round(shape.line_width * scale_factor)))
-
-                if shape.line_width and shape.color:
-                    coords_hires = [raw_px_hires, raw_py_hires, raw_px_hires + raw_w_hires, raw_py_hires + raw_h_hires]
-                    try:
-                        if shape.shape_type == 'rectangle':
-                            draw.rectangle(coords_hires, outline=shape.color, width=line_width_hires)
-                        elif shape.shape_type == 'oval':
-                            draw.ellipse(coords_hires, outline=shape.color, width=line_width_hires)
-                        elif shape.shape_type == 'triangle':
-                            cx_hires = (coords_hires[0] + coords_hires[2]) // 2
-                            pts_hires = [(coords_hires[0], coords_hires[3]), (cx_hires, coords_hires[1]), (coords_hires[2], coords_hires[3])]
-                            draw.polygon(pts_hires, outline=shape.color, width=line_width_hires)
-                        elif shape.shape_type == 'hexagon':
-                            cx_hires = (coords_hires[0] + coords_hires[2]) / 2
-                            cy_hires = (coords_hires[1] + coords_hires[3]) / 2
-                            hw_hires = (coords_hires[2] - coords_hires[0]) / 2
-                            hh_hires = (coords_hires[3] - coords_hires[1]) / 2
-                            pts_hires = [
-                                (int(cx_hires + hw_hires * math.cos(math.radians(60 * i - 30))),
-                                 int(cy_hires + hh_hires * math.sin(math.radians(60 * i - 30))))
-                                for i in range(6)
-                            ]
-                            draw.polygon(pts_hires, outline=shape.color, width=line_width_hires)
-                    except Exception as e:
-                        print(f"Outline error for shape {sid}: {e}")
-
-        print("DrawingView.flatten_card: Finished flattening.")
-        return canvas
+        render_dpi = get_export_profile(profile).render_dpi if profile else self.RENDER_DPI
+        renderer = CardRenderer(model.layers, render_dpi, model.get_model_bounds())
+        return renderer.flatten_card(row_data)
 
     def render_merged_card(self,
                            row_data: dict,
                            model: DrawingModel,
                            model_bounds: tuple[float, float, float, float],
-                           target_size_points: tuple[float, float]) -> Image.Image:
-        flattened = self.flatten_card(row_data, model)
+                           target_size_points: tuple[float, float],
+                           profile: Optional[str] = None) -> Image.Image:
+        render_dpi = get_export_profile(profile).render_dpi if profile else self.RENDER_DPI
+        renderer = CardRenderer(model.layers, render_dpi, model.get_model_bounds())
+        return renderer.render_merged_card(row_data, target_size_points)
 
-        from PIL import Image
 
-        # RENDER_DPI is already defined as a class attribute in DrawingView
-        tw_points, th_points = target_size_points
-        tw_pixels = max(1, int(round(tw_points * self.RENDER_DPI / 72.0)))
-        th_pixels = max(1, int(round(th_points * self.RENDER_DPI / 72.0)))
+class ExportProgressDialog(tk.Toplevel):
+    """
+    Small non-modal window for a background export: a progress bar, cards and pages done,
+    throughput and ETA from an ExportProgress, and a Cancel button. It does not grab input,
+    so the editor stays usable; the controller calls refresh() from the Tk loop while it polls.
+    """
 
-        return flattened.resize((tw_pixels, th_pixels), Image.Resampling.LANCZOS)
+    def __init__(self, master: tk.Misc, progress, file_name: str):
+        super().__init__(master)
+        self.progress = progress
+        self.title(f"Exporting {file_name}")
+        self.resizable(False, False)
+        self.transient(master)
+
+        self.status_var = tk.StringVar(value="Preparing export...")
+        ttk.Label(self, textvariable=self.status_var, width=52).pack(padx=12, pady=(12, 4), anchor=tk.W)
+        # 'maximum' in thousandths, so the bar moves smoothly on large decks
+        self.bar = ttk.Progressbar(self, orient=tk.HORIZONTAL, length=360, mode='determinate', maximum=1000)
+        self.bar.pack(padx=12, pady=4, fill=tk.X)
+        self.cancel_button = ttk.Button(self, text="Cancel", command=self.cancel)
+        self.cancel_button.pack(pady=(4, 12))
+        # Closing the window is the same as pressing Cancel
+        self.protocol("WM_DELETE_WINDOW", self.cancel)
+
+    def cancel(self):
+        """Asks the export to stop; the controller closes the dialog once the export thread has unwound."""
+        self.progress.cancel()
+        self.cancel_button.config(state=tk.DISABLED)
+        self.status_var.set("Cancelling...")
+
+    def refresh(self):
+        if self.progress.cancelled:
+            return
+        snap = self.progress.snapshot()
+        if snap['fraction'] is None:
+            # Total not known yet (still counting rows): just show activity
+            if str(self.bar.cget('mode')) != 'indeterminate':
+                self.bar.config(mode='indeterminate')
+            self.bar.step(10)
+        else:
+            if str(self.bar.cget('mode')) != 'determinate':
+                self.bar.config(mode='determinate')
+            self.bar['value'] = snap['fraction'] * 1000
+        if snap['cards'] or snap['total_cards']:
+            self.status_var.set(self.progress.status_text())